@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Any, Dict, Optional
+
+from app.security import get_current_active_user
+from app.models.user import UserPublic
+from app.models.enums import ExpenseCategory
+from app.services import analytics_service
+from app.core.db import get_database
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+router = APIRouter()
+
+@router.get("/expenses/{dimension}", summary="Get population-level expense statistics")
+async def get_expense_analytics(
+    dimension: str,
+    category: Optional[ExpenseCategory] = None,
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    current_user: UserPublic = Depends(get_current_active_user)
+) -> Dict[str, Any]:
+    if dimension not in analytics_service.DIMENSIONS:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, detail="dimension harus provinsi atau income_level.")
+    analytics = await analytics_service.get_expense_analytics(
+        db, dimension=dimension, category=category.value if category else None
+    )
+    if analytics is None:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Analitik belum tersedia. Jalankan job analitik terlebih dahulu.")
+    return {"success": True, "analytics": analytics}
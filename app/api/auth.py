@@ -10,6 +10,7 @@ from app.models.token import Token
 from app.services import user_service
 from app.security import create_access_token
 from app.core.config import settings
+from app.core.rate_limit import COST_AUTH, limit_per_ip
 
 router = APIRouter()
 
@@ -24,7 +25,8 @@ class AuthResponse(BaseModel):
 @router.post(
     "/register", 
     status_code=status.HTTP_201_CREATED,
-    summary="Register a new user"
+    summary="Register a new user",
+    dependencies=[Depends(limit_per_ip(COST_AUTH))]
 )
 async def register_user(
     user_in: UserCreate, 
@@ -40,7 +42,7 @@ async def register_user(
     user = await user_service.create_user(db=db, user_in=user_in)
     return {"message": "User registered successfully"}
 
-@router.post("/login", response_model=AuthResponse, summary="User login")
+@router.post("/login", response_model=AuthResponse, summary="User login", dependencies=[Depends(limit_per_ip(COST_AUTH))])
 async def login(
     login_data: LoginRequest,
     db: AsyncIOMotorDatabase = Depends(get_database)
@@ -64,7 +66,7 @@ async def login(
         user=user
     )
 
-@router.post("/token", response_model=Token, summary="OAuth2 compatible login")
+@router.post("/token", response_model=Token, summary="OAuth2 compatible login", dependencies=[Depends(limit_per_ip(COST_AUTH))])
 async def login_oauth2(
     db: AsyncIOMotorDatabase = Depends(get_database),
     form_data: OAuth2PasswordRequestForm = Depends()
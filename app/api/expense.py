@@ -1,17 +1,28 @@
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, status
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Request, Response, status
 from typing import List, Any, Dict
 
 from app.security import get_current_active_user
 from app.models.user import UserPublic
 from app.models.expense import ExpenseRecordPublic
-from app.services import gemini_service, expense_service
+from app.models.enums import ReceiptStatus
+from app.services import gemini_service, expense_service, receipt_image_service, receipt_cache_service
+from app.services.receipt_ocr_worker import receipt_ocr_workers
 from app.core.db import get_database
+from app.core.http_cache import PRIVATE_REVALIDATE, cached_json_response
+from app.core.rate_limit import COST_MODEL, COST_RECEIPT_OCR, limit_per_user
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
 router = APIRouter()
 
-@router.post("/upload", status_code=status.HTTP_201_CREATED, summary="Upload a receipt for OCR processing")
+@router.post(
+    "/upload",
+    status_code=status.HTTP_201_CREATED,
+    summary="Upload a receipt for OCR processing",
+    dependencies=[Depends(limit_per_user(COST_RECEIPT_OCR))],
+)
 async def upload_receipt(
+    response: Response,
+    asyncMode: bool = False,
     db: AsyncIOMotorDatabase = Depends(get_database),
     current_user: UserPublic = Depends(get_current_active_user),
     receiptImage: UploadFile = File(...)
@@ -19,17 +30,51 @@ async def upload_receipt(
     if not receiptImage.content_type or not receiptImage.content_type.startswith("image/"):
         raise HTTPException(status.HTTP_400_BAD_REQUEST, detail="File harus berupa gambar.")
         
-    image_bytes = await receiptImage.read()
-    extracted_data = await gemini_service.process_receipt_with_gemini(image_bytes, receiptImage.content_type)
+    user_id = str(current_user.id)
+    image = await receipt_image_service.preprocess_receipt_upload(receiptImage)
+
+    duplicate = await expense_service.get_expenses_for_duplicate_receipt(db, user_id=user_id, content_hash=image.content_hash)
+    if duplicate:
+        return {"success": True, "duplicate": True, "receipt_id": duplicate["receipt_id"], "expenses": duplicate["expenses"]}
+
+    extracted_data = await receipt_cache_service.get_cached_extraction(db, user_id, image.content_hash, image.perceptual_hash)
+    if extracted_data is None and asyncMode:
+        receipt_id = await expense_service.create_pending_receipt(
+            db, user_id=user_id, image_data=image.data, mime_type=image.mime_type,
+            content_hash=image.content_hash, perceptual_hash=image.perceptual_hash
+        )
+        receipt_ocr_workers.submit(receipt_id)
+        response.status_code = status.HTTP_202_ACCEPTED
+        return {"success": True, "receipt_id": receipt_id, "status": ReceiptStatus.PENDING}
+
+    if extracted_data is None:
+        extracted_data = await gemini_service.process_receipt_with_gemini(image.data, image.mime_type)
+        if extracted_data and extracted_data.get("items"):
+            await receipt_cache_service.store_extraction(db, user_id, image.content_hash, extracted_data, image.perceptual_hash)
     
     if not extracted_data or not extracted_data.get("items"):
         raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Gagal mengekstrak data dari struk.")
         
-    created_expenses = await expense_service.create_expenses_from_receipt(db, user_id=current_user.id, receipt_data=extracted_data)
-    return {"success": True, "expenses": created_expenses}
+    created_expenses = await expense_service.create_expenses_from_receipt(
+        db, user_id=user_id, receipt_data=extracted_data,
+        content_hash=image.content_hash, perceptual_hash=image.perceptual_hash
+    )
+    return {"success": True, "duplicate": False, "expenses": created_expenses}
+
+@router.get("/receipts/{receipt_id}", summary="Get receipt processing status and result")
+async def get_receipt_status(
+    receipt_id: str,
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    current_user: UserPublic = Depends(get_current_active_user)
+) -> Dict[str, Any]:
+    result = await expense_service.get_receipt_with_expenses(db, user_id=str(current_user.id), receipt_id=receipt_id)
+    if not result:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Struk tidak ditemukan.")
+    return {"success": True, "receipt": result["receipt"], "expenses": result["expenses"]}
 
 @router.get("/", summary="Get list of expenses")
 async def get_all_expenses(
+    request: Request,
     page: int = 1,
     limit: int = 10,
     sortBy: str = "transaction_date",
@@ -38,8 +83,8 @@ async def get_all_expenses(
     current_user: UserPublic = Depends(get_current_active_user)
 ) -> Dict[str, Any]:
     params = {"page": page, "limit": limit, "sortBy": sortBy, "sortOrder": sortOrder}
-    result = await expense_service.get_all(db, user_id=current_user.id, params=params)
-    return result
+    result = await expense_service.get_all(db, user_id=str(current_user.id), params=params)
+    return cached_json_response(request, result, PRIVATE_REVALIDATE)
 
 @router.get("/summary", summary="Get expense summary")
 async def get_summary_of_expenses(
@@ -47,10 +92,16 @@ async def get_summary_of_expenses(
     db: AsyncIOMotorDatabase = Depends(get_database),
     current_user: UserPublic = Depends(get_current_active_user)
 ) -> Dict[str, Any]:
-    summary = await expense_service.get_summary(db, user_id=current_user.id, period=period)
+    if period not in expense_service.SUMMARY_PERIODS:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, detail="period harus weekly, monthly, atau yearly.")
+    summary = await expense_service.get_summary(db, user_id=str(current_user.id), period=period)
     return {"success": True, "summary": summary}
 
-@router.get("/recommendations", summary="Get AI-based spending recommendations")
+@router.get(
+    "/recommendations",
+    summary="Get AI-based spending recommendations",
+    dependencies=[Depends(limit_per_user(COST_MODEL))],
+)
 async def get_spending_recommendations(
     db: AsyncIOMotorDatabase = Depends(get_database),
     current_user: UserPublic = Depends(get_current_active_user)
@@ -1,16 +1,23 @@
-from fastapi import APIRouter, Depends, Body, HTTPException, status
-from typing import List, Dict, Any
+from fastapi import APIRouter, Depends, Body, HTTPException, Request, status
+from typing import List, Dict, Any, Optional
 
-from app.models.facility import FacilityPublic, FacilityResponse
+from app.models.facility import FacilityBatchRequest, FacilityPublic, FacilityResponse
 from app.models.user import UserPublic
 from app.security import get_current_active_user
 from app.services import gemini_service, facility_service
 from app.core.db import get_database
+from app.core.http_cache import FACILITY_CACHE_CONTROL, cached_json_response
+from app.core.rate_limit import COST_MODEL, limit_per_ip, limit_per_user
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
 router = APIRouter()
 
-@router.post("/recommendations", response_model=FacilityResponse, summary="Get AI-based facility recommendations")
+@router.post(
+    "/recommendations",
+    response_model=FacilityResponse,
+    summary="Get AI-based facility recommendations",
+    dependencies=[Depends(limit_per_user(COST_MODEL))],
+)
 async def get_ai_recommendations(
     payload: Dict[str, Any] = Body(...),
     current_user: UserPublic = Depends(get_current_active_user),
@@ -18,6 +25,14 @@ async def get_ai_recommendations(
 ):
     preferences = payload.get("preferences", {})
     user_profile_for_ai = current_user.model_dump()
+
+    facilities = await facility_service.get_semantic_recommendations(db, preferences, user_profile_for_ai)
+    if facilities:
+        return FacilityResponse(
+            data=facilities,
+            source="SEMANTIC_RECOMMENDATIONS"
+        )
+
     user_profile_for_ai['preferences'] = preferences
     
     mongo_filter = await gemini_service.generate_facility_filter(user_profile_for_ai)
@@ -28,7 +43,7 @@ async def get_ai_recommendations(
         source="AI_RECOMMENDATIONS"
     )
 
-@router.post("/nearby", response_model=FacilityResponse, summary="Get nearby facilities")
+@router.post("/nearby", response_model=FacilityResponse, summary="Get nearby facilities", dependencies=[Depends(limit_per_ip())])
 async def get_nearby(
     payload: Dict[str, Any] = Body(...),
     db: AsyncIOMotorDatabase = Depends(get_database),
@@ -41,29 +56,45 @@ async def get_nearby(
         source="NEARBY_SEARCH"
     )
 
-@router.post("/search", response_model=FacilityResponse, summary="Search facilities with Gemini")
+@router.post(
+    "/search",
+    response_model=FacilityResponse,
+    summary="Search facilities with Gemini",
+    dependencies=[Depends(limit_per_ip(COST_MODEL))],
+)
 async def search_facilities(
     payload: Dict[str, Any] = Body(...),
+    db: AsyncIOMotorDatabase = Depends(get_database),
 ):
     query = payload.get("query")
     user_location = payload.get("user_location")
     if not query or not user_location:
         raise HTTPException(status.HTTP_400_BAD_REQUEST, "query dan user_location diperlukan.")
     
-    facilities = await gemini_service.search_facilities_with_gemini(query, user_location)
+    facilities, source = await facility_service.search_facilities(db, query, user_location)
     
     return FacilityResponse(
         data=facilities,
-        source="GEMINI_SEARCH"
+        source=source
     )
 
+@router.post("/batch", summary="Get several facilities by ID")
+async def get_facilities_batch(
+    payload: FacilityBatchRequest,
+    db: AsyncIOMotorDatabase = Depends(get_database),
+) -> Dict[str, List[Optional[FacilityPublic]]]:
+    # Urutan mengikuti input; id yang tidak ditemukan bernilai null.
+    facilities = await facility_service.get_facilities_by_ids(db, payload.ids)
+    return {"facilities": facilities}
+
 @router.get("/{facility_id}", summary="Get facility by ID")
 async def get_facility_by_id(
     facility_id: str,
+    request: Request,
     db: AsyncIOMotorDatabase = Depends(get_database),
 ) -> Dict[str, FacilityPublic]:
     facility = await facility_service.get_facility_by_id(db, facility_id)
     if not facility:
         raise HTTPException(status_code=404, detail="Facility not found")
     
-    return {"facility": facility}
\ No newline at end of file
+    return cached_json_response(request, {"facility": FacilityPublic.model_validate(facility)}, FACILITY_CACHE_CONTROL)
\ No newline at end of file
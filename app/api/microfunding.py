@@ -1,14 +1,16 @@
-from fastapi import APIRouter, Depends, Body, HTTPException, status
+from fastapi import APIRouter, Depends, Body, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
 from typing import List, Optional, Dict, Any
 from pydantic import BaseModel
 
 from app.core.db import get_database
+from app.core.http_cache import PUBLIC_REVALIDATE, cached_json_response, etag_for
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from app.security import get_current_active_user
 from app.models.user import UserPublic
 from app.models.pool import (
     PoolCreate, PoolUpdate, PoolPublic, 
-    JoinRequestPublic, PoolMemberPublic,
+    JoinRequestPublic, JoinRequestBulkUpdate, PoolMemberPublic,
     CreateDisbursementRequest, ContributionPublic,
     DisbursementPublic
 )
@@ -42,10 +44,13 @@ async def create_new_pool(
 @router.get("/pools/{pool_id}")
 async def get_pool_details(
     pool_id: str, 
+    request: Request,
     db: AsyncIOMotorDatabase = Depends(get_database)
 ) -> ApiResponse:
     pool = await microfunding_service.get_pool_by_id(db, pool_id=pool_id)
-    return ApiResponse(data={"pool": pool})
+    # Setiap perubahan pool (termasuk saldo dari ledger) memperbarui updatedAt.
+    etag = etag_for("pool", pool["id"], pool["updatedAt"])
+    return cached_json_response(request, ApiResponse(data={"pool": pool}), PUBLIC_REVALIDATE, etag=etag)
 
 @router.patch("/pools/{pool_id}")
 async def update_pool_details(
@@ -60,10 +65,11 @@ async def update_pool_details(
 @router.get("/pools/{pool_id}/members")
 async def get_all_pool_members(
     pool_id: str, 
+    request: Request,
     db: AsyncIOMotorDatabase = Depends(get_database)
 ) -> ApiResponse:
     members = await microfunding_service.get_pool_members(db, pool_id=pool_id)
-    return ApiResponse(data={"members": members})
+    return cached_json_response(request, ApiResponse(data={"members": members}), PUBLIC_REVALIDATE)
 
 @router.get("/pools/{pool_id}/members/me")
 async def get_my_membership_status(
@@ -97,6 +103,20 @@ async def get_pool_join_requests(
     requests = await microfunding_service.get_join_requests(db, user_id=current_user.id, pool_id=pool_id, status=status)
     return ApiResponse(data={"requests": requests})
 
+@router.patch("/join-requests")
+async def process_join_requests_in_bulk(
+    payload: JoinRequestBulkUpdate,
+    current_user: UserPublic = Depends(get_current_active_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+) -> ApiResponse:
+    if any(decision.status == JoinRequestStatus.PENDING for decision in payload.decisions):
+        raise HTTPException(status_code=400, detail="status must be APPROVED or REJECTED")
+
+    result = await microfunding_service.moderate_join_requests(
+        db, user_id=current_user.id, decisions=[decision.model_dump() for decision in payload.decisions]
+    )
+    return ApiResponse(data={"results": result["results"]}, message=result["message"])
+
 @router.patch("/join-requests/{request_id}")
 async def process_join_request(
     request_id: str, 
@@ -122,7 +142,7 @@ async def initiate_contribution(
     if not amount or amount <= 0:
         raise HTTPException(status_code=400, detail="amount must be greater than 0")
     
-    result = await microfunding_service.create_contribution(db, user_id=current_user.id, pool_id=pool_id, amount=amount)
+    result = await microfunding_service.create_contribution(db, user=current_user, pool_id=pool_id, amount=amount)
     
     return ApiResponse(data={
         "contributionId": result.get("contributionId") or result.get("contribution_id"),
@@ -138,6 +158,17 @@ async def get_my_pool_contributions(
     contributions = await microfunding_service.get_my_contributions(db, user_id=current_user.id, pool_id=pool_id)
     return ApiResponse(data={"contributions": contributions})
 
+@router.get("/pools/{pool_id}/ledger")
+async def get_pool_ledger_statement(
+    pool_id: str,
+    limit: int = 50,
+    after: Optional[str] = None,
+    current_user: UserPublic = Depends(get_current_active_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+) -> ApiResponse:
+    statement = await microfunding_service.get_pool_statement(db, user_id=current_user.id, pool_id=pool_id, limit=limit, after=after)
+    return ApiResponse(data=statement)
+
 @router.get("/contributions/{contribution_id}/check-status")
 async def check_payment_status(
     contribution_id: str, 
@@ -156,6 +187,17 @@ async def get_pool_disbursements(
     disbursements = await microfunding_service.get_disbursements(db, pool_id=pool_id, status=status)
     return ApiResponse(data={"disbursements": disbursements})
 
+@router.get("/pools/{pool_id}/disbursements/stream")
+async def stream_pool_disbursements(
+    pool_id: str,
+    current_user: UserPublic = Depends(get_current_active_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+) -> StreamingResponse:
+    events = await microfunding_service.open_disbursement_stream(db, user_id=current_user.id, pool_id=pool_id)
+    return StreamingResponse(events, media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache", "X-Accel-Buffering": "no"
+    })
+
 @router.post("/pools/{pool_id}/disbursements", status_code=201)
 async def create_new_disbursement(
     pool_id: str, 
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from typing import Dict, Any
 
 from app.core.db import get_database
+from app.core.http_cache import PRIVATE_REVALIDATE, cached_json_response, etag_for
 from app.models.user import UserPublic, UserUpdate
 from app.security import get_current_active_user
 from app.services import user_service
@@ -11,9 +12,11 @@ router = APIRouter()
 
 @router.get("/profile", summary="Get current user profile")
 async def read_current_user_profile(
+    request: Request,
     current_user: UserPublic = Depends(get_current_active_user)
 ) -> Dict[str, UserPublic]:
-    return {"user": current_user}
+    etag = etag_for("user", current_user.id, current_user.updatedAt)
+    return cached_json_response(request, {"user": current_user}, PRIVATE_REVALIDATE, etag=etag)
 
 @router.patch("/profile", summary="Update current user profile")
 async def update_current_user_profile(
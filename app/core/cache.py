@@ -0,0 +1,284 @@
+import argparse
+import asyncio
+import logging
+import os
+import struct
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+
+import bson
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_LENGTH = struct.Struct("<i")
+
+
+class CacheBackend(ABC):
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    async def clear(self, prefix: str) -> None:
+        ...
+
+    @abstractmethod
+    async def gcra(self, key: str, interval: float, burst: float, cost: float) -> Tuple[bool, float, float]:
+        ...
+
+    async def close(self) -> None:
+        return None
+
+
+class LocalLRUCache(CacheBackend):
+    def __init__(self, maxsize: int = None):
+        self.maxsize = maxsize or settings.CACHE_MAX_ENTRIES
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get_nowait(self, key: str) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def set_nowait(self, key: str, value: Any, ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def delete_nowait(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def clear_nowait(self, prefix: str) -> int:
+        keys = [key for key in self._entries if key.startswith(prefix)]
+        for key in keys:
+            del self._entries[key]
+        return len(keys)
+
+    def gcra_nowait(self, key: str, interval: float, burst: float, cost: float) -> Tuple[bool, float, float]:
+        # GCRA: yang disimpan hanya theoretical arrival time (TAT) per key. Cek dan update terjadi
+        # tanpa await sehingga atomik di dalam satu event loop.
+        now = time.monotonic()
+        hit, tat = self.get_nowait(key)
+        new_tat = max(tat if hit else now, now) + interval * cost
+        allow_at = new_tat - interval * burst
+        if allow_at > now:
+            return False, allow_at - now, 0.0
+        self.set_nowait(key, new_tat, new_tat - now)
+        return True, 0.0, (now - allow_at) / interval
+
+    async def get(self, key: str) -> Optional[Any]:
+        return self.get_nowait(key)[1]
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        self.set_nowait(key, value, ttl)
+
+    async def delete(self, key: str) -> None:
+        self.delete_nowait(key)
+
+    async def clear(self, prefix: str) -> None:
+        self.clear_nowait(prefix)
+
+    async def gcra(self, key: str, interval: float, burst: float, cost: float) -> Tuple[bool, float, float]:
+        return self.gcra_nowait(key, interval, burst, cost)
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> dict:
+    header = await reader.readexactly(_LENGTH.size)
+    (length,) = _LENGTH.unpack(header)
+    return bson.decode(header + await reader.readexactly(length - _LENGTH.size))
+
+
+Connection = Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+class SharedCacheClient(CacheBackend):
+    # Klien untuk SharedCacheServer lewat unix socket; pesan berupa dokumen BSON.
+    # Request berjalan paralel di atas pool koneksi kecil (satu request per koneksi pada satu waktu),
+    # jadi satu request yang lambat tidak menahan request lain di worker yang sama.
+    # Kegagalan koneksi diperlakukan sebagai cache miss agar request tetap berjalan.
+    def __init__(self, socket_path: str = None, timeout: float = None, pool_size: int = None):
+        self.socket_path = socket_path or settings.CACHE_SOCKET_PATH
+        self.timeout = timeout or settings.CACHE_TIMEOUT_SECONDS
+        self.pool_size = pool_size or settings.CACHE_POOL_SIZE
+        self._idle: List[Connection] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def _connect(self) -> Connection:
+        if self._idle:
+            return self._idle.pop()
+        return await asyncio.wait_for(asyncio.open_unix_connection(self.socket_path), self.timeout)
+
+    async def _request(self, message: dict) -> Optional[dict]:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.pool_size)
+        async with self._slots:
+            connection = None
+            try:
+                connection = await self._connect()
+                reader, writer = connection
+                writer.write(bson.encode(message))
+                await writer.drain()
+                response = await asyncio.wait_for(_read_frame(reader), self.timeout)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, bson.errors.BSONError) as error:
+                logger.warning("Cache bersama tidak tersedia", extra={"socket": self.socket_path, "error": str(error)})
+                # Koneksi yang gagal atau timeout bisa menyisakan respons basi, jadi tidak dikembalikan ke pool.
+                if connection is not None:
+                    connection[1].close()
+                return None
+            except BaseException:
+                if connection is not None:
+                    connection[1].close()
+                raise
+            self._idle.append(connection)
+            return response
+
+    async def _reset(self) -> None:
+        idle, self._idle = self._idle, []
+        for _, writer in idle:
+            writer.close()
+
+    async def get(self, key: str) -> Optional[Any]:
+        response = await self._request({"op": "get", "k": key})
+        return response.get("v") if response and response.get("hit") else None
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        await self._request({"op": "set", "k": key, "v": value, "ttl": ttl})
+
+    async def delete(self, key: str) -> None:
+        await self._request({"op": "delete", "k": key})
+
+    async def clear(self, prefix: str) -> None:
+        await self._request({"op": "clear", "p": prefix})
+
+    async def gcra(self, key: str, interval: float, burst: float, cost: float) -> Tuple[bool, float, float]:
+        response = await self._request({"op": "gcra", "k": key, "i": interval, "b": burst, "c": cost})
+        if response is None:
+            # Fail open: limiter yang tidak tersedia tidak boleh menjatuhkan API.
+            return True, 0.0, burst
+        return response["ok"], response["retry"], response["rem"]
+
+    async def close(self) -> None:
+        await self._reset()
+
+
+class SharedCacheServer:
+    def __init__(self, socket_path: str = None, maxsize: int = None):
+        self.socket_path = socket_path or settings.CACHE_SOCKET_PATH
+        self.store = LocalLRUCache(maxsize)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                message = await _read_frame(reader)
+                op, key = message.get("op"), message.get("k")
+                if op == "get":
+                    hit, value = self.store.get_nowait(key)
+                    response = {"hit": hit, "v": value}
+                elif op == "set":
+                    self.store.set_nowait(key, message.get("v"), float(message.get("ttl", 60)))
+                    response = {"ok": True}
+                elif op == "delete":
+                    self.store.delete_nowait(key)
+                    response = {"ok": True}
+                elif op == "clear":
+                    response = {"ok": True, "n": self.store.clear_nowait(message.get("p", ""))}
+                elif op == "gcra":
+                    allowed, retry_after, remaining = self.store.gcra_nowait(
+                        key, float(message["i"]), float(message["b"]), float(message["c"])
+                    )
+                    response = {"ok": allowed, "retry": retry_after, "rem": remaining}
+                else:
+                    response = {"error": f"operasi tidak dikenal: {op}"}
+                writer.write(bson.encode(response))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve_forever(self) -> None:
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        # Hanya proses dengan user yang sama yang boleh mengakses cache.
+        os.chmod(self.socket_path, 0o600)
+        logger.info("Cache bersama berjalan", extra={"socket": self.socket_path, "max_entries": self.store.maxsize})
+        async with server:
+            await server.serve_forever()
+
+
+class NamespacedCache:
+    def __init__(self, namespace: str, ttl: float):
+        self.namespace = namespace
+        self.ttl = ttl
+
+    async def get(self, key: str) -> Optional[Any]:
+        return await get_cache_backend().get(f"{self.namespace}:{key}")
+
+    async def set(self, key: str, value: Any, ttl: float = None) -> None:
+        await get_cache_backend().set(f"{self.namespace}:{key}", value, ttl or self.ttl)
+
+    async def delete(self, key: str) -> None:
+        await get_cache_backend().delete(f"{self.namespace}:{key}")
+
+    async def clear(self, prefix: str = "") -> None:
+        await get_cache_backend().clear(f"{self.namespace}:{prefix}")
+
+
+_backend: Optional[CacheBackend] = None
+
+
+def get_cache_backend() -> CacheBackend:
+    global _backend
+    if _backend is None:
+        if settings.CACHE_BACKEND == "shared":
+            _backend = SharedCacheClient()
+        elif settings.CACHE_BACKEND == "local":
+            _backend = LocalLRUCache()
+        else:
+            raise ValueError(f"CACHE_BACKEND tidak dikenal: {settings.CACHE_BACKEND}")
+    return _backend
+
+
+async def close_cache_backend() -> None:
+    global _backend
+    if _backend is not None:
+        await _backend.close()
+        _backend = None
+
+
+auth_cache = NamespacedCache("auth", settings.AUTH_CACHE_TTL_SECONDS)
+facility_cache = NamespacedCache("facility", settings.FACILITY_CACHE_TTL_SECONDS)
+ai_cache = NamespacedCache("ai", settings.AI_CACHE_TTL_SECONDS)
+analytics_cache = NamespacedCache("analytics", settings.ANALYTICS_CACHE_TTL_SECONDS)
+pool_cache = NamespacedCache("pool", settings.POOL_CACHE_TTL_SECONDS)
+
+
+if __name__ == "__main__":
+    from app.core.logger import setup_logging
+
+    parser = argparse.ArgumentParser(description="Server cache bersama untuk worker Danaraga API.")
+    parser.add_argument("--socket", default=settings.CACHE_SOCKET_PATH)
+    parser.add_argument("--max-entries", type=int, default=settings.CACHE_MAX_ENTRIES)
+    args = parser.parse_args()
+    setup_logging()
+    asyncio.run(SharedCacheServer(args.socket, args.max_entries).serve_forever())
\ No newline at end of file
@@ -1,4 +1,5 @@
 import os
+import socket
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 
@@ -11,15 +12,106 @@ class Settings(BaseSettings):
 
     MONGO_URI: str = os.getenv("MONGO_URI", "mongodb://localhost:27017")
     MONGO_DB_NAME: str = os.getenv("MONGO_DB_NAME", "danaraga_db_dev")
+    # Transaksi multi-dokumen membutuhkan replica set; matikan untuk MongoDB standalone.
+    MONGO_TRANSACTIONS: bool = os.getenv("MONGO_TRANSACTIONS", "true").lower() == "true"
+    MONGO_COMMAND_MONITORING: bool = os.getenv("MONGO_COMMAND_MONITORING", "false").lower() == "true"
 
     JWT_SECRET_KEY: str = os.getenv("JWT_SECRET_KEY", "your_default_super_secret_key")
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  
 
     GEMINI_API_KEY: str = os.getenv("GEMINI_API_KEY", "")
+    GEMINI_BACKEND: str = os.getenv("GEMINI_BACKEND", "google")
+    GEMINI_FAKE_LATENCY_SECONDS: float = float(os.getenv("GEMINI_FAKE_LATENCY_SECONDS", "0"))
+    GEMINI_REQUESTS_PER_MINUTE: int = int(os.getenv("GEMINI_REQUESTS_PER_MINUTE", "300"))
+    GEMINI_TOKENS_PER_MINUTE: int = int(os.getenv("GEMINI_TOKENS_PER_MINUTE", "1000000"))
+    GEMINI_MAX_RETRIES: int = int(os.getenv("GEMINI_MAX_RETRIES", "3"))
+    GEMINI_RETRY_BASE_SECONDS: float = float(os.getenv("GEMINI_RETRY_BASE_SECONDS", "1"))
+    # Interval log INFO pemakaian governor Gemini per call type; 0 menonaktifkan.
+    GEMINI_USAGE_LOG_SECONDS: float = float(os.getenv("GEMINI_USAGE_LOG_SECONDS", "300"))
     MIDTRANS_SERVER_KEY: str = os.getenv("MIDTRANS_SERVER_KEY", "")
     MIDTRANS_CLIENT_KEY: str = os.getenv("MIDTRANS_CLIENT_KEY", "")
     MIDTRANS_IS_PRODUCTION: bool = False
+    MIDTRANS_BACKEND: str = os.getenv("MIDTRANS_BACKEND", "midtrans")
+    MIDTRANS_FAKE_LATENCY_SECONDS: float = float(os.getenv("MIDTRANS_FAKE_LATENCY_SECONDS", "0"))
+
+    BILLING_BATCH_SIZE: int = int(os.getenv("BILLING_BATCH_SIZE", "1000"))
+    BILLING_GATEWAY_CONCURRENCY: int = int(os.getenv("BILLING_GATEWAY_CONCURRENCY", "16"))
+
+    FACILITY_SEARCH_CANDIDATES: int = int(os.getenv("FACILITY_SEARCH_CANDIDATES", "20"))
+    FACILITY_SEARCH_RESULTS: int = int(os.getenv("FACILITY_SEARCH_RESULTS", "5"))
+    FACILITY_SEARCH_MAX_DISTANCE_KM: int = int(os.getenv("FACILITY_SEARCH_MAX_DISTANCE_KM", "50"))
+    FACILITY_VECTOR_INDEX_PATH: str = os.getenv("FACILITY_VECTOR_INDEX_PATH", "data/facility_vectors")
+    FACILITY_EMBEDDING_ENCODER: str = os.getenv("FACILITY_EMBEDDING_ENCODER", "hashing")
+    FACILITY_EMBEDDING_DIMENSION: int = int(os.getenv("FACILITY_EMBEDDING_DIMENSION", "256"))
+    FACILITY_SEMANTIC_MIN_SCORE: float = float(os.getenv("FACILITY_SEMANTIC_MIN_SCORE", "0.15"))
+
+    RECEIPT_MAX_UPLOAD_BYTES: int = int(os.getenv("RECEIPT_MAX_UPLOAD_BYTES", str(15 * 1024 * 1024)))
+    # Batas body mentah per request (gambar + overhead multipart), ditegakkan sebelum Starlette men-spool upload.
+    REQUEST_MAX_BODY_BYTES: int = int(os.getenv("REQUEST_MAX_BODY_BYTES", str(RECEIPT_MAX_UPLOAD_BYTES + 1024 * 1024)))
+    RECEIPT_MAX_DIMENSION: int = int(os.getenv("RECEIPT_MAX_DIMENSION", "1600"))
+    RECEIPT_JPEG_QUALITY: int = int(os.getenv("RECEIPT_JPEG_QUALITY", "80"))
+    RECEIPT_OCR_CACHE_TTL_SECONDS: int = int(os.getenv("RECEIPT_OCR_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+    RECEIPT_OCR_WORKERS: int = int(os.getenv("RECEIPT_OCR_WORKERS", "4"))
+    RECEIPT_OCR_QUEUE_SIZE: int = int(os.getenv("RECEIPT_OCR_QUEUE_SIZE", "1000"))
+    RECEIPT_OCR_MAX_ATTEMPTS: int = int(os.getenv("RECEIPT_OCR_MAX_ATTEMPTS", "3"))
+    RECEIPT_OCR_RETRY_BASE_SECONDS: float = float(os.getenv("RECEIPT_OCR_RETRY_BASE_SECONDS", "2"))
+    RECEIPT_OCR_LEASE_SECONDS: int = int(os.getenv("RECEIPT_OCR_LEASE_SECONDS", "300"))
+    RECEIPT_PERCEPTUAL_DEDUP: bool = os.getenv("RECEIPT_PERCEPTUAL_DEDUP", "false").lower() == "true"
+
+    CACHE_BACKEND: str = os.getenv("CACHE_BACKEND", "local")
+    CACHE_SOCKET_PATH: str = os.getenv("CACHE_SOCKET_PATH", "/tmp/danaraga-cache.sock")
+    CACHE_MAX_ENTRIES: int = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+    CACHE_TIMEOUT_SECONDS: float = float(os.getenv("CACHE_TIMEOUT_SECONDS", "0.2"))
+    CACHE_POOL_SIZE: int = int(os.getenv("CACHE_POOL_SIZE", "8"))
+    AUTH_CACHE_TTL_SECONDS: int = int(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+    FACILITY_CACHE_TTL_SECONDS: int = int(os.getenv("FACILITY_CACHE_TTL_SECONDS", "300"))
+    AI_CACHE_TTL_SECONDS: int = int(os.getenv("AI_CACHE_TTL_SECONDS", "600"))
+    ANALYTICS_CACHE_TTL_SECONDS: int = int(os.getenv("ANALYTICS_CACHE_TTL_SECONDS", "900"))
+    POOL_CACHE_TTL_SECONDS: int = int(os.getenv("POOL_CACHE_TTL_SECONDS", "300"))
+    # Cache fasilitas per proses (objek FacilityPublic siap pakai) termasuk cache negatif untuk id tak dikenal.
+    FACILITY_LOCAL_CACHE_SIZE: int = int(os.getenv("FACILITY_LOCAL_CACHE_SIZE", "5000"))
+    FACILITY_NEGATIVE_CACHE_TTL_SECONDS: int = int(os.getenv("FACILITY_NEGATIVE_CACHE_TTL_SECONDS", "60"))
+    FACILITY_BATCH_MAX_IDS: int = int(os.getenv("FACILITY_BATCH_MAX_IDS", "100"))
+    HTTP_FACILITY_MAX_AGE_SECONDS: int = int(os.getenv("HTTP_FACILITY_MAX_AGE_SECONDS", "300"))
+
+    # Bus invalidasi berbasis change stream (butuh replica set); tanpa bus, cache hanya mengandalkan TTL.
+    INVALIDATION_BUS_ENABLED: bool = os.getenv("INVALIDATION_BUS_ENABLED", "true").lower() == "true"
+    # Prefiks consumer per unit deployment (default memuat hostname); set eksplisit bila hostname berubah
+    # tiap restart. Slot worker diisi gunicorn.conf.py sehingga consumer id = prefiks:slot stabil.
+    INVALIDATION_CONSUMER: str = os.getenv("INVALIDATION_CONSUMER") or f"api:{socket.gethostname()}"
+    INVALIDATION_WORKER_SLOT: int = int(os.getenv("INVALIDATION_WORKER_SLOT", "0"))
+    INVALIDATION_TOKEN_FLUSH_SECONDS: float = float(os.getenv("INVALIDATION_TOKEN_FLUSH_SECONDS", "1.0"))
+
+    # Idempotency-Key: respons disimpan selama TTL; permintaan duplikat menunggu maksimal WAIT detik
+    # dan mengambil alih bila kunci milik permintaan asli melewati LOCK detik (proses asli mati).
+    IDEMPOTENCY_TTL_SECONDS: int = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", str(24 * 3600)))
+    IDEMPOTENCY_LOCK_SECONDS: int = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "120"))
+    IDEMPOTENCY_WAIT_SECONDS: float = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "60"))
+
+    # Stream SSE pencairan: heartbeat menjaga koneksi idle tetap hidup melewati proxy.
+    SSE_HEARTBEAT_SECONDS: float = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+    SSE_QUEUE_SIZE: int = int(os.getenv("SSE_QUEUE_SIZE", "64"))
+    SSE_MAX_CONNECTIONS: int = int(os.getenv("SSE_MAX_CONNECTIONS", "10000"))
+
+    # Rate limit GCRA dalam satuan biaya: RATE = biaya per menit, BURST = kapasitas sesaat.
+    # Rute berbasis model (Gemini) memakai biaya lebih besar sehingga lebih cepat menghabiskan kuota.
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    # Default mengikuti CACHE_BACKEND: limiter lokal di bawah N worker berarti batas efektif N kali lipat.
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", os.getenv("CACHE_BACKEND", "local"))
+    RATE_LIMIT_MAX_KEYS: int = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+    RATE_LIMIT_USER_PER_MINUTE: float = float(os.getenv("RATE_LIMIT_USER_PER_MINUTE", "60"))
+    RATE_LIMIT_USER_BURST: float = float(os.getenv("RATE_LIMIT_USER_BURST", "30"))
+    RATE_LIMIT_IP_PER_MINUTE: float = float(os.getenv("RATE_LIMIT_IP_PER_MINUTE", "30"))
+    RATE_LIMIT_IP_BURST: float = float(os.getenv("RATE_LIMIT_IP_BURST", "15"))
+    RATE_LIMIT_TRUST_PROXY: bool = os.getenv("RATE_LIMIT_TRUST_PROXY", "false").lower() == "true"
+
+    ANALYTICS_WINDOW_DAYS: int = int(os.getenv("ANALYTICS_WINDOW_DAYS", "365"))
+    ANALYTICS_MIN_GROUP_SIZE: int = int(os.getenv("ANALYTICS_MIN_GROUP_SIZE", "10"))
+
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_DEBUG_SAMPLE_RATE: float = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0.1"))
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
 
     class Config:
         case_sensitive = True
@@ -1,25 +1,66 @@
-from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+import logging
+from collections import Counter
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorClientSession, AsyncIOMotorDatabase
+from pymongo import monitoring
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
 class Database:
     client: AsyncIOMotorClient = None
     db: AsyncIOMotorDatabase = None
 
 db_manager = Database()
 
+class CommandCounter(monitoring.CommandListener):
+    # Menghitung round trip ke MongoDB per nama perintah (insert, find, findAndModify, commitTransaction, ...).
+    def __init__(self):
+        self.commands: Counter = Counter()
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        self.commands[event.command_name] += 1
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        pass
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        pass
+
+    def reset(self) -> None:
+        self.commands.clear()
+
+    def snapshot(self) -> Dict[str, int]:
+        return {"total": sum(self.commands.values()), **self.commands}
+
+command_counter = CommandCounter()
+
 async def connect_to_mongo():
-    print("Menghubungkan ke MongoDB...")
-    db_manager.client = AsyncIOMotorClient(settings.MONGO_URI)
+    logger.info("Menghubungkan ke MongoDB...")
+    event_listeners = [command_counter] if settings.MONGO_COMMAND_MONITORING else []
+    db_manager.client = AsyncIOMotorClient(settings.MONGO_URI, event_listeners=event_listeners)
     db_manager.db = db_manager.client[settings.MONGO_DB_NAME]
-    print(f"Terhubung ke database: {settings.MONGO_DB_NAME}")
+    logger.info("Terhubung ke database", extra={"database": settings.MONGO_DB_NAME})
 
 async def close_mongo_connection():
-    print("Menutup koneksi MongoDB...")
+    logger.info("Menutup koneksi MongoDB...")
     if db_manager.client:
         db_manager.client.close()
-    print("Koneksi ditutup.")
+    logger.info("Koneksi ditutup.")
 
 def get_database() -> AsyncIOMotorDatabase:
     if db_manager.db is None:
         raise Exception("Database tidak terhubung. Panggil 'connect_to_mongo' terlebih dahulu.")
-    return db_manager.db
\ No newline at end of file
+    return db_manager.db
+
+async def run_in_transaction(
+    db: AsyncIOMotorDatabase,
+    callback: Callable[[Optional[AsyncIOMotorClientSession]], Awaitable[T]],
+) -> T:
+    if not settings.MONGO_TRANSACTIONS:
+        return await callback(None)
+    # with_transaction mengulang otomatis saat TransientTransactionError / UnknownTransactionCommitResult.
+    async with await db.client.start_session() as session:
+        return await session.with_transaction(callback)
@@ -0,0 +1,59 @@
+import hashlib
+import json
+from typing import Any, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.core.config import settings
+
+# Kebijakan Cache-Control per jenis rute. Data fasilitas boleh disimpan perantara/CDN;
+# data milik pengguna hanya di klien dan selalu divalidasi ulang lewat ETag.
+FACILITY_CACHE_CONTROL = f"public, max-age={settings.HTTP_FACILITY_MAX_AGE_SECONDS}, stale-while-revalidate=60"
+PUBLIC_REVALIDATE = "public, no-cache"
+PRIVATE_REVALIDATE = "private, no-cache"
+
+
+def etag_for(*parts: Any) -> str:
+    digest = hashlib.blake2b(json.dumps(parts, default=str, separators=(",", ":")).encode(), digest_size=16)
+    return f'"{digest.hexdigest()}"'
+
+
+def _matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match memakai perbandingan lemah: prefiks W/ diabaikan.
+    candidates = {candidate.strip().removeprefix("W/") for candidate in header.split(",")}
+    return etag in candidates
+
+
+def _headers(etag: str, cache_control: str) -> dict:
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if cache_control.startswith("private"):
+        headers["Vary"] = "Authorization"
+    return headers
+
+
+def not_modified(request: Request, etag: str, cache_control: str) -> Optional[Response]:
+    if _matches(request, etag):
+        return Response(status_code=304, headers=_headers(etag, cache_control))
+    return None
+
+
+def cached_json_response(request: Request, content: Any, cache_control: str, etag: Optional[str] = None) -> Response:
+    # ETag dari field versi (updatedAt) dicek sebelum serialisasi; tanpa versi, ETag diambil dari hash body.
+    if etag:
+        cached = not_modified(request, etag, cache_control)
+        if cached:
+            return cached
+    response = JSONResponse(jsonable_encoder(content))
+    etag = etag or f'"{hashlib.blake2b(response.body, digest_size=16).hexdigest()}"'
+    cached = not_modified(request, etag, cache_control)
+    if cached:
+        return cached
+    response.headers.update(_headers(etag, cache_control))
+    return response
\ No newline at end of file
@@ -0,0 +1,249 @@
+import asyncio
+import hashlib
+import json
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.core.config import settings
+from app.core.db import get_database
+from app.core.request_limits import send_too_large
+from app.security import user_from_token
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "idempotency-key"
+REPLAYED_HEADER = "idempotent-replayed"
+COLLECTION = "idempotency_keys"
+MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+MAX_KEY_LENGTH = 255
+
+PROCESSING = "PROCESSING"
+COMPLETED = "COMPLETED"
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase) -> None:
+    await db[COLLECTION].create_index([("expires_at", ASCENDING)], expireAfterSeconds=0)
+
+
+def _header(scope: Dict[str, Any], name: str) -> Optional[str]:
+    for key, value in scope.get("headers", []):
+        if key == name.encode():
+            return value.decode("latin-1")
+    return None
+
+
+async def _principal(scope: Dict[str, Any], db: AsyncIOMotorDatabase) -> str:
+    # Kunci dibatasi per pengguna (bukan per token) agar retry dengan token yang sudah diperbarui tetap
+    # dikenali, dan dua pengguna dengan Idempotency-Key sama tidak saling bertabrakan.
+    scheme, _, token = (_header(scope, "authorization") or "").partition(" ")
+    user = await user_from_token(db, token) if scheme.lower() == "bearer" and token else None
+    return f"user:{user.id}" if user else "anonymous"
+
+
+def _record_id(principal: str, key: str) -> str:
+    return hashlib.sha256(f"{principal}\n{key}".encode()).hexdigest()
+
+
+def _multipart_boundary(content_type: str) -> Tuple[str, Optional[bytes]]:
+    media_type, *params = [part.strip() for part in content_type.split(";")]
+    boundary = None
+    for param in params:
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "boundary":
+            boundary = value.strip().strip('"').encode("latin-1")
+    return media_type.lower(), boundary
+
+
+def _fingerprint(scope: Dict[str, Any], body: bytes) -> str:
+    digest = hashlib.sha256(f"{scope['method']} {scope['path']}?{scope.get('query_string', b'').decode('latin-1')}\n".encode())
+    media_type, boundary = _multipart_boundary(_header(scope, "content-type") or "")
+    if media_type == "multipart/form-data" and boundary:
+        # Boundary multipart dibuat acak oleh klien pada setiap percobaan, jadi yang di-hash adalah
+        # media type dan digest tiap part (header + isi), bukan body mentahnya.
+        digest.update(f"{media_type}\n".encode())
+        for part in body.split(b"--" + boundary)[1:]:
+            part = part.strip(b"\r\n")
+            if part and part != b"--":
+                digest.update(hashlib.sha256(part).digest())
+    else:
+        digest.update(body)
+    return digest.hexdigest()
+
+
+async def _read_body(receive, max_bytes: int) -> Tuple[Optional[bytes], List[Dict[str, Any]]]:
+    chunks: List[bytes] = []
+    messages: List[Dict[str, Any]] = []
+    size = 0
+    while True:
+        message = await receive()
+        messages.append(message)
+        if message["type"] != "http.request":
+            break
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > max_bytes:
+            # Buffer dihentikan di batas ukuran; body sebesar ini tidak akan diterima handler mana pun.
+            return None, messages
+        chunks.append(chunk)
+        if not message.get("more_body"):
+            break
+    return b"".join(chunks), messages
+
+
+async def _send_json(send, status: int, payload: Dict[str, Any]) -> None:
+    body = json.dumps(payload).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _replay(send, record: Dict[str, Any]) -> None:
+    response = record["response"]
+    headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in response["headers"]]
+    headers.append((REPLAYED_HEADER.encode(), b"true"))
+    await send({"type": "http.response.start", "status": response["status"], "headers": headers})
+    await send({"type": "http.response.body", "body": response["body"]})
+
+
+class IdempotencyMiddleware:
+    def __init__(self, app):
+        self.app = app
+        # Duplikat dalam proses yang sama dibangunkan lewat Event; antarproses lewat polling MongoDB.
+        self._in_flight: Dict[str, asyncio.Event] = {}
+
+    async def __call__(self, scope, receive, send):
+        key = _header(scope, IDEMPOTENCY_HEADER) if scope["type"] == "http" and scope["method"] in MUTATING_METHODS else None
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+        if not key or len(key) > MAX_KEY_LENGTH:
+            await _send_json(send, 400, {"detail": f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters"})
+            return
+
+        body, messages = await _read_body(receive, settings.REQUEST_MAX_BODY_BYTES)
+        if body is None:
+            await send_too_large(send, settings.REQUEST_MAX_BODY_BYTES)
+            return
+        db = get_database()
+        record_id = _record_id(await _principal(scope, db), key)
+        fingerprint = _fingerprint(scope, body)
+        collection = db[COLLECTION]
+
+        owner = await self._acquire(collection, record_id, fingerprint)
+        while owner is None:
+            record = await self._wait(collection, record_id, fingerprint)
+            if record is None:
+                # Permintaan asli gagal dan kuncinya dilepas; duplikat ini boleh mengeksekusi ulang.
+                owner = await self._acquire(collection, record_id, fingerprint)
+                continue
+            if record["fingerprint"] != fingerprint:
+                await _send_json(send, 422, {"detail": "Idempotency-Key was already used for a different request"})
+                return
+            if record["state"] == COMPLETED:
+                await _replay(send, record)
+                return
+            if record["locked_until"] > datetime.utcnow():
+                await _send_json(send, 409, {"detail": "A request with this Idempotency-Key is still being processed"})
+                return
+            owner = await self._take_over(collection, record_id, fingerprint)
+
+        await self._execute(scope, messages, receive, send, collection, record_id, owner)
+
+    async def _acquire(self, collection, record_id: str, fingerprint: str) -> Optional[str]:
+        now = datetime.utcnow()
+        owner = uuid.uuid4().hex
+        try:
+            await collection.insert_one({
+                "_id": record_id,
+                "fingerprint": fingerprint,
+                "state": PROCESSING,
+                "owner": owner,
+                "locked_until": now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS),
+                "created_at": now,
+                "expires_at": now + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS),
+            })
+        except DuplicateKeyError:
+            return None
+        self._in_flight[record_id] = asyncio.Event()
+        return owner
+
+    async def _take_over(self, collection, record_id: str, fingerprint: str) -> Optional[str]:
+        # Permintaan asli melewati batas kunci (proses mati atau timeout): duplikat ini yang mengeksekusi ulang.
+        now = datetime.utcnow()
+        owner = uuid.uuid4().hex
+        record = await collection.find_one_and_update(
+            {"_id": record_id, "fingerprint": fingerprint, "state": PROCESSING, "locked_until": {"$lte": now}},
+            {"$set": {"owner": owner, "locked_until": now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS)}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if record is None:
+            return None
+        logger.warning("Mengambil alih Idempotency-Key yang kedaluwarsa", extra={"record_id": record_id})
+        self._in_flight[record_id] = asyncio.Event()
+        return owner
+
+    async def _wait(self, collection, record_id: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.IDEMPOTENCY_WAIT_SECONDS
+        delay = 0.05
+        while True:
+            record = await collection.find_one({"_id": record_id})
+            if record is None or record["fingerprint"] != fingerprint or record["state"] == COMPLETED:
+                return record
+            remaining = deadline - loop.time()
+            if remaining <= 0 or record["locked_until"] <= datetime.utcnow():
+                return record
+            event = self._in_flight.get(record_id)
+            try:
+                await asyncio.wait_for(event.wait() if event else asyncio.sleep(delay), timeout=min(delay, remaining))
+            except asyncio.TimeoutError:
+                pass
+            delay = min(delay * 2, 1.0)
+
+    async def _execute(self, scope, messages: List[Dict[str, Any]], receive, send, collection, record_id: str, owner: str) -> None:
+        pending = list(messages)
+
+        async def replay_receive():
+            if pending:
+                return pending.pop(0)
+            return await receive()
+
+        response: Dict[str, Any] = {"status": 500, "headers": [], "body": []}
+
+        async def capture_send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = [
+                    (name.decode("latin-1"), value.decode("latin-1")) for name, value in message.get("headers", [])
+                ]
+            elif message["type"] == "http.response.body":
+                response["body"].append(message.get("body", b""))
+            await send(message)
+
+        completed = False
+        try:
+            await self.app(scope, replay_receive, capture_send)
+            completed = response["status"] < 500 and response["status"] != 429
+        finally:
+            record_filter = {"_id": record_id, "owner": owner}
+            if completed:
+                await collection.update_one(record_filter, {"$set": {
+                    "state": COMPLETED,
+                    "response": {"status": response["status"], "headers": response["headers"], "body": b"".join(response["body"])},
+                    "completed_at": datetime.utcnow(),
+                }, "$unset": {"locked_until": "", "owner": ""}})
+            else:
+                # Kegagalan sementara tidak disimpan agar klien dapat mencoba lagi dengan kunci yang sama.
+                await collection.delete_one(record_filter)
+            event = self._in_flight.pop(record_id, None)
+            if event:
+                event.set()
\ No newline at end of file
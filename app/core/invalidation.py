@@ -0,0 +1,186 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import OperationFailure, PyMongoError
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+TOKEN_COLLECTION = "change_stream_tokens"
+WATCHED_OPERATIONS = ["insert", "update", "replace", "delete"]
+# Kode error server: oplog untuk resume token sudah terpotong / change stream tidak didukung (standalone).
+HISTORY_LOST_CODES = {136, 280, 286}
+UNSUPPORTED_CODES = {40573}
+RETRY_SECONDS = 5.0
+# Token milik slot/host yang tidak aktif lagi (mis. hostname pod lama) dibersihkan otomatis lewat TTL.
+TOKEN_TTL_SECONDS = 24 * 3600
+
+
+def default_consumer() -> str:
+    # Setiap worker men-tail change stream sendiri untuk cache lokalnya, jadi resume token harus unik
+    # per host dan per slot worker. Slot (bukan pid) stabil antar restart sehingga worker pengganti
+    # melanjutkan token pendahulunya alih-alih meninggalkan token yatim.
+    return f"{settings.INVALIDATION_CONSUMER}:{settings.INVALIDATION_WORKER_SLOT}"
+
+
+@dataclass
+class InvalidationEvent:
+    collection: str
+    operation: str
+    document_id: Any
+    before: Dict[str, Any] = field(default_factory=dict)
+    after: Dict[str, Any] = field(default_factory=dict)
+    # Field terdaftar yang diubah oleh update ini (updateDescription.updatedFields); tidak butuh pre-image.
+    updated_fields: Dict[str, Any] = field(default_factory=dict)
+
+    def values(self, name: str) -> Set[Any]:
+        # Nilai lama dan baru sama-sama relevan, mis. email yang diganti menghapus entri kedua key.
+        return {document[name] for document in (self.before, self.after) if document.get(name) is not None}
+
+
+Handler = Callable[[InvalidationEvent], Awaitable[None]]
+ResetHandler = Callable[[], Awaitable[None]]
+
+
+class InvalidationBus:
+    def __init__(self, consumer: str = None):
+        # Ditentukan saat start(), bukan saat import: dengan preload, import terjadi sebelum fork worker.
+        self.consumer = consumer
+        self.events_processed = 0
+        self._handlers: Dict[str, List[Handler]] = defaultdict(list)
+        self._fields: Set[str] = set()
+        self._reset_handlers: List[ResetHandler] = []
+        self._db: Optional[AsyncIOMotorDatabase] = None
+        self._task: Optional[asyncio.Task] = None
+        self._token: Optional[Dict[str, Any]] = None
+        self._saved_token: Optional[Dict[str, Any]] = None
+        self._saved_at = 0.0
+
+    def register(self, collection: str, handler: Handler, fields: Iterable[str] = (), on_reset: ResetHandler = None) -> None:
+        self._handlers[collection].append(handler)
+        self._fields.update(fields)
+        if on_reset is not None:
+            self._reset_handlers.append(on_reset)
+
+    def _pipeline(self) -> List[Dict[str, Any]]:
+        # Hanya field yang dibutuhkan handler yang dibawa event, bukan dokumen utuh (mis. hashed_password).
+        projection = {"operationType": 1, "ns": 1, "documentKey": 1}
+        for name in self._fields:
+            projection[f"fullDocument.{name}"] = 1
+            projection[f"fullDocumentBeforeChange.{name}"] = 1
+            projection[f"updateDescription.updatedFields.{name}"] = 1
+        return [
+            {"$match": {"ns.coll": {"$in": sorted(self._handlers)}, "operationType": {"$in": WATCHED_OPERATIONS}}},
+            {"$project": projection},
+        ]
+
+    async def _dispatch(self, change: Dict[str, Any]) -> None:
+        event = InvalidationEvent(
+            collection=change["ns"]["coll"],
+            operation=change["operationType"],
+            document_id=change["documentKey"]["_id"],
+            before=change.get("fullDocumentBeforeChange") or {},
+            after=change.get("fullDocument") or {},
+            updated_fields=(change.get("updateDescription") or {}).get("updatedFields") or {},
+        )
+        for handler in self._handlers.get(event.collection, ()):
+            try:
+                await handler(event)
+            except Exception:
+                logger.exception("Handler invalidasi gagal", extra={"collection": event.collection, "operation": event.operation})
+        self.events_processed += 1
+
+    async def _reset_all(self) -> None:
+        for on_reset in self._reset_handlers:
+            try:
+                await on_reset()
+            except Exception:
+                logger.exception("Reset region cache gagal")
+
+    async def _save_token(self, force: bool = False) -> None:
+        if self._token is None or self._token == self._saved_token:
+            return
+        if not force and time.monotonic() - self._saved_at < settings.INVALIDATION_TOKEN_FLUSH_SECONDS:
+            return
+        await self._db[TOKEN_COLLECTION].update_one(
+            {"_id": self.consumer},
+            {"$set": {"token": self._token, "updated_at": datetime.utcnow()}},
+            upsert=True,
+        )
+        self._saved_token, self._saved_at = self._token, time.monotonic()
+
+    async def _watch(self) -> None:
+        if self._token is None:
+            stored = await self._db[TOKEN_COLLECTION].find_one({"_id": self.consumer})
+            self._token = self._saved_token = stored["token"] if stored else None
+
+        options = {"full_document": "updateLookup", "full_document_before_change": "whenAvailable"} if self._fields else {}
+        async with self._db.watch(self._pipeline(), resume_after=self._token, max_await_time_ms=1000, **options) as stream:
+            logger.info("Bus invalidasi aktif", extra={"collections": sorted(self._handlers), "resumed": self._token is not None})
+            while stream.alive:
+                change = await stream.try_next()
+                if change is not None:
+                    await self._dispatch(change)
+                # resume_token ikut maju walau tidak ada event (postBatchResumeToken).
+                self._token = stream.resume_token
+                await self._save_token()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._watch()
+            except OperationFailure as error:
+                if error.code in UNSUPPORTED_CODES:
+                    logger.warning("Change stream tidak didukung server; invalidasi cache hanya mengandalkan TTL")
+                    return
+                if error.code in HISTORY_LOST_CODES:
+                    # Event yang terlewat tidak bisa diketahui lagi, jadi seluruh region dikosongkan.
+                    logger.warning("Resume token kedaluwarsa, region cache dikosongkan", extra={"consumer": self.consumer})
+                    self._token = self._saved_token = None
+                    await self._db[TOKEN_COLLECTION].delete_one({"_id": self.consumer})
+                    await self._reset_all()
+                    continue
+                logger.warning("Change stream gagal, mencoba lagi", extra={"error": str(error), "code": error.code})
+            except PyMongoError as error:
+                logger.warning("Change stream terputus, mencoba lagi", extra={"error": str(error)})
+            await asyncio.sleep(RETRY_SECONDS)
+
+    @property
+    def running(self) -> bool:
+        # False bila bus dimatikan atau berhenti karena server tidak mendukung change stream.
+        return self._task is not None and not self._task.done()
+
+    async def start(self, db: AsyncIOMotorDatabase) -> None:
+        if not settings.INVALIDATION_BUS_ENABLED or not self._handlers or self._task is not None:
+            return
+        self._db = db
+        self.consumer = self.consumer or default_consumer()
+        try:
+            await db[TOKEN_COLLECTION].create_index("updated_at", expireAfterSeconds=TOKEN_TTL_SECONDS)
+        except PyMongoError as error:
+            logger.warning("Index TTL resume token gagal dibuat", extra={"error": str(error)})
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        try:
+            await self._save_token(force=True)
+        except PyMongoError as error:
+            logger.warning("Resume token gagal disimpan", extra={"error": str(error)})
+
+
+invalidation_bus = InvalidationBus()
\ No newline at end of file
@@ -0,0 +1,78 @@
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Any, Dict, Optional, Set
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Ditaruh di antrean subscriber yang tertinggal; klien harus memuat ulang state lewat snapshot.
+RESYNC = {"event": "resync", "data": {}}
+
+
+class Subscription:
+    def __init__(self, topic: str, queue_size: int):
+        self.topic = topic
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+    def offer(self, message: Dict[str, Any]) -> None:
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Backpressure: publisher tidak pernah menunggu klien lambat. Antrean dikosongkan dan
+            # diganti satu penanda resync sehingga memori per koneksi tetap terbatas.
+            self.dropped += self.queue.qsize()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+    async def get(self, timeout: float) -> Optional[Dict[str, Any]]:
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class PubSub:
+    def __init__(self, max_subscribers: int = None, queue_size: int = None):
+        self.max_subscribers = max_subscribers or settings.SSE_MAX_CONNECTIONS
+        self.queue_size = queue_size or settings.SSE_QUEUE_SIZE
+        self._topics: Dict[str, Set[Subscription]] = defaultdict(set)
+        self._count = 0
+
+    @property
+    def subscribers(self) -> int:
+        return self._count
+
+    @property
+    def full(self) -> bool:
+        return self._count >= self.max_subscribers
+
+    def subscribe(self, topic: str) -> Optional[Subscription]:
+        if self.full:
+            return None
+        subscription = Subscription(topic, self.queue_size)
+        self._topics[topic].add(subscription)
+        self._count += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._topics.get(subscription.topic)
+        if not subscribers or subscription not in subscribers:
+            return
+        subscribers.discard(subscription)
+        self._count -= 1
+        if not subscribers:
+            del self._topics[subscription.topic]
+        if subscription.dropped:
+            logger.info("Subscriber lambat kehilangan event", extra={"topic": subscription.topic, "dropped": subscription.dropped})
+
+    def publish(self, topic: str, message: Dict[str, Any]) -> int:
+        subscribers = self._topics.get(topic)
+        if not subscribers:
+            return 0
+        for subscription in subscribers:
+            subscription.offer(message)
+        return len(subscribers)
\ No newline at end of file
@@ -0,0 +1,107 @@
+import logging
+import math
+from typing import Callable, Optional
+
+from fastapi import Depends, HTTPException, Request, status
+
+from app.core.cache import CacheBackend, LocalLRUCache, SharedCacheClient
+from app.core.config import settings
+from app.models.user import UserPublic
+from app.security import get_current_active_user
+
+logger = logging.getLogger(__name__)
+
+# Bobot biaya per rute; satu kuota dipakai bersama oleh semua rute milik pengguna/IP yang sama.
+COST_DEFAULT = 1
+COST_AUTH = 5
+COST_MODEL = 5
+COST_RECEIPT_OCR = 10
+
+REMAINING_HEADER = b"x-ratelimit-remaining"
+
+_backend: Optional[CacheBackend] = None
+
+
+def get_rate_limit_backend() -> CacheBackend:
+    global _backend
+    if _backend is None:
+        if settings.RATE_LIMIT_BACKEND == "shared":
+            _backend = SharedCacheClient()
+        elif settings.RATE_LIMIT_BACKEND == "local":
+            _backend = LocalLRUCache(settings.RATE_LIMIT_MAX_KEYS)
+        else:
+            raise ValueError(f"RATE_LIMIT_BACKEND tidak dikenal: {settings.RATE_LIMIT_BACKEND}")
+    return _backend
+
+
+async def close_rate_limit_backend() -> None:
+    global _backend
+    if _backend is not None:
+        await _backend.close()
+        _backend = None
+
+
+def client_ip(request: Request) -> str:
+    if settings.RATE_LIMIT_TRUST_PROXY:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+async def _consume(key: str, per_minute: float, burst: float, cost: float, request: Request) -> None:
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    # Biaya di atas burst tidak akan pernah lolos, jadi dibatasi ke burst.
+    allowed, retry_after, remaining = await get_rate_limit_backend().gcra(key, 60.0 / per_minute, burst, min(cost, burst))
+    if not allowed:
+        logger.info("Rate limit terlampaui", extra={"key": key, "cost": cost, "retry_after": round(retry_after, 2)})
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests, please retry later",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+    # Disimpan di request.state, bukan di Response milik dependency: header dari Response dependency
+    # hilang bila rute mengembalikan objek Response sendiri. RateLimitHeaderMiddleware yang menuliskannya.
+    request.state.rate_limit_remaining = int(remaining)
+
+
+def limit_per_user(cost: float = COST_DEFAULT) -> Callable:
+    async def dependency(
+        request: Request, current_user: UserPublic = Depends(get_current_active_user)
+    ) -> None:
+        await _consume(
+            f"rl:user:{current_user.id}", settings.RATE_LIMIT_USER_PER_MINUTE, settings.RATE_LIMIT_USER_BURST, cost, request
+        )
+
+    return dependency
+
+
+def limit_per_ip(cost: float = COST_DEFAULT) -> Callable:
+    async def dependency(request: Request) -> None:
+        await _consume(
+            f"rl:ip:{client_ip(request)}", settings.RATE_LIMIT_IP_PER_MINUTE, settings.RATE_LIMIT_IP_BURST, cost, request
+        )
+
+    return dependency
+
+
+class RateLimitHeaderMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_header(message):
+            if message["type"] == "http.response.start":
+                remaining = scope.get("state", {}).get("rate_limit_remaining")
+                headers = list(message.get("headers", []))
+                if remaining is not None and not any(name.lower() == REMAINING_HEADER for name, _ in headers):
+                    headers.append((REMAINING_HEADER, str(remaining).encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_header)
\ No newline at end of file
@@ -0,0 +1,76 @@
+import json
+
+from starlette.exceptions import HTTPException
+
+from app.core.config import settings
+
+
+def _detail(max_bytes: int) -> str:
+    return f"Ukuran permintaan melebihi batas {max_bytes // (1024 * 1024)} MB."
+
+
+class BodyTooLarge(HTTPException):
+    # Turunan HTTPException agar parser form FastAPI meneruskannya sebagai 413, bukan 400.
+    def __init__(self, max_bytes: int):
+        super().__init__(status_code=413, detail=_detail(max_bytes))
+
+
+def _content_length(scope) -> int:
+    for key, value in scope.get("headers", []):
+        if key == b"content-length":
+            try:
+                return int(value)
+            except ValueError:
+                return -1
+    return -1
+
+
+async def send_too_large(send, max_bytes: int) -> None:
+    body = json.dumps({"detail": _detail(max_bytes)}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": 413,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class BodySizeLimitMiddleware:
+    # Starlette men-spool seluruh UploadFile sebelum handler berjalan, jadi batas ukuran harus
+    # ditegakkan di level ASGI: tolak lewat Content-Length, dan putus body chunked begitu melewati batas.
+    def __init__(self, app, max_bytes: int = None):
+        self.app = app
+        self.max_bytes = max_bytes or settings.REQUEST_MAX_BODY_BYTES
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if _content_length(scope) > self.max_bytes:
+            await send_too_large(send, self.max_bytes)
+            return
+
+        received = 0
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    raise BodyTooLarge(self.max_bytes)
+            return message
+
+        async def tracking_send(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except BodyTooLarge:
+            if response_started:
+                raise
+            await send_too_large(send, self.max_bytes)
\ No newline at end of file
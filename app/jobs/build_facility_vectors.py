@@ -0,0 +1,27 @@
+import argparse
+import asyncio
+import logging
+
+from app.core.db import connect_to_mongo, close_mongo_connection, get_database
+from app.core.logger import setup_logging
+from app.services.embedding_service import get_encoder
+from app.services.facility_vector_index import build_index
+
+logger = logging.getLogger(__name__)
+
+
+async def _main(args: argparse.Namespace) -> None:
+    await connect_to_mongo()
+    try:
+        report = await build_index(get_database(), encoder=get_encoder(args.encoder), base_path=args.output)
+        logger.info("Indeks vektor fasilitas selesai dibangun", extra=report)
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bangun indeks embedding fasilitas untuk pencarian semantik.")
+    parser.add_argument("--encoder", default=None, help="hashing (lokal, default) atau gemini")
+    parser.add_argument("--output", default=None, help="Path dasar file indeks (tanpa ekstensi)")
+    setup_logging()
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,83 @@
+import argparse
+import asyncio
+import logging
+from typing import Any, Dict, List
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+
+from app.core.db import connect_to_mongo, close_mongo_connection, get_database
+from app.core.logger import setup_logging
+from app.models.enums import PoolMemberRole
+from app.services.microfunding_service import ensure_indexes
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+
+def _keeper(rows: List[Dict[str, Any]]) -> ObjectId:
+    # Baris ADMIN dipertahankan agar hak admin tidak hilang; selain itu keanggotaan paling awal.
+    admins = [row["_id"] for row in rows if row.get("role") == PoolMemberRole.ADMIN]
+    return min(admins or [row["_id"] for row in rows])
+
+
+async def dedupe(db: AsyncIOMotorDatabase, dry_run: bool = False) -> Dict[str, Any]:
+    pipeline = [
+        {"$group": {
+            "_id": {"pool_id": "$pool_id", "user_id": "$user_id"},
+            "rows": {"$push": {"_id": "$_id", "role": "$role"}},
+            "count": {"$sum": 1},
+        }},
+        {"$match": {"count": {"$gt": 1}}},
+    ]
+    groups = 0
+    doomed: List[ObjectId] = []
+    async for group in db["pool_members"].aggregate(pipeline, allowDiskUse=True):
+        groups += 1
+        keep = _keeper(group["rows"])
+        doomed.extend(row["_id"] for row in group["rows"] if row["_id"] != keep)
+
+    deleted = 0
+    if not dry_run:
+        for start in range(0, len(doomed), BATCH_SIZE):
+            result = await db["pool_members"].delete_many({"_id": {"$in": doomed[start:start + BATCH_SIZE]}})
+            deleted += result.deleted_count
+    return {"duplicate_groups": groups, "duplicate_rows": len(doomed), "deleted": deleted}
+
+
+async def recount(db: AsyncIOMotorDatabase) -> Dict[str, Any]:
+    # member_count di pool menjadi dasar penjaga kapasitas; hitung ulang dari pool_members setelah deduplikasi.
+    counts = {row["_id"]: row["count"] async for row in db["pool_members"].aggregate(
+        [{"$group": {"_id": "$pool_id", "count": {"$sum": 1}}}], allowDiskUse=True
+    )}
+    operations = []
+    async for pool in db["pools"].find({}, {"member_count": 1}).batch_size(BATCH_SIZE):
+        count = counts.get(pool["_id"], 0)
+        if pool.get("member_count") != count:
+            operations.append(UpdateOne({"_id": pool["_id"]}, {"$set": {"member_count": count}}))
+    for start in range(0, len(operations), BATCH_SIZE):
+        await db["pools"].bulk_write(operations[start:start + BATCH_SIZE], ordered=False)
+    return {"pools_recounted": len(operations)}
+
+
+async def _main(args: argparse.Namespace) -> None:
+    await connect_to_mongo()
+    try:
+        db = get_database()
+        report = await dedupe(db, dry_run=args.dry_run)
+        if not args.dry_run:
+            report.update(await recount(db))
+            # Setelah bersih, indeks lama (pool_id, user_id) diganti versi unik.
+            await ensure_indexes(db)
+        logger.info("Deduplikasi keanggotaan pool selesai", extra=report)
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hapus keanggotaan pool ganda, hitung ulang member_count, lalu bangun indeks unik (pool_id, user_id).")
+    parser.add_argument("--dry-run", action="store_true", help="Hanya hitung duplikat tanpa menghapus")
+    setup_logging()
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,39 @@
+import argparse
+import asyncio
+import logging
+from datetime import datetime
+
+from app.core.config import settings
+from app.core.db import connect_to_mongo, close_mongo_connection, get_database
+from app.core.logger import setup_logging
+from app.models.enums import ContributionPeriod
+from app.services import billing_service
+
+logger = logging.getLogger(__name__)
+
+
+async def _main(args: argparse.Namespace) -> None:
+    await connect_to_mongo()
+    try:
+        report = await billing_service.run_billing(
+            get_database(),
+            at=args.at,
+            periods=[ContributionPeriod(period) for period in args.period] if args.period else None,
+            batch_size=args.batch_size,
+            concurrency=args.concurrency,
+            create_tokens=not args.skip_tokens,
+        )
+        logger.info("Billing iuran selesai", extra=report)
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Buat tagihan iuran periode berjalan untuk seluruh anggota pool.")
+    parser.add_argument("--at", type=datetime.fromisoformat, default=None, help="Tanggal acuan periode (default: sekarang, UTC)")
+    parser.add_argument("--period", action="append", choices=[period.value for period in ContributionPeriod])
+    parser.add_argument("--batch-size", type=int, default=settings.BILLING_BATCH_SIZE)
+    parser.add_argument("--concurrency", type=int, default=settings.BILLING_GATEWAY_CONCURRENCY, help="Permintaan token gateway paralel")
+    parser.add_argument("--skip-tokens", action="store_true", help="Hanya buat tagihan; token dibuat pada run berikutnya")
+    setup_logging()
+    asyncio.run(_main(parser.parse_args()))
\ No newline at end of file
@@ -0,0 +1,39 @@
+import argparse
+import asyncio
+import logging
+
+from app.core.config import settings
+from app.core.db import connect_to_mongo, close_mongo_connection, get_database
+from app.core.logger import setup_logging
+from app.services import analytics_service
+
+logger = logging.getLogger(__name__)
+
+
+async def _main(args: argparse.Namespace) -> None:
+    await connect_to_mongo()
+    try:
+        while True:
+            try:
+                await analytics_service.refresh_expense_analytics(
+                    get_database(), window_days=args.window_days, min_group_size=args.min_group_size
+                )
+            except Exception:
+                if not args.interval:
+                    raise
+                logger.exception("Pembaruan analitik gagal, dicoba lagi pada interval berikutnya")
+            if not args.interval:
+                break
+            await asyncio.sleep(args.interval)
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hitung ulang statistik pengeluaran populasi (hanya pengguna yang menyetujui).")
+    parser.add_argument("--window-days", type=int, default=settings.ANALYTICS_WINDOW_DAYS)
+    parser.add_argument("--min-group-size", type=int, default=settings.ANALYTICS_MIN_GROUP_SIZE)
+    parser.add_argument("--interval", type=int, default=0,
+                        help="Jalankan berulang tiap N detik (mis. 3600); 0 = sekali")
+    setup_logging()
+    asyncio.run(_main(parser.parse_args()))
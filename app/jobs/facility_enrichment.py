@@ -0,0 +1,200 @@
+import argparse
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, UpdateOne
+
+from app.core.db import connect_to_mongo, close_mongo_connection, get_database
+from app.core.logger import setup_logging
+from app.services import gemini_service
+
+logger = logging.getLogger(__name__)
+
+JOB_NAME = "facility_enrichment"
+CHECKPOINT_COLLECTION = "job_checkpoints"
+
+ENRICHMENT_PROJECTION = {
+    "name": 1, "type": 1, "address": 1, "phone": 1, "overall_rating": 1,
+    "services_offered": 1, "image_url": 1,
+}
+
+
+def _valid_rating(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and 0 <= value <= 5
+
+
+def _valid_text(value: Any) -> bool:
+    return isinstance(value, str) and 0 < len(value.strip()) <= 500
+
+
+def _valid_services(value: Any) -> bool:
+    return isinstance(value, list) and 0 < len(value) <= 50 and all(_valid_text(item) for item in value)
+
+
+ENRICHABLE_FIELDS = {
+    "overall_rating": _valid_rating,
+    "phone": _valid_text,
+    "image_url": _valid_text,
+    "services_offered": _valid_services,
+}
+
+
+def merge_enrichment(facility: Dict[str, Any], enrichment: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if not isinstance(enrichment, dict):
+        return {}
+    return {
+        field: value
+        for field, value in enrichment.items()
+        if field in ENRICHABLE_FIELDS and ENRICHABLE_FIELDS[field](value) and facility.get(field) != value
+    }
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase) -> None:
+    await db["facilities"].create_index([("enrichment_checked_at", ASCENDING)])
+
+
+async def _load_checkpoint(db: AsyncIOMotorDatabase, restart: bool) -> Dict[str, Any]:
+    checkpoint = await db[CHECKPOINT_COLLECTION].find_one({"_id": JOB_NAME})
+    if checkpoint and not checkpoint.get("finished_at") and not restart:
+        logger.info("Melanjutkan enrichment dari checkpoint", extra={"run_started_at": checkpoint["run_started_at"]})
+        return checkpoint
+
+    checkpoint = {"_id": JOB_NAME, "run_started_at": datetime.utcnow(), "processed": 0, "updated": 0, "finished_at": None}
+    await db[CHECKPOINT_COLLECTION].replace_one({"_id": JOB_NAME}, checkpoint, upsert=True)
+    return checkpoint
+
+
+async def _enrich_one(facility: Dict[str, Any], semaphore: asyncio.Semaphore) -> Optional[Tuple[UpdateOne, bool]]:
+    async with semaphore:
+        payload = {key: value for key, value in facility.items() if key != "_id"}
+        enrichment = await gemini_service.enrich_facility_data(payload)
+
+    # Panggilan Gemini yang gagal tidak dihitung sebagai "sudah diperiksa" agar fasilitas diambil lagi pada run berikutnya.
+    if enrichment is None:
+        return None
+
+    now = datetime.utcnow()
+    update = {"enrichment_checked_at": now}
+    changes = merge_enrichment(facility, enrichment)
+    if changes:
+        update.update(changes)
+        update["enriched_at"] = now
+        update["enrichment_provenance"] = {
+            "source": "gemini",
+            "model": gemini_service.MODEL_NAME,
+            "fields": sorted(changes),
+            "at": now,
+        }
+    return UpdateOne({"_id": facility["_id"]}, {"$set": update}), bool(changes)
+
+
+async def run_enrichment(
+    db: AsyncIOMotorDatabase,
+    batch_size: int = 50,
+    concurrency: int = 4,
+    stale_days: int = 30,
+    limit: Optional[int] = None,
+    restart: bool = False,
+) -> Dict[str, Any]:
+    await ensure_indexes(db)
+    checkpoint = await _load_checkpoint(db, restart)
+    # Fasilitas yang sudah diperiksa di run ini memiliki enrichment_checked_at
+    # setelah run_started_at sehingga otomatis terlewati saat resume.
+    cutoff = checkpoint["run_started_at"] - timedelta(days=stale_days)
+    stale_filter = {"$or": [
+        {"enrichment_checked_at": {"$exists": False}},
+        {"enrichment_checked_at": {"$lt": cutoff}},
+    ]}
+
+    semaphore = asyncio.Semaphore(concurrency)
+    processed = updated = 0
+    failed_ids: List[Any] = []
+    aborted = False
+    started = time.perf_counter()
+
+    while limit is None or processed < limit:
+        size = batch_size if limit is None else min(batch_size, limit - processed)
+        batch_filter = {**stale_filter, "_id": {"$nin": failed_ids}} if failed_ids else stale_filter
+        batch: List[Dict[str, Any]] = await db["facilities"].find(batch_filter, ENRICHMENT_PROJECTION) \
+            .sort("enrichment_checked_at", ASCENDING).limit(size).to_list(length=size)
+        if not batch:
+            break
+
+        outcomes = await asyncio.gather(*(_enrich_one(facility, semaphore) for facility in batch))
+        results = [outcome for outcome in outcomes if outcome is not None]
+        failed_ids.extend(facility["_id"] for facility, outcome in zip(batch, outcomes) if outcome is None)
+        if results:
+            await db["facilities"].bulk_write([operation for operation, _ in results], ordered=False)
+
+        batch_updated = sum(1 for _, changed in results if changed)
+        batch_failed = len(batch) - len(results)
+        processed += len(batch)
+        updated += batch_updated
+        await db[CHECKPOINT_COLLECTION].update_one(
+            {"_id": JOB_NAME},
+            {
+                "$inc": {"processed": len(batch), "updated": batch_updated, "failed": batch_failed},
+                "$set": {"last_batch_at": datetime.utcnow()},
+            },
+        )
+
+        elapsed = time.perf_counter() - started
+        logger.info(
+            "Batch enrichment selesai",
+            extra={
+                "processed": processed,
+                "updated": updated,
+                "failed": len(failed_ids),
+                "facilities_per_minute": round(processed / elapsed * 60, 1),
+            },
+        )
+        if not results:
+            # Satu batch penuh gagal: Gemini kemungkinan sedang tidak tersedia, run dihentikan dan checkpoint tetap terbuka.
+            logger.warning("Semua enrichment dalam batch gagal, run dihentikan", extra={"failed": batch_failed})
+            aborted = True
+            break
+
+    finished = (limit is None or processed < limit) and not aborted
+    if finished:
+        await db[CHECKPOINT_COLLECTION].update_one({"_id": JOB_NAME}, {"$set": {"finished_at": datetime.utcnow()}})
+
+    elapsed = time.perf_counter() - started
+    return {
+        "processed": processed,
+        "updated": updated,
+        "failed": len(failed_ids),
+        "elapsed_seconds": round(elapsed, 2),
+        "facilities_per_minute": round(processed / elapsed * 60, 1) if elapsed else 0.0,
+        "finished": finished,
+    }
+
+
+async def _main(args: argparse.Namespace) -> None:
+    await connect_to_mongo()
+    try:
+        report = await run_enrichment(
+            get_database(),
+            batch_size=args.batch_size,
+            concurrency=args.concurrency,
+            stale_days=args.stale_days,
+            limit=args.limit,
+            restart=args.restart,
+        )
+        logger.info("Enrichment fasilitas selesai", extra=report)
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Enrichment data fasilitas secara batch menggunakan Gemini.")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--stale-days", type=int, default=30)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--restart", action="store_true", help="Abaikan checkpoint dan mulai run baru")
+    setup_logging()
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,523 @@
+import argparse
+import asyncio
+import logging
+import math
+import random
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core.config import settings
+from app.core.logger import setup_logging
+from app.models.enums import (ContributionPeriod, ContributionStatus, DisbursementStatus, ExpenseCategory,
+                              FacilityType, Gender, LedgerEntryType, PaymentMethod, PoolMemberRole, PoolStatus, VoteOption)
+from app.services.user_service import get_password_hash
+
+logger = logging.getLogger(__name__)
+
+# Volume penuh (scale=1.0).
+FULL_SCALE = {"users": 100_000, "expenses": 1_000_000, "facilities": 50_000, "pools": 10_000}
+MEMBERS_PER_POOL = 10
+CONTRIBUTION_MONTHS = 6
+HISTORIC_DISBURSEMENTS_PER_POOL = 2
+BATCH_SIZE = 5_000
+SEED_PASSWORD = "danaraga-seed"
+
+# Kode jenis dokumen untuk ObjectId deterministik.
+USER, FACILITY, EXPENSE, POOL, MEMBER, CONTRIBUTION, DISBURSEMENT, LEDGER = range(1, 9)
+_EPOCH = int(datetime(2024, 1, 1).timestamp())
+BASE_DATE = datetime(2025, 6, 30)
+
+# (provinsi, kode KTP, bobot populasi, [(kota/kabupaten, lat, lon, awalan kode pos)])
+PROVINCES = [
+    ("DKI Jakarta", "31", 11, [("Jakarta Selatan", -6.2615, 106.8106, "121"), ("Jakarta Timur", -6.2250, 106.9004, "134"),
+                               ("Jakarta Barat", -6.1674, 106.7637, "115"), ("Jakarta Utara", -6.1214, 106.7741, "142")]),
+    ("Jawa Barat", "32", 18, [("Kota Bandung", -6.9175, 107.6191, "401"), ("Kota Bekasi", -6.2383, 106.9756, "171"),
+                              ("Kota Bogor", -6.5971, 106.8060, "161"), ("Kota Depok", -6.4025, 106.7942, "164")]),
+    ("Jawa Tengah", "33", 13, [("Kota Semarang", -6.9667, 110.4167, "501"), ("Kota Surakarta", -7.5755, 110.8243, "571")]),
+    ("DI Yogyakarta", "34", 3, [("Kota Yogyakarta", -7.7956, 110.3695, "552"), ("Kabupaten Sleman", -7.7325, 110.4024, "555")]),
+    ("Jawa Timur", "35", 15, [("Kota Surabaya", -7.2575, 112.7521, "601"), ("Kota Malang", -7.9666, 112.6326, "651")]),
+    ("Banten", "36", 5, [("Kota Tangerang", -6.1783, 106.6319, "151"), ("Kota Serang", -6.1200, 106.1503, "421")]),
+    ("Bali", "51", 2, [("Kota Denpasar", -8.6705, 115.2126, "802")]),
+    ("Sumatera Utara", "12", 6, [("Kota Medan", 3.5952, 98.6722, "201")]),
+    ("Sumatera Barat", "13", 2, [("Kota Padang", -0.9471, 100.4172, "251")]),
+    ("Sumatera Selatan", "16", 3, [("Kota Palembang", -2.9761, 104.7754, "301")]),
+    ("Riau", "14", 2, [("Kota Pekanbaru", 0.5071, 101.4478, "282")]),
+    ("Lampung", "18", 3, [("Kota Bandar Lampung", -5.3971, 105.2668, "351")]),
+    ("Kalimantan Timur", "64", 1, [("Kota Samarinda", -0.5022, 117.1536, "751"), ("Kota Balikpapan", -1.2379, 116.8529, "761")]),
+    ("Kalimantan Barat", "61", 2, [("Kota Pontianak", -0.0263, 109.3425, "781")]),
+    ("Sulawesi Selatan", "73", 3, [("Kota Makassar", -5.1477, 119.4327, "902")]),
+    ("Sulawesi Utara", "71", 1, [("Kota Manado", 1.4748, 124.8421, "951")]),
+    ("Nusa Tenggara Barat", "52", 2, [("Kota Mataram", -8.5833, 116.1167, "831")]),
+    ("Papua", "94", 1, [("Kota Jayapura", -2.5337, 140.7181, "991")]),
+]
+CITIES = [(province, code, city) for province, code, _, cities in PROVINCES for city in cities]
+CITY_WEIGHTS = [weight / len(cities) for _, _, weight, cities in PROVINCES for _ in cities]
+
+FIRST_NAMES = ["Budi", "Siti", "Agus", "Dewi", "Rizky", "Putri", "Andi", "Nur", "Dimas", "Ayu", "Fajar", "Rina",
+               "Hendra", "Wulan", "Yusuf", "Indah", "Bayu", "Sri", "Eko", "Lestari", "Made", "Ketut", "Rahmat", "Fitri"]
+LAST_NAMES = ["Santoso", "Wijaya", "Saputra", "Lestari", "Hidayat", "Pratama", "Siregar", "Nasution", "Sinaga",
+              "Kurniawan", "Setiawan", "Rahmawati", "Putra", "Susanti", "Gunawan", "Simanjuntak", "Harahap", "Wibowo"]
+STREETS = ["Jl. Sudirman", "Jl. Merdeka", "Jl. Diponegoro", "Jl. Gatot Subroto", "Jl. Ahmad Yani", "Jl. Pahlawan",
+           "Jl. Gajah Mada", "Jl. Veteran", "Jl. Kartini", "Jl. Imam Bonjol", "Jl. Hasanuddin", "Jl. Pemuda"]
+COMPANIES = ["PT Sinar Jaya", "PT Nusantara Abadi", "CV Maju Bersama", "PT Bank Mandiri", "PT Telkom Indonesia",
+             "Pemerintah Daerah", "PT Astra International", "Toko Sendiri"]
+
+# (status pekerjaan, bobot, median pendapatan bulanan)
+EMPLOYMENT = [("Karyawan Swasta", 35, 6_000_000), ("Wiraswasta", 20, 5_000_000), ("PNS", 10, 7_000_000),
+              ("Freelancer", 10, 4_500_000), ("Pelajar/Mahasiswa", 12, 1_500_000), ("Tidak Bekerja", 13, 800_000)]
+EDUCATION = ["SD", "SMP", "SMA/SMK", "D3", "S1", "S2"]
+CHRONIC_CONDITIONS = ["Diabetes", "Hipertensi", "Asma", "Kolesterol", "Maag Kronis"]
+
+FACILITY_PROFILES = {
+    FacilityType.PUSKESMAS: (45, "Puskesmas Kecamatan", (0, 50_000), ["Poli Umum", "Poli Gigi", "KIA", "Imunisasi", "Laboratorium Sederhana"]),
+    FacilityType.CLINIC: (35, "Klinik Pratama", (75_000, 300_000), ["Poli Umum", "Poli Gigi", "Apotek", "Vaksinasi", "Khitan"]),
+    FacilityType.HOSPITAL: (12, "RS", (150_000, 2_500_000), ["IGD 24 Jam", "Rawat Inap", "Poli Penyakit Dalam", "Poli Anak", "Radiologi", "ICU"]),
+    FacilityType.LABORATORY: (8, "Laboratorium Klinik", (50_000, 1_000_000), ["Cek Darah Lengkap", "Cek Gula Darah", "Kolesterol", "Urinalisis", "PCR"]),
+}
+FACILITY_TYPES = list(FACILITY_PROFILES)
+FACILITY_WEIGHTS = [profile[0] for profile in FACILITY_PROFILES.values()]
+
+MEDICINES = ["PARACETAMOL 500MG", "AMOXICILLIN 500MG", "VITAMIN C 1000MG", "OBH SIRUP", "CETIRIZINE 10MG",
+             "OMEPRAZOLE 20MG", "METFORMIN 500MG", "AMLODIPINE 5MG", "IBUPROFEN 400MG", "SALBUTAMOL INHALER"]
+# (kategori, bobot, median harga)
+EXPENSE_PROFILES = [(ExpenseCategory.MEDICATION, 55, 45_000), (ExpenseCategory.CONSULTATION, 25, 150_000),
+                    (ExpenseCategory.LAB_FEE, 12, 250_000), (ExpenseCategory.OTHER, 8, 80_000)]
+
+
+@dataclass
+class DatasetSize:
+    users: int
+    expenses: int
+    facilities: int
+    pools: int
+
+    @classmethod
+    def from_scale(cls, scale: float) -> "DatasetSize":
+        return cls(**{name: max(1, int(count * scale)) for name, count in FULL_SCALE.items()})
+
+    def validate(self) -> None:
+        # Anggota pool diambil berurutan dari daftar pengguna secara melingkar; dengan pengguna lebih
+        # sedikit dari MEMBERS_PER_POOL, posisi akan melingkar ke pengguna yang sama dalam satu pool.
+        if self.users < MEMBERS_PER_POOL:
+            raise ValueError(f"Jumlah pengguna ({self.users}) minimal {MEMBERS_PER_POOL} (MEMBERS_PER_POOL)")
+
+
+def object_id(kind: int, index: int, when: Optional[datetime] = None) -> ObjectId:
+    timestamp = int(when.timestamp()) if when else _EPOCH
+    return ObjectId(struct.pack(">IB", timestamp, kind) + index.to_bytes(7, "big"))
+
+
+def user_email(index: int) -> str:
+    return f"user{index}@seed.danaraga.id"
+
+
+def pool_member_index(size: DatasetSize, pool_index: int, position: int) -> int:
+    return (pool_index * MEMBERS_PER_POOL + position) % size.users
+
+
+@lru_cache(maxsize=1)
+def _seed_password_hash() -> str:
+    # bcrypt mahal; semua pengguna seed berbagi satu hash per proses.
+    return get_password_hash(SEED_PASSWORD)
+
+
+def _lognormal(rng: random.Random, median: float, sigma: float = 0.6) -> float:
+    return median * math.exp(rng.gauss(0, sigma))
+
+
+def _near(rng: random.Random, latitude: float, longitude: float, spread: float = 0.08) -> Tuple[float, float]:
+    return round(latitude + rng.gauss(0, spread), 6), round(longitude + rng.gauss(0, spread), 6)
+
+
+def _make_users(start: int, stop: int, rng: random.Random, size: DatasetSize, seed: int) -> List[Dict[str, Any]]:
+    cities = rng.choices(CITIES, weights=CITY_WEIGHTS, k=stop - start)
+    users = []
+    for index, (province, ktp_code, (city, city_lat, city_lon, postal_prefix)) in zip(range(start, stop), cities):
+        employment, _, median_income = rng.choices(EMPLOYMENT, weights=[e[1] for e in EMPLOYMENT])[0]
+        income = int(_lognormal(rng, median_income, 0.5) // 50_000 * 50_000)
+        working = employment in ("Karyawan Swasta", "PNS", "Wiraswasta", "Freelancer")
+        latitude, longitude = _near(rng, city_lat, city_lon)
+        age = rng.randint(18, 70)
+        users.append({
+            "_id": object_id(USER, index),
+            "email": user_email(index),
+            "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "hashed_password": _seed_password_hash(),
+            "phone": f"08{rng.randint(1_100_000_000, 9_999_999_999)}",
+            "age": age,
+            "gender": rng.choice([Gender.MALE, Gender.FEMALE]).value,
+            "ktp_number": f"{ktp_code}{rng.randint(1000, 9999)}{rng.randint(10, 31):02d}{rng.randint(1, 12):02d}"
+                          f"{(2025 - age) % 100:02d}{rng.randint(1, 9999):04d}",
+            "address": f"{rng.choice(STREETS)} No. {rng.randint(1, 250)}, {city}",
+            "bpjs_status": rng.random() < 0.75,
+            "employment_status": employment,
+            "income_level": income,
+            "education_level": rng.choice(EDUCATION),
+            "chronic_conditions": rng.choice(CHRONIC_CONDITIONS) if rng.random() < 0.2 else None,
+            "max_budget": max(50_000, int(income * rng.uniform(0.02, 0.1) // 10_000 * 10_000)),
+            "max_distance_km": rng.choice([5, 10, 20, 30]),
+            "perusahaan": rng.choice(COMPANIES) if working else None,
+            "lamaBekerjaJumlah": str(rng.randint(1, 20)) if working else None,
+            "lamaBekerjaSatuan": "Tahun" if working else None,
+            "sumberPendapatanLain": rng.choice(["Usaha Sampingan", "Sewa Properti", "Investasi"]) if rng.random() < 0.15 else None,
+            "kotaKabupaten": city,
+            "kodePos": f"{postal_prefix}{rng.randint(10, 99)}",
+            "provinsi": province,
+            "persetujuanAnalisisData": rng.random() < 0.7,
+            "latitude": latitude,
+            "longitude": longitude,
+            "createdAt": BASE_DATE - timedelta(days=rng.randint(0, 3 * 365)),
+            "updatedAt": BASE_DATE,
+        })
+    return users
+
+
+def _make_facilities(start: int, stop: int, rng: random.Random, size: DatasetSize, seed: int) -> List[Dict[str, Any]]:
+    facilities = []
+    for index in range(start, stop):
+        province, _, (city, city_lat, city_lon, _) = rng.choices(CITIES, weights=CITY_WEIGHTS)[0]
+        facility_type = rng.choices(FACILITY_TYPES, weights=FACILITY_WEIGHTS)[0]
+        _, prefix, (tariff_low, tariff_high), services = FACILITY_PROFILES[facility_type]
+        latitude, longitude = _near(rng, city_lat, city_lon, spread=0.12)
+        tariff_min = int(rng.uniform(tariff_low, (tariff_low + tariff_high) / 2) // 5_000 * 5_000)
+        facilities.append({
+            "_id": object_id(FACILITY, index),
+            "name": f"{prefix} {rng.choice(LAST_NAMES)} {index}",
+            "type": facility_type.value,
+            "address": f"{rng.choice(STREETS)} No. {rng.randint(1, 400)}, {city}, {province}",
+            "location": {"type": "Point", "coordinates": [longitude, latitude]},
+            "latitude": latitude,
+            "longitude": longitude,
+            "tariff_min": tariff_min,
+            "tariff_max": int(rng.uniform(tariff_min, tariff_high) // 5_000 * 5_000) + 5_000,
+            "overall_rating": round(min(5.0, max(1.0, rng.gauss(4.2, 0.5))), 1),
+            "phone": f"(0{rng.randint(21, 99)}) {rng.randint(1_000_000, 9_999_999)}",
+            "services_offered": rng.sample(services, rng.randint(2, len(services))),
+            "image_url": None,
+        })
+    return facilities
+
+
+def _make_expenses(start: int, stop: int, rng: random.Random, size: DatasetSize, seed: int) -> List[Dict[str, Any]]:
+    expenses = []
+    for index in range(start, stop):
+        category, _, median_price = rng.choices(EXPENSE_PROFILES, weights=[p[1] for p in EXPENSE_PROFILES])[0]
+        transaction_date = BASE_DATE - timedelta(days=rng.randint(0, 3 * 365), minutes=rng.randint(0, 1439))
+        expenses.append({
+            "_id": object_id(EXPENSE, index),
+            "user_id": str(object_id(USER, rng.randrange(size.users))),
+            "medicine_name": rng.choice(MEDICINES) if category == ExpenseCategory.MEDICATION else None,
+            "facility_name": f"{rng.choice(['Apotek', 'Klinik Pratama', 'RS'])} {rng.choice(LAST_NAMES)}",
+            "category": category.value,
+            "transaction_date": transaction_date,
+            "total_price": float(max(1_000, int(_lognormal(rng, median_price) // 500 * 500))),
+            "receipt_id": None,
+            "createdAt": transaction_date,
+            "updatedAt": transaction_date,
+        })
+    return expenses
+
+
+def _pool_history(size: DatasetSize, seed: int, pool_index: int) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    # RNG per pool agar saldo pool bisa dihitung ulang di batch mana pun tanpa membaca kontribusinya.
+    rng = random.Random(f"{seed}:pool-history:{pool_index}")
+    pool_id = object_id(POOL, pool_index)
+    contributions = []
+    for position in range(MEMBERS_PER_POOL):
+        for month in range(CONTRIBUTION_MONTHS):
+            contributions.append({
+                "_id": object_id(CONTRIBUTION, (pool_index * MEMBERS_PER_POOL + position) * CONTRIBUTION_MONTHS + month),
+                "pool_id": pool_id,
+                "member_id": object_id(USER, pool_member_index(size, pool_index, position)),
+                "amount": 50_000.0,
+                "contribution_date": BASE_DATE - timedelta(days=30 * month + rng.randint(0, 5)),
+                "payment_method": rng.choice(list(PaymentMethod)).value,
+                "status": (ContributionStatus.SUCCESS if rng.random() < 0.95 else ContributionStatus.FAILED).value,
+            })
+
+    disbursements = []
+    for number in range(HISTORIC_DISBURSEMENTS_PER_POOL):
+        requester = object_id(USER, pool_member_index(size, pool_index, number + 2))
+        request_date = BASE_DATE - timedelta(days=rng.randint(7, CONTRIBUTION_MONTHS * 30))
+        voters = [
+            {
+                "user_id": object_id(USER, pool_member_index(size, pool_index, position)),
+                "vote": (VoteOption.FOR if rng.random() < 0.8 else VoteOption.AGAINST).value,
+                "voted_at": request_date + timedelta(hours=rng.randint(1, 23)),
+                "comment": None,
+            }
+            for position in range(MEMBERS_PER_POOL)
+            if rng.random() < 0.7
+        ]
+        votes_for = sum(1 for voter in voters if voter["vote"] == VoteOption.FOR.value)
+        disbursements.append({
+            "_id": object_id(DISBURSEMENT, size.pools + pool_index * HISTORIC_DISBURSEMENTS_PER_POOL + number),
+            "pool_id": pool_id,
+            "requested_by_user_id": requester,
+            "recipient_user_id": requester,
+            "amount": float(rng.randint(2, 10) * 50_000),
+            "purpose": rng.choice(["Biaya rawat jalan", "Pembelian obat rutin", "Biaya persalinan", "Cek laboratorium"]),
+            "proof_url": None,
+            "status": (DisbursementStatus.DISBURSED if votes_for * 2 > MEMBERS_PER_POOL else DisbursementStatus.REJECTED).value,
+            "request_date": request_date,
+            "resolved_at": request_date + timedelta(days=1),
+            "votes_for": votes_for,
+            "votes_against": len(voters) - votes_for,
+            "voters": voters,
+        })
+    return contributions, disbursements
+
+
+def _pool_balance(contributions: List[Dict[str, Any]], disbursements: List[Dict[str, Any]]) -> float:
+    paid = sum(item["amount"] for item in contributions if item["status"] == ContributionStatus.SUCCESS.value)
+    spent = sum(item["amount"] for item in disbursements if item["status"] == DisbursementStatus.DISBURSED.value)
+    return max(0.0, paid - spent)
+
+
+def _make_pools(start: int, stop: int, rng: random.Random, size: DatasetSize, seed: int) -> List[Dict[str, Any]]:
+    pools = []
+    for index in range(start, stop):
+        _, _, (city, _, _, _) = rng.choices(CITIES, weights=CITY_WEIGHTS)[0]
+        community = rng.choice(["Keluarga", "Kantor", "RT/RW", "Komunitas Ojol", "Paguyuban Pedagang"])
+        pools.append({
+            "_id": object_id(POOL, index),
+            "title": f"Dana Sehat {community} {city} {index}",
+            "description": f"Pool dana kesehatan gotong royong {community.lower()} di {city}.",
+            "type_of_community": community,
+            "max_members": MEMBERS_PER_POOL * 2,
+            "contribution_period": ContributionPeriod.MONTHLY.value,
+            "contribution_amount_per_member": 50_000,
+            "benefit_coverage": rng.sample(["Rawat Jalan", "Rawat Inap", "Obat", "Persalinan", "Laboratorium"], 2),
+            "claim_approval_system": "VOTING_50_PERCENT",
+            "claim_voting_duration": "24_HOURS",
+            "creator_user_id": object_id(USER, pool_member_index(size, index, 0)),
+            "pool_code": f"S{index:07d}",
+            "current_amount": _pool_balance(*_pool_history(size, seed, index)),
+            "member_count": MEMBERS_PER_POOL,
+            "status": PoolStatus.OPEN.value,
+            "createdAt": BASE_DATE - timedelta(days=CONTRIBUTION_MONTHS * 30 + rng.randint(0, 365)),
+            "updatedAt": BASE_DATE,
+        })
+    return pools
+
+
+def _make_members(start: int, stop: int, rng: random.Random, size: DatasetSize, seed: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "_id": object_id(MEMBER, pool_index * MEMBERS_PER_POOL + position),
+            "pool_id": object_id(POOL, pool_index),
+            "user_id": object_id(USER, pool_member_index(size, pool_index, position)),
+            "role": (PoolMemberRole.ADMIN if position == 0 else PoolMemberRole.MEMBER).value,
+            "joined_date": BASE_DATE - timedelta(days=CONTRIBUTION_MONTHS * 30 + rng.randint(0, 30)),
+        }
+        for pool_index in range(start, stop)
+        for position in range(MEMBERS_PER_POOL)
+    ]
+
+
+def _make_contributions(start: int, stop: int, rng: random.Random, size: DatasetSize, seed: int) -> List[Dict[str, Any]]:
+    return [item for pool_index in range(start, stop) for item in _pool_history(size, seed, pool_index)[0]]
+
+
+def _make_disbursements(start: int, stop: int, rng: random.Random, size: DatasetSize, seed: int) -> List[Dict[str, Any]]:
+    disbursements = []
+    for pool_index in range(start, stop):
+        recipient = object_id(USER, pool_member_index(size, pool_index, 1))
+        # Satu pencairan PENDING_VOTE per pool pada indeks pool_index (dipakai benchmark voting).
+        disbursements.append({
+            "_id": object_id(DISBURSEMENT, pool_index),
+            "pool_id": object_id(POOL, pool_index),
+            "requested_by_user_id": recipient,
+            "recipient_user_id": recipient,
+            "amount": float(rng.randint(2, 20) * 50_000),
+            "purpose": rng.choice(["Biaya rawat jalan", "Pembelian obat rutin", "Biaya persalinan", "Cek laboratorium"]),
+            "proof_url": None,
+            "status": DisbursementStatus.PENDING_VOTE.value,
+            "request_date": BASE_DATE,
+            "votes_for": 0,
+            "votes_against": 0,
+            "voters": [],
+        })
+        disbursements.extend(_pool_history(size, seed, pool_index)[1])
+    return disbursements
+
+
+def _make_ledger(start: int, stop: int, rng: random.Random, size: DatasetSize, seed: int) -> List[Dict[str, Any]]:
+    # ObjectId entri memakai waktu transaksi agar urutan _id (kunci statement) kronologis.
+    contribution_count = size.pools * MEMBERS_PER_POOL * CONTRIBUTION_MONTHS
+    entries = []
+    for pool_index in range(start, stop):
+        contributions, disbursements = _pool_history(size, seed, pool_index)
+        for contribution in contributions:
+            if contribution["status"] == ContributionStatus.SUCCESS.value:
+                when = contribution["contribution_date"]
+                entries.append({
+                    "_id": object_id(LEDGER, int.from_bytes(contribution["_id"].binary[5:], "big"), when),
+                    "pool_id": contribution["pool_id"], "type": LedgerEntryType.CONTRIBUTION.value,
+                    "amount": contribution["amount"], "source_id": contribution["_id"], "created_at": when,
+                })
+        for disbursement in disbursements:
+            if disbursement["status"] == DisbursementStatus.DISBURSED.value:
+                when = disbursement["resolved_at"]
+                entries.append({
+                    "_id": object_id(LEDGER, contribution_count + int.from_bytes(disbursement["_id"].binary[5:], "big"), when),
+                    "pool_id": disbursement["pool_id"], "type": LedgerEntryType.DISBURSEMENT.value,
+                    "amount": -disbursement["amount"], "source_id": disbursement["_id"], "created_at": when,
+                })
+    return entries
+
+
+# nama koleksi -> (jumlah unit, ukuran batch dalam unit, generator)
+COLLECTIONS: Dict[str, Tuple[Callable[[DatasetSize], int], int, Callable]] = {
+    "users": (lambda size: size.users, BATCH_SIZE, _make_users),
+    "facilities": (lambda size: size.facilities, BATCH_SIZE, _make_facilities),
+    "expense_records": (lambda size: size.expenses, BATCH_SIZE, _make_expenses),
+    "pools": (lambda size: size.pools, BATCH_SIZE, _make_pools),
+    "pool_members": (lambda size: size.pools, BATCH_SIZE // MEMBERS_PER_POOL, _make_members),
+    "contributions": (lambda size: size.pools, BATCH_SIZE // (MEMBERS_PER_POOL * CONTRIBUTION_MONTHS), _make_contributions),
+    "disbursements": (lambda size: size.pools, BATCH_SIZE // (1 + HISTORIC_DISBURSEMENTS_PER_POOL), _make_disbursements),
+    "pool_ledger": (lambda size: size.pools, BATCH_SIZE // (MEMBERS_PER_POOL * CONTRIBUTION_MONTHS), _make_ledger),
+}
+
+
+def batch_ranges(name: str, size: DatasetSize) -> List[Tuple[int, int, int]]:
+    units, batch_units, _ = COLLECTIONS[name]
+    total = units(size)
+    return [(number, start, min(start + batch_units, total)) for number, start in enumerate(range(0, total, batch_units))]
+
+
+def generate_batch(name: str, size: DatasetSize, seed: int, number: int, start: int, stop: int) -> List[Dict[str, Any]]:
+    # RNG per batch: hasil identik berapa pun jumlah proses/konkurensinya.
+    rng = random.Random(f"{seed}:{name}:{number}")
+    return COLLECTIONS[name][2](start, stop, rng, size, seed)
+
+
+async def seed_async(
+    db: AsyncIOMotorDatabase,
+    size: DatasetSize,
+    seed: int,
+    concurrency: int = 4,
+    collections: Optional[Iterable[str]] = None,
+    drop: bool = True,
+) -> Dict[str, int]:
+    size.validate()
+    counts = {}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def insert(name: str, batch: List[Dict[str, Any]]) -> int:
+        try:
+            await db[name].insert_many(batch, ordered=False)
+            return len(batch)
+        finally:
+            semaphore.release()
+
+    for name in collections or COLLECTIONS:
+        if drop:
+            await db[name].drop()
+        started = time.perf_counter()
+        tasks = []
+        for number, start, stop in batch_ranges(name, size):
+            # Batch baru baru dibuat saat ada slot insert kosong agar memori tetap terbatas.
+            await semaphore.acquire()
+            tasks.append(asyncio.ensure_future(insert(name, generate_batch(name, size, seed, number, start, stop))))
+        counts[name] = sum(await asyncio.gather(*tasks))
+        logger.info("Koleksi seed diisi", extra={"collection": name, "count": counts[name],
+                                                  "seconds": round(time.perf_counter() - started, 2)})
+
+    return counts
+
+
+_process_client = None
+
+
+def _insert_batch_in_process(uri: str, db_name: str, name: str, size: DatasetSize, seed: int,
+                             number: int, start: int, stop: int) -> int:
+    global _process_client
+    if _process_client is None:
+        from pymongo import MongoClient
+
+        _process_client = MongoClient(uri)
+    batch = generate_batch(name, size, seed, number, start, stop)
+    _process_client[db_name][name].insert_many(batch, ordered=False)
+    return len(batch)
+
+
+def seed_parallel(uri: str, db_name: str, size: DatasetSize, seed: int, processes: int,
+                  collections: Optional[Iterable[str]] = None) -> Dict[str, int]:
+    # Pembuatan dokumen terikat CPU; tiap proses membuat dan meng-insert batch-nya sendiri.
+    from pymongo import MongoClient
+
+    size.validate()
+    names = list(collections or COLLECTIONS)
+    with MongoClient(uri) as client:
+        for name in names:
+            client[db_name][name].drop()
+
+    counts = dict.fromkeys(names, 0)
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = {
+            executor.submit(_insert_batch_in_process, uri, db_name, name, size, seed, number, start, stop): name
+            for name in names
+            for number, start, stop in batch_ranges(name, size)
+        }
+        for future in as_completed(futures):
+            counts[futures[future]] += future.result()
+    return counts
+
+
+async def _main(args: argparse.Namespace) -> None:
+    from app.core.db import close_mongo_connection, connect_to_mongo, get_database
+    from app.services import expense_service, facility_service, ledger_service, microfunding_service
+
+    size = DatasetSize.from_scale(args.scale)
+    for name in ("users", "expenses", "facilities", "pools"):
+        if getattr(args, name) is not None:
+            setattr(size, name, getattr(args, name))
+    size.validate()
+    logger.info("Memulai seeding", extra={"size": size.__dict__, "seed": args.seed, "processes": args.processes})
+
+    started = time.perf_counter()
+    await connect_to_mongo()
+    try:
+        db = get_database()
+        if args.processes > 1:
+            counts = await asyncio.to_thread(
+                seed_parallel, settings.MONGO_URI, settings.MONGO_DB_NAME, size, args.seed, args.processes, args.collection
+            )
+        else:
+            counts = await seed_async(db, size, args.seed, args.concurrency, args.collection)
+        # Indeks dibuat setelah bulk load karena jauh lebih cepat daripada memeliharanya per insert.
+        await expense_service.ensure_indexes(db)
+        await facility_service.ensure_indexes(db)
+        await microfunding_service.ensure_indexes(db)
+        await ledger_service.ensure_indexes(db)
+    finally:
+        await close_mongo_connection()
+
+    elapsed = time.perf_counter() - started
+    total = sum(counts.values())
+    logger.info("Seeding selesai", extra={"counts": counts, "documents": total, "seconds": round(elapsed, 1),
+                                          "documents_per_second": round(total / elapsed) if elapsed else 0})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Isi MongoDB dengan data sintetis layanan kesehatan Indonesia.")
+    parser.add_argument("--scale", type=float, default=1.0, help="Fraksi dari volume penuh (1.0 = 100k pengguna, 1M pengeluaran)")
+    parser.add_argument("--users", type=int)
+    parser.add_argument("--expenses", type=int)
+    parser.add_argument("--facilities", type=int)
+    parser.add_argument("--pools", type=int)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--processes", type=int, default=1, help="Jumlah proses pembuat+insert paralel")
+    parser.add_argument("--concurrency", type=int, default=4, help="insert_many paralel pada mode satu proses")
+    parser.add_argument("--collection", action="append", choices=list(COLLECTIONS), help="Batasi ke koleksi tertentu")
+    setup_logging()
+    asyncio.run(_main(parser.parse_args()))
\ No newline at end of file
@@ -0,0 +1,28 @@
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Optional
+from app.models.enums import ExpenseCategory
+
+class ReceiptItemExtraction(BaseModel):
+    name: str = ""
+    quantity: int = Field(1, ge=0)
+    total_price: float = Field(0, ge=0)
+    category: ExpenseCategory = ExpenseCategory.OTHER
+
+    @field_validator("category", mode="before")
+    @classmethod
+    def default_unknown_category(cls, value):
+        if value in ExpenseCategory._value2member_map_:
+            return value
+        return ExpenseCategory.OTHER
+
+class ReceiptExtraction(BaseModel):
+    items: List[ReceiptItemExtraction] = []
+    overall_total: Optional[float] = None
+    store_name: Optional[str] = None
+    transaction_date: Optional[str] = None
+
+class FacilityEnrichment(BaseModel):
+    overall_rating: Optional[float] = None
+    phone: Optional[str] = None
+    services_offered: Optional[List[str]] = None
+    image_url: Optional[str] = None
\ No newline at end of file
@@ -40,6 +40,7 @@ class ContributionStatus(str, Enum):
     PENDING = "PENDING"
     SUCCESS = "SUCCESS"
     FAILED = "FAILED"
+    REFUNDED = "REFUNDED"
     
 class ContributionPeriod(str, Enum):
     MONTHLY = "BULANAN"
@@ -64,5 +65,19 @@ class JoinRequestStatus(str, Enum):
     APPROVED = "APPROVED"
     REJECTED = "REJECTED"
 
+class JoinRequestOutcome(str, Enum):
+    APPROVED = "APPROVED"
+    REJECTED = "REJECTED"
+    ALREADY_MEMBER = "ALREADY_MEMBER"
+    POOL_FULL = "POOL_FULL"
+    ALREADY_PROCESSED = "ALREADY_PROCESSED"
+    NOT_FOUND = "NOT_FOUND"
+    FORBIDDEN = "FORBIDDEN"
+
 class ClaimApprovalSystem(str, Enum):
-    VOTING_50_PERCENT = "VOTING_50_PERCENT"
\ No newline at end of file
+    VOTING_50_PERCENT = "VOTING_50_PERCENT"
+
+class LedgerEntryType(str, Enum):
+    CONTRIBUTION = "CONTRIBUTION"
+    DISBURSEMENT = "DISBURSEMENT"
+    REVERSAL = "REVERSAL"
\ No newline at end of file
@@ -1,5 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
+from app.core.config import settings
 from app.models.common import IDModelMixin
 from app.models.enums import FacilityType
 
@@ -44,6 +45,9 @@ class FacilityPublic(IDModelMixin, FacilityBase):
     class Config:
         from_attributes = True
 
+class FacilityBatchRequest(BaseModel):
+    ids: List[str] = Field(min_length=1, max_length=settings.FACILITY_BATCH_MAX_IDS)
+
 class FacilityResponse(BaseModel):
     data: List[FacilityPublic]
     source: str
\ No newline at end of file
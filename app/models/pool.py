@@ -23,6 +23,13 @@ class JoinRequestPublic(IDModelMixin, BaseModel):
     class Config:
         from_attributes = True
 
+class JoinRequestDecision(BaseModel):
+    request_id: str
+    status: JoinRequestStatus
+
+class JoinRequestBulkUpdate(BaseModel):
+    decisions: List[JoinRequestDecision] = Field(min_length=1, max_length=500)
+
 class PoolMemberPublic(IDModelMixin, BaseModel):
     pool_id: str
     user_id: str
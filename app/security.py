@@ -4,9 +4,12 @@ from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
+from motor.motor_asyncio import AsyncIOMotorDatabase
 from passlib.context import CryptContext
 
+from app.core.cache import auth_cache
 from app.core.config import settings
+from app.core.db import get_database
 from app.models.token import TokenData
 from app.services import user_service 
 from app.models.user import UserPublic
@@ -33,30 +36,43 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme)) -> UserPublic:
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
+async def user_from_token(db: AsyncIOMotorDatabase, token: str) -> Optional[UserPublic]:
     try:
         payload = jwt.decode(
             token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM]
         )
-        email: str | None = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-        
-        token_data = TokenData(email=email)
-        
     except JWTError:
-        raise credentials_exception
-    user = await user_service.get_user_by_email(email=token_data.email)
+        return None
+    email: str | None = payload.get("sub")
+    if email is None:
+        return None
+
+    token_data = TokenData(email=email)
+
+    cached_user = await auth_cache.get(token_data.email)
+    if cached_user is not None:
+        return UserPublic(**cached_user)
+
+    user = await user_service.get_user_by_email(db, email=token_data.email)
     
     if user is None:
-        raise credentials_exception
-        
+        return None
+
+    user_data = user.model_dump(mode="json", exclude={"hashed_password"})
+    await auth_cache.set(token_data.email, user_data)
+    return UserPublic(**user_data)
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+) -> UserPublic:
+    user = await user_from_token(db, token)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return user
 
 async def get_current_active_user(current_user: UserPublic = Depends(get_current_user)) -> UserPublic:
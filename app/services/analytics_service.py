@@ -0,0 +1,139 @@
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReadPreference
+
+from app.core.cache import analytics_cache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_COLLECTION = "expense_analytics"
+UNKNOWN = "TIDAK_DIKETAHUI"
+
+# Batas atas (eksklusif) bracket pendapatan bulanan dalam rupiah.
+INCOME_BRACKETS = [(2_000_000, "<2JT"), (5_000_000, "2-5JT"), (10_000_000, "5-10JT"), (20_000_000, "10-20JT")]
+TOP_INCOME_BRACKET = ">=20JT"
+
+# dimensi publik -> field hasil $project pada pipeline
+DIMENSIONS = {"provinsi": "provinsi", "income_level": "income_bracket"}
+
+
+def _income_bracket_expression() -> Dict[str, Any]:
+    branches = [{"case": {"$eq": [{"$ifNull": ["$income_level", None]}, None]}, "then": UNKNOWN}]
+    branches += [{"case": {"$lt": ["$income_level", upper]}, "then": label} for upper, label in INCOME_BRACKETS]
+    return {"$switch": {"branches": branches, "default": TOP_INCOME_BRACKET}}
+
+
+def _group_stage(field: str, min_group_size: int) -> List[Dict[str, Any]]:
+    return [
+        {"$group": {
+            "_id": {"key": f"${field}", "category": "$spending._id"},
+            "users": {"$sum": 1},
+            "transactions": {"$sum": "$spending.transactions"},
+            "total_spent": {"$sum": "$spending.spent"},
+            "per_user": {"$percentile": {"input": "$spending.spent", "p": [0.5, 0.9], "method": "approximate"}},
+        }},
+        # Grup kecil disembunyikan agar pengguna individu tidak dapat dikenali.
+        {"$match": {"users": {"$gte": min_group_size}}},
+        {"$sort": {"_id.key": 1, "_id.category": 1}},
+    ]
+
+
+def build_pipeline(since: datetime, min_group_size: int) -> List[Dict[str, Any]]:
+    return [
+        {"$match": {"persetujuanAnalisisData": True}},
+        {"$project": {
+            "uid": {"$toString": "$_id"},
+            "provinsi": {"$ifNull": ["$provinsi", UNKNOWN]},
+            "income_bracket": _income_bracket_expression(),
+        }},
+        # Pengeluaran diringkas per pengguna per kategori di dalam $lookup (memakai indeks user_id+transaction_date)
+        # sehingga median dihitung atas total per pengguna, bukan per transaksi.
+        {"$lookup": {
+            "from": "expense_records",
+            "localField": "uid",
+            "foreignField": "user_id",
+            "pipeline": [
+                {"$match": {"transaction_date": {"$gte": since}}},
+                {"$group": {"_id": "$category", "spent": {"$sum": "$total_price"}, "transactions": {"$sum": 1}}},
+            ],
+            "as": "spending",
+        }},
+        {"$unwind": "$spending"},
+        {"$facet": {dimension: _group_stage(field, min_group_size) for dimension, field in DIMENSIONS.items()}},
+    ]
+
+
+def _compact_group(row: Dict[str, Any]) -> Dict[str, Any]:
+    median, p90 = row["per_user"]
+    return {
+        "key": row["_id"]["key"],
+        "category": row["_id"]["category"],
+        "users": row["users"],
+        "transactions": row["transactions"],
+        "total_spent": round(row["total_spent"], 2),
+        "avg_per_user": round(row["total_spent"] / row["users"], 2),
+        "median_per_user": round(median, 2),
+        "p90_per_user": round(p90, 2),
+    }
+
+
+async def refresh_expense_analytics(
+    db: AsyncIOMotorDatabase,
+    window_days: int = None,
+    min_group_size: int = None,
+) -> Dict[str, Any]:
+    window_days = window_days or settings.ANALYTICS_WINDOW_DAYS
+    min_group_size = min_group_size or settings.ANALYTICS_MIN_GROUP_SIZE
+    generated_at = datetime.utcnow()
+    started = time.perf_counter()
+
+    # Agregasi berat dijalankan di secondary agar tidak membebani primary.
+    users = db.get_collection("users", read_preference=ReadPreference.SECONDARY_PREFERRED)
+    pipeline = build_pipeline(generated_at - timedelta(days=window_days), min_group_size)
+    result = await users.aggregate(pipeline, allowDiskUse=True).to_list(length=1)
+    facets = result[0] if result else {}
+
+    groups_per_dimension = {}
+    for dimension in DIMENSIONS:
+        groups = [_compact_group(row) for row in facets.get(dimension, [])]
+        await db[ANALYTICS_COLLECTION].replace_one(
+            {"_id": dimension},
+            {
+                "_id": dimension,
+                "dimension": dimension,
+                "generated_at": generated_at,
+                "window_days": window_days,
+                "min_group_size": min_group_size,
+                "groups": groups,
+            },
+            upsert=True,
+        )
+        await analytics_cache.delete(dimension)
+        groups_per_dimension[dimension] = len(groups)
+
+    report = {"groups": groups_per_dimension, "seconds": round(time.perf_counter() - started, 2)}
+    logger.info("Analitik pengeluaran diperbarui", extra=report)
+    return report
+
+
+async def get_expense_analytics(
+    db: AsyncIOMotorDatabase,
+    dimension: str,
+    category: Optional[str] = None,
+) -> Optional[Dict[str, Any]]:
+    analytics = await analytics_cache.get(dimension)
+    if analytics is None:
+        document = await db[ANALYTICS_COLLECTION].find_one({"_id": dimension}, {"_id": 0})
+        if document is None:
+            return None
+        analytics = {**document, "generated_at": document["generated_at"].isoformat()}
+        await analytics_cache.set(dimension, analytics)
+
+    if category:
+        analytics = {**analytics, "groups": [group for group in analytics["groups"] if group["category"] == category]}
+    return analytics
@@ -0,0 +1,217 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from app.core.config import settings
+from app.models.enums import ContributionPeriod, ContributionStatus, PoolStatus
+from app.models.user import UserPublic
+from app.services import payment_service
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY = 11000
+USER_GATEWAY_PROJECTION = {"name": 1, "email": 1, "phone": 1}
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase) -> None:
+    # Idempotensi billing: satu tagihan per (pool, anggota, periode). Kontribusi manual tanpa
+    # billing_period tidak terkena indeks ini.
+    await db["contributions"].create_index(
+        [("pool_id", ASCENDING), ("member_id", ASCENDING), ("billing_period", ASCENDING)],
+        unique=True,
+        partialFilterExpression={"billing_period": {"$exists": True}},
+        name="billing_period_unique",
+    )
+    await db["contributions"].create_index(
+        [("billing_period", ASCENDING), ("payment_gateway_reference_id", ASCENDING)],
+        partialFilterExpression={"billing_period": {"$exists": True}},
+        name="billing_pending_token",
+    )
+
+
+def billing_period(period: ContributionPeriod, at: datetime) -> Tuple[str, datetime, datetime]:
+    if period == ContributionPeriod.WEEKLY:
+        year, week, weekday = at.isocalendar()
+        start = datetime(at.year, at.month, at.day) - timedelta(days=weekday - 1)
+        return f"{year}-W{week:02d}", start, start + timedelta(days=7)
+    if period == ContributionPeriod.ANNUALLY:
+        return f"{at.year}", datetime(at.year, 1, 1), datetime(at.year + 1, 1, 1)
+    start = datetime(at.year, at.month, 1)
+    end = datetime(at.year + (at.month == 12), at.month % 12 + 1, 1)
+    return f"{at.year}-{at.month:02d}", start, end
+
+
+async def _iter_pool_members(
+    db: AsyncIOMotorDatabase, periods: Iterable[ContributionPeriod], batch_size: int
+):
+    pool_filter = {
+        "status": PoolStatus.OPEN,
+        "contribution_period": {"$in": [period.value for period in periods]},
+        "contribution_amount_per_member": {"$gt": 0},
+    }
+    projection = {"contribution_period": 1, "contribution_amount_per_member": 1}
+    pools: List[Dict[str, Any]] = []
+
+    async def members_of(batch: List[Dict[str, Any]]):
+        by_id = {pool["_id"]: pool for pool in batch}
+        cursor = db["pool_members"].find({"pool_id": {"$in": list(by_id)}}, {"pool_id": 1, "user_id": 1})
+        async for member in cursor.batch_size(batch_size):
+            yield by_id[member["pool_id"]], member["user_id"]
+
+    async for pool in db["pools"].find(pool_filter, projection).batch_size(batch_size):
+        pools.append(pool)
+        if len(pools) >= max(1, batch_size // 10):
+            async for item in members_of(pools):
+                yield item
+            pools = []
+    if pools:
+        async for item in members_of(pools):
+            yield item
+
+
+async def _insert_dues(db: AsyncIOMotorDatabase, dues: List[Dict[str, Any]]) -> int:
+    try:
+        result = await db["contributions"].insert_many(dues, ordered=False)
+        return len(result.inserted_ids)
+    except BulkWriteError as error:
+        unexpected = [item for item in error.details.get("writeErrors", []) if item.get("code") != DUPLICATE_KEY]
+        if unexpected:
+            raise
+        return error.details.get("nInserted", 0)
+
+
+async def generate_dues(
+    db: AsyncIOMotorDatabase, at: datetime, periods: Iterable[ContributionPeriod], batch_size: int
+) -> Dict[str, Any]:
+    now = datetime.utcnow()
+    periods = list(periods)
+    keys = {period: billing_period(period, at) for period in periods}
+    scanned = inserted = 0
+    batch: List[Dict[str, Any]] = []
+
+    async for pool, user_id in _iter_pool_members(db, periods, batch_size):
+        period_key, start, end = keys[ContributionPeriod(pool["contribution_period"])]
+        batch.append({
+            "_id": ObjectId(),
+            "pool_id": pool["_id"],
+            "member_id": user_id,
+            "amount": float(pool["contribution_amount_per_member"]),
+            "billing_period": period_key,
+            "period_start": start,
+            "due_date": end,
+            "contribution_date": now,
+            "status": ContributionStatus.PENDING,
+            "source": "BILLING",
+        })
+        scanned += 1
+        if len(batch) >= batch_size:
+            inserted += await _insert_dues(db, batch)
+            batch = []
+    if batch:
+        inserted += await _insert_dues(db, batch)
+
+    return {
+        "period_keys": sorted({key for key, _, _ in keys.values()}),
+        "members_scanned": scanned,
+        "dues_created": inserted,
+        "dues_existing": scanned - inserted,
+    }
+
+
+async def tokenize_dues(
+    db: AsyncIOMotorDatabase, period_keys: List[str], batch_size: int, concurrency: int
+) -> Dict[str, int]:
+    # Tagihan tanpa token (baru, atau gagal pada run sebelumnya) diambil ulang sehingga run bisa diulang dengan aman.
+    dues_filter = {
+        "billing_period": {"$in": period_keys},
+        "payment_gateway_reference_id": {"$exists": False},
+        "status": ContributionStatus.PENDING,
+    }
+    semaphore = asyncio.Semaphore(concurrency)
+    created = failed = 0
+    last_id: Optional[ObjectId] = None
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=30.0) as client:
+        async def tokenize(due: Dict[str, Any], user: UserPublic) -> Optional[UpdateOne]:
+            # Midtrans menolak order_id yang sudah pernah dipakai, termasuk transaksi yang berhasil dibuat
+            # tetapi tokennya tidak sempat disimpan. Percobaan ke-2 dst. memakai sufiks agar run ulang tidak ditolak.
+            attempt = due.get("gateway_attempts", 0) + 1
+            order_id = str(due["_id"]) if attempt == 1 else f"{due['_id']}-{attempt}"
+            async with semaphore:
+                try:
+                    midtrans_data = await payment_service.create_midtrans_snap_transaction(
+                        order_id, due["amount"], user, client=client
+                    )
+                except Exception as error:
+                    logger.warning("Token pembayaran tagihan gagal dibuat", extra={"contribution_id": str(due["_id"]), "order_id": order_id, "error": str(error)})
+                    return None
+            return UpdateOne(
+                {"_id": due["_id"]},
+                {"$set": {"payment_gateway_reference_id": midtrans_data["token"], "payment_order_id": order_id}},
+            )
+
+        while True:
+            page_filter = dict(dues_filter, **({"_id": {"$gt": last_id}} if last_id else {}))
+            dues = await db["contributions"].find(page_filter, {"amount": 1, "member_id": 1, "gateway_attempts": 1}) \
+                .sort("_id", ASCENDING).limit(batch_size).to_list(length=batch_size)
+            if not dues:
+                break
+            last_id = dues[-1]["_id"]
+            # Nomor percobaan dicatat sebelum memanggil gateway sehingga tetap maju walau proses mati di tengah batch.
+            await db["contributions"].update_many(
+                {"_id": {"$in": [due["_id"] for due in dues]}}, {"$inc": {"gateway_attempts": 1}}
+            )
+
+            member_ids = list({due["member_id"] for due in dues})
+            users = {
+                user["_id"]: UserPublic(**{**user, "_id": str(user["_id"])})
+                async for user in db["users"].find({"_id": {"$in": member_ids}}, USER_GATEWAY_PROJECTION)
+            }
+            results = await asyncio.gather(*(
+                tokenize(due, users[due["member_id"]]) for due in dues if due["member_id"] in users
+            ))
+            operations = [operation for operation in results if operation is not None]
+            if operations:
+                await db["contributions"].bulk_write(operations, ordered=False)
+            created += len(operations)
+            failed += len(dues) - len(operations)
+
+    return {"tokens_created": created, "tokens_failed": failed}
+
+
+async def run_billing(
+    db: AsyncIOMotorDatabase,
+    at: Optional[datetime] = None,
+    periods: Optional[Iterable[ContributionPeriod]] = None,
+    batch_size: int = None,
+    concurrency: int = None,
+    create_tokens: bool = True,
+) -> Dict[str, Any]:
+    at = at or datetime.utcnow()
+    batch_size = batch_size or settings.BILLING_BATCH_SIZE
+    concurrency = concurrency or settings.BILLING_GATEWAY_CONCURRENCY
+    await ensure_indexes(db)
+
+    started = time.perf_counter()
+    report = await generate_dues(db, at, periods or list(ContributionPeriod), batch_size)
+    generated_at = time.perf_counter()
+    report["generate_seconds"] = round(generated_at - started, 2)
+    report["dues_per_second"] = round(report["members_scanned"] / (generated_at - started)) if generated_at > started else 0
+
+    if create_tokens:
+        report.update(await tokenize_dues(db, report["period_keys"], batch_size, concurrency))
+        tokenized_at = time.perf_counter()
+        report["token_seconds"] = round(tokenized_at - generated_at, 2)
+        report["tokens_per_second"] = round(report["tokens_created"] / (tokenized_at - generated_at)) if tokenized_at > generated_at else 0
+
+    report["seconds"] = round(time.perf_counter() - started, 2)
+    return report
\ No newline at end of file
@@ -0,0 +1,101 @@
+import json
+import logging
+from typing import Any, AsyncIterator, Dict, Optional
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core.config import settings
+from app.core.invalidation import InvalidationEvent, invalidation_bus
+from app.core.pubsub import RESYNC, PubSub
+from app.models.enums import DisbursementStatus
+
+logger = logging.getLogger(__name__)
+
+TALLY_FIELDS = ["pool_id", "status", "votes_for", "votes_against", "amount"]
+SNAPSHOT_PROJECTION = {field: 1 for field in TALLY_FIELDS + ["purpose", "request_date", "recipient_user_id"]}
+
+disbursement_hub = PubSub()
+
+
+def _frame(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str, separators=(',', ':'))}\n\n"
+
+
+def _tally(document_id: Any, document: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "disbursementId": str(document_id),
+        "poolId": str(document.get("pool_id")),
+        "status": document.get("status"),
+        "votesFor": document.get("votes_for", 0),
+        "votesAgainst": document.get("votes_against", 0),
+    }
+
+
+def change_message(
+    operation: str, document_id: Any, updated_fields: Dict[str, Any], after: Dict[str, Any]
+) -> Optional[Dict[str, Any]]:
+    if not after.get("pool_id"):
+        return None
+    data = _tally(document_id, after)
+    if operation == "insert":
+        return {"event": "created", "data": {**data, "amount": after.get("amount")}}
+    # Perubahan status dibaca dari updatedFields milik event itu sendiri, jadi tidak bergantung pada
+    # pre-image (changeStreamPreAndPostImages). Jumlah suara dikirim absolut; klien tidak perlu delta.
+    if "status" in updated_fields:
+        return {"event": "status", "data": data}
+    return {"event": "tally", "data": data}
+
+
+def publish_change(operation: str, document_id: Any, updated_fields: Dict[str, Any], after: Dict[str, Any]) -> int:
+    message = change_message(operation, document_id, updated_fields, after)
+    if message is None:
+        return 0
+    return disbursement_hub.publish(message["data"]["poolId"], message)
+
+
+def publish_local(operation: str, document_id: Any, updated_fields: Dict[str, Any], after: Dict[str, Any]) -> None:
+    # Jalur tulis hanya mem-publish sendiri bila bus change stream tidak aktif (mis. MongoDB standalone);
+    # jika aktif, bus yang menyebarkan event ke semua worker dan publish di sini akan menggandakannya.
+    if not invalidation_bus.running:
+        publish_change(operation, document_id, updated_fields, after)
+
+
+async def _on_disbursement_change(event: InvalidationEvent) -> None:
+    if event.operation != "delete":
+        publish_change(event.operation, event.document_id, event.updated_fields, event.after)
+
+
+async def _snapshot(db: AsyncIOMotorDatabase, pool_id: str) -> str:
+    cursor = db["disbursements"].find(
+        {"pool_id": ObjectId(pool_id), "status": DisbursementStatus.PENDING_VOTE}, SNAPSHOT_PROJECTION
+    )
+    disbursements = [
+        {**_tally(doc["_id"], doc), "amount": doc.get("amount"), "purpose": doc.get("purpose"), "requestDate": doc.get("request_date")}
+        async for doc in cursor
+    ]
+    return _frame("snapshot", {"poolId": pool_id, "disbursements": disbursements})
+
+
+async def stream(db: AsyncIOMotorDatabase, pool_id: str) -> AsyncIterator[str]:
+    yield f"retry: {int(settings.SSE_HEARTBEAT_SECONDS * 1000)}\n\n"
+    # Subscribe dilakukan di dalam generator (dilepas di finally) dan sebelum snapshot
+    # sehingga tidak ada event yang jatuh di antaranya.
+    subscription = disbursement_hub.subscribe(pool_id)
+    if subscription is None:
+        return
+    try:
+        yield await _snapshot(db, pool_id)
+        while True:
+            message = await subscription.get(settings.SSE_HEARTBEAT_SECONDS)
+            if message is None:
+                yield ": keep-alive\n\n"
+            elif message is RESYNC:
+                yield await _snapshot(db, pool_id)
+            else:
+                yield _frame(message["event"], message["data"])
+    finally:
+        disbursement_hub.unsubscribe(subscription)
+
+
+invalidation_bus.register("disbursements", _on_disbursement_change, fields=TALLY_FIELDS)
\ No newline at end of file
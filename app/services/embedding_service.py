@@ -0,0 +1,85 @@
+import hashlib
+import re
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.gemini_governor import CallType, Priority, gemini_governor
+
+TOKEN_PATTERN = re.compile(r"[0-9a-zA-Z]+")
+
+
+class Encoder(ABC):
+    name: str = "base"
+    dimension: int
+
+    @abstractmethod
+    async def encode(self, texts: List[str], query: bool = False, priority: Optional[Priority] = None) -> np.ndarray:
+        ...
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32, copy=False)
+
+
+class HashingEncoder(Encoder):
+    # Encoder lokal deterministik (feature hashing unigram + bigram), cukup
+    # untuk pencarian offline dan pengujian tanpa akses ke model embedding.
+    name = "hashing"
+
+    def __init__(self, dimension: int = None):
+        self.dimension = dimension or settings.FACILITY_EMBEDDING_DIMENSION
+
+    def _features(self, text: str) -> List[str]:
+        tokens = [token.lower() for token in TOKEN_PATTERN.findall(text)]
+        return tokens + [f"{left}_{right}" for left, right in zip(tokens, tokens[1:])]
+
+    def _encode_one(self, text: str, row: np.ndarray) -> None:
+        for feature in self._features(text):
+            digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            row[value % self.dimension] += 1.0 if (value >> 63) & 1 else -1.0
+
+    async def encode(self, texts: List[str], query: bool = False, priority: Optional[Priority] = None) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for index, text in enumerate(texts):
+            self._encode_one(text, matrix[index])
+        return _normalize(matrix)
+
+
+class GeminiEncoder(Encoder):
+    name = "gemini"
+    batch_size = 100
+
+    def __init__(self, model: str = "models/text-embedding-004", dimension: int = None):
+        self.model = model
+        self.dimension = dimension or 768
+
+    async def encode(self, texts: List[str], query: bool = False, priority: Optional[Priority] = None) -> np.ndarray:
+        import google.generativeai as genai
+
+        rows = []
+        task_type = "retrieval_query" if query else "retrieval_document"
+        for start in range(0, len(texts), self.batch_size):
+            batch = texts[start:start + self.batch_size]
+            result = await gemini_governor.call(
+                CallType.FACILITY_EMBEDDING,
+                batch,
+                lambda: genai.embed_content_async(model=self.model, content=batch, task_type=task_type),
+                priority=priority,
+            )
+            rows.extend(result["embedding"])
+        return _normalize(np.asarray(rows, dtype=np.float32).reshape(len(texts), self.dimension))
+
+
+def get_encoder(name: str = None, dimension: int = None) -> Encoder:
+    name = name or settings.FACILITY_EMBEDDING_ENCODER
+    if name == GeminiEncoder.name:
+        return GeminiEncoder(dimension=dimension)
+    if name == HashingEncoder.name:
+        return HashingEncoder(dimension=dimension)
+    raise ValueError(f"Encoder embedding tidak dikenal: {name}")
@@ -1,57 +1,237 @@
 from typing import List, Dict, Any, Optional
-from motor.motor_asyncio import AsyncIOMotorDatabase
-from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClientSession, AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING
+from bson import Binary, ObjectId
 from datetime import datetime, timedelta
 import math
 
+from app.core.db import run_in_transaction
 from app.models.expense import ExpenseRecordCreate, ExpenseRecordPublic, ReceiptCreate, ReceiptPublic
-from app.models.enums import ExpenseCategory
+from app.models.enums import ExpenseCategory, ReceiptStatus
 
-async def create_expenses_from_receipt(
-    db: AsyncIOMotorDatabase, 
-    user_id: str, 
-    receipt_data: Dict[str, Any]
+SORTABLE_FIELDS = {"transaction_date", "total_price", "createdAt", "category"}
+SUMMARY_PERIODS = {"weekly": 7, "monthly": 30, "yearly": 365}
+
+async def ensure_indexes(db: AsyncIOMotorDatabase) -> None:
+    await db.receipts.create_index([("user_id", ASCENDING), ("content_hash", ASCENDING)])
+    await db.receipts.create_index([("status", ASCENDING), ("upload_date", ASCENDING)])
+    await db.expense_records.create_index([("user_id", ASCENDING), ("transaction_date", DESCENDING)])
+
+async def _insert_receipt_expenses(
+    db: AsyncIOMotorDatabase,
+    user_id: str,
+    receipt_id: str,
+    receipt_data: Dict[str, Any],
+    session: Optional[AsyncIOMotorClientSession] = None
 ) -> List[ExpenseRecordPublic]:
-    created_expenses = []
-    
-    receipt_doc = {
-        "user_id": user_id,
-        "upload_date": datetime.utcnow(),
-        "image_url": receipt_data.get("image_url", ""),
-        "status": "PROCESSED",
-        "ocr_raw_text": receipt_data.get("raw_text", "")
-    }
-    
-    receipt_result = await db.receipts.insert_one(receipt_doc)
-    receipt_id = str(receipt_result.inserted_id)
-    
     items = receipt_data.get("items", [])
-    facility_name = receipt_data.get("facility_name", "")
+    facility_name = receipt_data.get("store_name") or ""
     transaction_date = receipt_data.get("transaction_date")
     
+    expense_docs = []
     for item in items:
-        expense_data = {
+        expense_docs.append({
             "user_id": user_id,
             "medicine_name": item.get("name", ""),
             "facility_name": facility_name,
             "category": item.get("category", ExpenseCategory.OTHER),
             "transaction_date": datetime.fromisoformat(transaction_date) if transaction_date else datetime.utcnow(),
-            "total_price": float(item.get("price", 0)),
+            "total_price": float(item.get("total_price") or 0),
             "receipt_id": receipt_id,
             "createdAt": datetime.utcnow(),
             "updatedAt": datetime.utcnow()
-        }
-        
-        result = await db.expense_records.insert_one(expense_data)
-        expense_data["_id"] = str(result.inserted_id)
+        })
+    
+    if not expense_docs:
+        return []
+
+    result = await db.expense_records.insert_many(expense_docs, session=session)
+    created_expenses = []
+    for expense_data, inserted_id in zip(expense_docs, result.inserted_ids):
+        expense_data["_id"] = str(inserted_id)
         created_expenses.append(ExpenseRecordPublic(**expense_data))
     
     return created_expenses
 
+async def create_expenses_from_receipt(
+    db: AsyncIOMotorDatabase, 
+    user_id: str, 
+    receipt_data: Dict[str, Any],
+    content_hash: Optional[str] = None,
+    perceptual_hash: Optional[str] = None
+) -> List[ExpenseRecordPublic]:
+    receipt_doc = {
+        "user_id": user_id,
+        "upload_date": datetime.utcnow(),
+        "image_url": receipt_data.get("image_url", ""),
+        "status": ReceiptStatus.PROCESSED,
+        "ocr_raw_text": receipt_data.get("raw_text", ""),
+        "content_hash": content_hash,
+        "perceptual_hash": perceptual_hash
+    }
+    
+    receipt_result = await db.receipts.insert_one(receipt_doc)
+    receipt_id = str(receipt_result.inserted_id)
+    return await _insert_receipt_expenses(db, user_id, receipt_id, receipt_data)
+
+async def create_pending_receipt(
+    db: AsyncIOMotorDatabase,
+    user_id: str,
+    image_data: bytes,
+    mime_type: str,
+    content_hash: Optional[str] = None,
+    perceptual_hash: Optional[str] = None
+) -> str:
+    receipt_doc = {
+        "user_id": user_id,
+        "upload_date": datetime.utcnow(),
+        "image_url": "",
+        "status": ReceiptStatus.PENDING,
+        "content_hash": content_hash,
+        "perceptual_hash": perceptual_hash,
+        "image_data": Binary(image_data),
+        "image_mime_type": mime_type,
+        "attempts": 0
+    }
+    result = await db.receipts.insert_one(receipt_doc)
+    return str(result.inserted_id)
+
+def _claimed_receipt(receipt_id: str, claim_token: str) -> Dict[str, Any]:
+    # Hanya pemegang lease yang boleh menulis; worker yang lease-nya sudah kedaluwarsa dan diambil alih
+    # worker lain tidak cocok lagi dengan filter ini.
+    return {"_id": ObjectId(receipt_id), "status": ReceiptStatus.PENDING, "claim_token": claim_token}
+
+async def complete_pending_receipt(
+    db: AsyncIOMotorDatabase,
+    receipt_id: str,
+    user_id: str,
+    receipt_data: Dict[str, Any],
+    claim_token: str
+) -> Optional[List[ExpenseRecordPublic]]:
+    async def complete(session: Optional[AsyncIOMotorClientSession]) -> Optional[List[ExpenseRecordPublic]]:
+        # Status dipindah lebih dulu agar expense tidak pernah tertulis dua kali untuk struk yang sama.
+        result = await db.receipts.update_one(
+            _claimed_receipt(receipt_id, claim_token),
+            {
+                "$set": {"status": ReceiptStatus.PROCESSED, "ocr_raw_text": receipt_data.get("raw_text", "")},
+                "$unset": {"image_data": "", "claimed_until": "", "claim_token": ""}
+            },
+            session=session
+        )
+        if result.matched_count == 0:
+            return None
+        return await _insert_receipt_expenses(db, user_id, receipt_id, receipt_data, session=session)
+
+    return await run_in_transaction(db, complete)
+
+async def fail_pending_receipt(db: AsyncIOMotorDatabase, receipt_id: str, claim_token: str, error: str) -> bool:
+    result = await db.receipts.update_one(
+        _claimed_receipt(receipt_id, claim_token),
+        {
+            "$set": {"status": ReceiptStatus.FAILED, "processing_error": error},
+            "$unset": {"image_data": "", "claimed_until": "", "claim_token": ""}
+        }
+    )
+    return result.matched_count > 0
+
+async def release_pending_receipt(db: AsyncIOMotorDatabase, receipt_id: str, claim_token: str, retry_at: datetime) -> bool:
+    result = await db.receipts.update_one(
+        _claimed_receipt(receipt_id, claim_token),
+        {"$set": {"claimed_until": retry_at}, "$unset": {"claim_token": ""}}
+    )
+    return result.matched_count > 0
+
+async def get_receipt_with_expenses(
+    db: AsyncIOMotorDatabase,
+    user_id: str,
+    receipt_id: str
+) -> Optional[Dict[str, Any]]:
+    if not ObjectId.is_valid(receipt_id):
+        return None
+    receipt = await db.receipts.find_one(
+        {"_id": ObjectId(receipt_id), "user_id": user_id},
+        {"image_data": 0}
+    )
+    if not receipt:
+        return None
+
+    receipt["_id"] = str(receipt["_id"])
+    expenses = []
+    if receipt["status"] == ReceiptStatus.PROCESSED:
+        async for doc in db.expense_records.find({"user_id": user_id, "receipt_id": receipt_id}):
+            doc["_id"] = str(doc["_id"])
+            expenses.append(ExpenseRecordPublic(**doc))
+    return {"receipt": ReceiptPublic(**receipt), "expenses": expenses}
+
+async def get_expenses_for_duplicate_receipt(
+    db: AsyncIOMotorDatabase,
+    user_id: str,
+    content_hash: str
+) -> Optional[Dict[str, Any]]:
+    receipt = await db.receipts.find_one(
+        {"user_id": user_id, "content_hash": content_hash, "status": ReceiptStatus.PROCESSED},
+        {"_id": 1}
+    )
+    if not receipt:
+        return None
+
+    receipt_id = str(receipt["_id"])
+    expenses = []
+    async for doc in db.expense_records.find({"user_id": user_id, "receipt_id": receipt_id}):
+        doc["_id"] = str(doc["_id"])
+        expenses.append(ExpenseRecordPublic(**doc))
+    return {"receipt_id": receipt_id, "expenses": expenses}
+
 async def get_all(
     db: AsyncIOMotorDatabase, 
     user_id: str, 
     params: Dict[str, Any]
 ) -> Dict[str, Any]:
-    page = params.get("page", 1)
-    limit = params.get("limit", 10)
\ No newline at end of file
+    page = max(params.get("page", 1), 1)
+    limit = min(max(params.get("limit", 10), 1), 100)
+    sort_by = params.get("sortBy", "transaction_date")
+    if sort_by not in SORTABLE_FIELDS:
+        sort_by = "transaction_date"
+    sort_order = ASCENDING if params.get("sortOrder") == "asc" else DESCENDING
+
+    query = {"user_id": user_id}
+    total = await db.expense_records.count_documents(query)
+    cursor = db.expense_records.find(query).sort(sort_by, sort_order).skip((page - 1) * limit).limit(limit)
+
+    expenses = []
+    async for doc in cursor:
+        doc["_id"] = str(doc["_id"])
+        expenses.append(ExpenseRecordPublic(**doc))
+
+    return {
+        "success": True,
+        "data": expenses,
+        "pagination": {
+            "page": page,
+            "limit": limit,
+            "total": total,
+            "totalPages": math.ceil(total / limit) if total else 0
+        }
+    }
+
+async def get_summary(db: AsyncIOMotorDatabase, user_id: str, period: str) -> Dict[str, Any]:
+    start_date = datetime.utcnow() - timedelta(days=SUMMARY_PERIODS[period])
+    pipeline = [
+        {"$match": {"user_id": user_id, "transaction_date": {"$gte": start_date}}},
+        {"$group": {"_id": "$category", "total": {"$sum": "$total_price"}, "count": {"$sum": 1}}}
+    ]
+    by_category = {}
+    total_spent = 0.0
+    transaction_count = 0
+    async for row in db.expense_records.aggregate(pipeline):
+        by_category[row["_id"]] = row["total"]
+        total_spent += row["total"]
+        transaction_count += row["count"]
+
+    return {
+        "period": period,
+        "start_date": start_date,
+        "total_spent": total_spent,
+        "transaction_count": transaction_count,
+        "by_category": by_category
+    }
\ No newline at end of file
@@ -1,8 +1,30 @@
+import asyncio
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
-from typing import List, Dict, Any, Optional
+from pymongo import ASCENDING, GEOSPHERE, TEXT
+from typing import List, Dict, Any, Optional, Tuple
 
+from app.core.cache import LocalLRUCache, facility_cache
+from app.core.config import settings
+from app.core.invalidation import InvalidationEvent, invalidation_bus
 from app.models.facility import FacilityPublic
+from app.services import gemini_service
+from app.services.facility_vector_index import facility_vector_index, semantic_search
+
+TEXT_CANDIDATE_POOL = 200
+
+# L1 per proses di depan cache bersama: hit tidak perlu membangun ulang FacilityPublic.
+# Nilai None = id tidak ada (cache negatif, TTL lebih pendek).
+facility_local_cache = LocalLRUCache(maxsize=settings.FACILITY_LOCAL_CACHE_SIZE)
+
+async def ensure_indexes(db: AsyncIOMotorDatabase) -> None:
+    await db["facilities"].create_index([("location", GEOSPHERE)])
+    await db["facilities"].create_index(
+        [("name", TEXT), ("address", TEXT), ("services_offered", TEXT)],
+        weights={"name": 10, "services_offered": 5, "address": 2},
+        default_language="none",
+        name="facility_text_search"
+    )
 
 def fix_facility_id(facility_doc):
     if facility_doc and "_id" in facility_doc:
@@ -43,8 +65,231 @@ async def get_nearby_facilities(db: AsyncIOMotorDatabase, preferences: Dict[str,
 async def get_facility_by_id(db: AsyncIOMotorDatabase, facility_id: str) -> Optional[FacilityPublic]:
     if not ObjectId.is_valid(facility_id):
         return None
+
+    hit, facility = facility_local_cache.get_nowait(facility_id)
+    if hit:
+        return facility
+
+    cached_facility = await facility_cache.get(f"id:{facility_id}")
+    if cached_facility is not None:
+        facility = FacilityPublic(**cached_facility)
+        facility_local_cache.set_nowait(facility_id, facility, settings.FACILITY_CACHE_TTL_SECONDS)
+        return facility
         
     facility_doc = await db["facilities"].find_one({"_id": ObjectId(facility_id)})
     if facility_doc:
-        return FacilityPublic(**fix_facility_id(facility_doc))
-    return None
\ No newline at end of file
+        facility = FacilityPublic(**fix_facility_id(facility_doc))
+        await facility_cache.set(f"id:{facility_id}", facility.model_dump(mode="json"))
+        facility_local_cache.set_nowait(facility_id, facility, settings.FACILITY_CACHE_TTL_SECONDS)
+        return facility
+    facility_local_cache.set_nowait(facility_id, None, settings.FACILITY_NEGATIVE_CACHE_TTL_SECONDS)
+    return None
+
+async def get_facilities_by_ids(db: AsyncIOMotorDatabase, facility_ids: List[str]) -> List[Optional[FacilityPublic]]:
+    results: Dict[str, Optional[FacilityPublic]] = {}
+    misses: List[str] = []
+    for facility_id in dict.fromkeys(facility_ids):
+        if not ObjectId.is_valid(facility_id):
+            results[facility_id] = None
+            continue
+        hit, facility = facility_local_cache.get_nowait(facility_id)
+        if hit:
+            results[facility_id] = facility
+        else:
+            misses.append(facility_id)
+
+    if misses:
+        # Urutan sama dengan get_facility_by_id: cache bersama dulu (paralel di atas pool koneksi),
+        # lalu hanya id yang masih hilang yang diambil dengan satu $in.
+        shared = await asyncio.gather(*(facility_cache.get(f"id:{facility_id}") for facility_id in misses))
+        missing: List[str] = []
+        for facility_id, cached_facility in zip(misses, shared):
+            if cached_facility is None:
+                missing.append(facility_id)
+                continue
+            facility = FacilityPublic(**cached_facility)
+            facility_local_cache.set_nowait(facility_id, facility, settings.FACILITY_CACHE_TTL_SECONDS)
+            results[facility_id] = facility
+        misses = missing
+
+    if misses:
+        cursor = db["facilities"].find({"_id": {"$in": [ObjectId(facility_id) for facility_id in misses]}})
+        found = {str(doc["_id"]): FacilityPublic(**fix_facility_id(doc)) async for doc in cursor}
+        await asyncio.gather(*(
+            facility_cache.set(f"id:{facility_id}", facility.model_dump(mode="json")) for facility_id, facility in found.items()
+        ))
+        for facility_id in misses:
+            facility = found.get(facility_id)
+            ttl = settings.FACILITY_CACHE_TTL_SECONDS if facility else settings.FACILITY_NEGATIVE_CACHE_TTL_SECONDS
+            facility_local_cache.set_nowait(facility_id, facility, ttl)
+            results[facility_id] = facility
+
+    return [results[facility_id] for facility_id in facility_ids]
+
+def _with_distance(facility_doc: Dict[str, Any]) -> Dict[str, Any]:
+    distance_meters = facility_doc.pop("distanceMeters", None)
+    if distance_meters is not None:
+        facility_doc["distanceKm"] = round(distance_meters / 1000, 2)
+        facility_doc["distanceText"] = f"{facility_doc['distanceKm']} km"
+    return facility_doc
+
+async def search_local_candidates(
+    db: AsyncIOMotorDatabase,
+    query: str,
+    latitude: float,
+    longitude: float,
+    limit: int = None,
+    max_distance_km: int = None
+) -> List[Dict[str, Any]]:
+    limit = limit or settings.FACILITY_SEARCH_CANDIDATES
+    max_distance_km = max_distance_km or settings.FACILITY_SEARCH_MAX_DISTANCE_KM
+
+    text_scores: Dict[ObjectId, float] = {}
+    cursor = db["facilities"].find(
+        {"$text": {"$search": query}},
+        {"score": {"$meta": "textScore"}}
+    ).sort([("score", {"$meta": "textScore"})]).limit(TEXT_CANDIDATE_POOL)
+    async for doc in cursor:
+        text_scores[doc["_id"]] = doc["score"]
+
+    # Kemiripan di bawah ambang dianggap noise; tanpa ambang, top-K vektor selalu ikut menjadi kandidat
+    # walaupun tidak relevan sama sekali dengan query.
+    semantic_scores: Dict[ObjectId, float] = {
+        ObjectId(facility_id): score
+        for facility_id, score in await facility_vector_index.search(query, TEXT_CANDIDATE_POOL)
+        if score >= settings.FACILITY_SEMANTIC_MIN_SCORE
+    }
+    candidate_ids = set(text_scores) | set(semantic_scores)
+
+    # $text dan $geoNear tidak bisa digabung dalam satu pipeline, jadi hasil
+    # teks dibatasi lebih dulu lalu diurutkan ulang berdasarkan jarak.
+    geo_near = {
+        "near": {"type": "Point", "coordinates": [longitude, latitude]},
+        "distanceField": "distanceMeters",
+        "maxDistance": max_distance_km * 1000,
+        "spherical": True
+    }
+    if candidate_ids:
+        geo_near["query"] = {"_id": {"$in": list(candidate_ids)}}
+
+    pipeline = [{"$geoNear": geo_near}, {"$limit": len(candidate_ids) if candidate_ids else limit}]
+    candidates = await db["facilities"].aggregate(pipeline).to_list(length=None)
+    if candidate_ids and not candidates:
+        # Semua kecocokan teks/semantik berada di luar maxDistance: kembali ke fasilitas terdekat biasa.
+        geo_near.pop("query")
+        candidate_ids = set()
+        candidates = await db["facilities"].aggregate([{"$geoNear": geo_near}, {"$limit": limit}]).to_list(length=None)
+
+    if candidate_ids:
+        best_text_score = max(text_scores.values(), default=0) or 1
+        max_distance_meters = max_distance_km * 1000
+        text_weight = 0.5 if semantic_scores else 1.0
+
+        def rank(doc: Dict[str, Any]) -> float:
+            relevance = (
+                text_weight * text_scores.get(doc["_id"], 0) / best_text_score
+                + (1 - text_weight) * semantic_scores.get(doc["_id"], 0)
+            )
+            proximity = 1 - min(doc["distanceMeters"], max_distance_meters) / max_distance_meters
+            return 0.7 * relevance + 0.3 * proximity
+
+        candidates.sort(key=rank, reverse=True)
+
+    return [_with_distance(fix_facility_id(doc)) for doc in candidates[:limit]]
+
+def _candidate_summary(facility_doc: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": facility_doc["id"],
+        "name": facility_doc.get("name"),
+        "type": facility_doc.get("type"),
+        "services": (facility_doc.get("services_offered") or [])[:5],
+        "km": facility_doc.get("distanceKm")
+    }
+
+async def search_facilities(
+    db: AsyncIOMotorDatabase,
+    query: str,
+    user_location: Dict[str, float]
+) -> Tuple[List[FacilityPublic], str]:
+    latitude = user_location.get("latitude")
+    longitude = user_location.get("longitude")
+    if latitude is None or longitude is None:
+        return [], "LOCAL_SEARCH"
+
+    # Lokasi dibulatkan ke ~100 m agar pengguna yang berdekatan berbagi entri cache.
+    cache_key = f"search:{' '.join(query.lower().split())}:{round(latitude, 3)}:{round(longitude, 3)}"
+    cached_search = await facility_cache.get(cache_key)
+    if cached_search is not None:
+        return [FacilityPublic(**facility) for facility in cached_search["data"]], cached_search["source"]
+
+    candidates = await search_local_candidates(db, query, latitude, longitude)
+    if not candidates:
+        return [], "LOCAL_SEARCH"
+
+    ranked_ids = await gemini_service.rerank_facilities_with_gemini(
+        query, [_candidate_summary(doc) for doc in candidates]
+    )
+    source = "GEMINI_SEARCH"
+    if not ranked_ids:
+        ranked_ids = [doc["id"] for doc in candidates]
+        source = "LOCAL_SEARCH"
+
+    candidates_by_id = {doc["id"]: doc for doc in candidates}
+    facilities = [
+        FacilityPublic(**candidates_by_id[facility_id])
+        for facility_id in ranked_ids[:settings.FACILITY_SEARCH_RESULTS]
+    ]
+    await facility_cache.set(
+        cache_key, {"data": [facility.model_dump(mode="json") for facility in facilities], "source": source}
+    )
+    return facilities, source
+
+
+def _preference_text(preferences: Dict[str, Any]) -> str:
+    if isinstance(preferences.get("query"), str):
+        return preferences["query"]
+    parts = []
+    for key, value in preferences.items():
+        if key == "userLocation":
+            continue
+        if isinstance(value, str):
+            parts.append(value)
+        elif isinstance(value, list):
+            parts.extend(str(item) for item in value if isinstance(item, str))
+    return " ".join(parts)
+
+async def get_semantic_recommendations(
+    db: AsyncIOMotorDatabase,
+    preferences: Dict[str, Any],
+    user_profile: Dict[str, Any]
+) -> List[FacilityPublic]:
+    text = _preference_text(preferences)
+    if not text or not await facility_vector_index.load():
+        return []
+
+    user_location = preferences.get("userLocation") or {}
+    results = await semantic_search(
+        db,
+        text,
+        latitude=user_location.get("latitude", user_profile.get("latitude")),
+        longitude=user_location.get("longitude", user_profile.get("longitude")),
+        max_distance_km=preferences.get("maxDistanceKm") or user_profile.get("max_distance_km"),
+        max_budget=preferences.get("maxBudget") or user_profile.get("max_budget"),
+    )
+    return [FacilityPublic(**fix_facility_id(doc)) for doc, _ in results]
+
+
+async def _invalidate_facility_cache(event: InvalidationEvent) -> None:
+    # Insert juga menghapus entri negatif untuk id tersebut.
+    facility_local_cache.delete_nowait(str(event.document_id))
+    await facility_cache.delete(f"id:{event.document_id}")
+    # Hasil pencarian tidak bisa dipetakan ke fasilitas tertentu, jadi semuanya dibuang.
+    await facility_cache.clear("search:")
+
+
+async def _reset_facility_cache() -> None:
+    facility_local_cache.clear_nowait("")
+    await facility_cache.clear()
+
+
+invalidation_bus.register("facilities", _invalidate_facility_cache, on_reset=_reset_facility_cache)
\ No newline at end of file
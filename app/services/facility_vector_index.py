@@ -0,0 +1,158 @@
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core.config import settings
+from app.services.embedding_service import Encoder, get_encoder
+from app.services.gemini_governor import Priority
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6378.1
+BUILD_BATCH_SIZE = 1000
+FACILITY_TEXT_PROJECTION = {"name": 1, "type": 1, "address": 1, "services_offered": 1}
+
+
+def facility_text(facility_doc: Dict[str, Any]) -> str:
+    services = ", ".join(facility_doc.get("services_offered") or [])
+    return " | ".join(
+        part for part in (facility_doc.get("name"), facility_doc.get("type"), facility_doc.get("address"), services) if part
+    )
+
+
+def _paths(base_path: str) -> Tuple[Path, Path]:
+    base = Path(base_path)
+    return base.with_suffix(".f32"), base.with_suffix(".meta.json")
+
+
+async def build_index(db: AsyncIOMotorDatabase, encoder: Encoder = None, base_path: str = None) -> Dict[str, Any]:
+    encoder = encoder or get_encoder()
+    vectors_path, meta_path = _paths(base_path or settings.FACILITY_VECTOR_INDEX_PATH)
+    vectors_path.parent.mkdir(parents=True, exist_ok=True)
+
+    count = await db["facilities"].count_documents({})
+    tmp_vectors_path = vectors_path.with_suffix(".f32.tmp")
+    matrix = np.memmap(tmp_vectors_path, dtype=np.float32, mode="w+", shape=(max(count, 1), encoder.dimension))
+
+    ids: List[str] = []
+    batch: List[Dict[str, Any]] = []
+
+    async def flush() -> None:
+        # Build offline antre di belakang query pengguna yang memakai policy FACILITY_EMBEDDING (INTERACTIVE).
+        vectors = await encoder.encode([facility_text(doc) for doc in batch], priority=Priority.BACKGROUND)
+        matrix[len(ids):len(ids) + len(batch)] = vectors
+        ids.extend(str(doc["_id"]) for doc in batch)
+        batch.clear()
+
+    async for doc in db["facilities"].find({}, FACILITY_TEXT_PROJECTION).sort("_id", 1):
+        if len(ids) + len(batch) >= count:
+            break
+        batch.append(doc)
+        if len(batch) >= BUILD_BATCH_SIZE:
+            await flush()
+    if batch:
+        await flush()
+
+    matrix.flush()
+    del matrix
+
+    meta = {
+        "encoder": encoder.name,
+        "dimension": encoder.dimension,
+        "count": len(ids),
+        "built_at": datetime.utcnow().isoformat(),
+        "ids": ids,
+    }
+    tmp_meta_path = meta_path.with_suffix(".json.tmp")
+    tmp_meta_path.write_text(json.dumps(meta, separators=(",", ":")))
+    os.replace(tmp_vectors_path, vectors_path)
+    os.replace(tmp_meta_path, meta_path)
+    facility_vector_index.invalidate()
+    return {key: value for key, value in meta.items() if key != "ids"}
+
+
+class FacilityVectorIndex:
+    def __init__(self, base_path: str = None):
+        self.base_path = base_path or settings.FACILITY_VECTOR_INDEX_PATH
+        self.matrix: Optional[np.ndarray] = None
+        self.ids: List[str] = []
+        self.encoder: Optional[Encoder] = None
+        self._loaded_mtime: Optional[float] = None
+
+    def invalidate(self) -> None:
+        self._loaded_mtime = None
+
+    def _load(self) -> bool:
+        vectors_path, meta_path = _paths(self.base_path)
+        if not vectors_path.exists() or not meta_path.exists():
+            return False
+        mtime = meta_path.stat().st_mtime
+        if self._loaded_mtime == mtime and self.matrix is not None:
+            return True
+
+        meta = json.loads(meta_path.read_text())
+        if meta["count"] == 0:
+            return False
+        # memmap read-only: halaman vektor dibagi antarproses lewat page cache.
+        # Dimensi encoder mengikuti meta indeks, bukan konfigurasi saat ini, agar query selalu sebangun dengan matriks.
+        matrix = np.memmap(vectors_path, dtype=np.float32, mode="r", shape=(meta["count"], meta["dimension"]))
+        self.matrix, self.ids = matrix, meta["ids"]
+        self.encoder = get_encoder(meta["encoder"], dimension=meta["dimension"])
+        self._loaded_mtime = mtime
+        logger.info("Indeks vektor fasilitas dimuat", extra={"count": meta["count"], "encoder": meta["encoder"]})
+        return True
+
+    async def load(self) -> bool:
+        # Membaca meta (berisi seluruh id) dan memetakan file vektor adalah I/O blocking, jadi dijalankan di thread.
+        return await asyncio.to_thread(self._load)
+
+    async def search(self, text: str, top_k: int) -> List[Tuple[str, float]]:
+        if not text or not await self.load():
+            return []
+        query = (await self.encoder.encode([text], query=True))[0]
+        scores = self.matrix @ query
+        top_k = min(top_k, len(scores))
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.ids[index], float(scores[index])) for index in top]
+
+
+facility_vector_index = FacilityVectorIndex()
+
+
+async def semantic_search(
+    db: AsyncIOMotorDatabase,
+    text: str,
+    latitude: Optional[float] = None,
+    longitude: Optional[float] = None,
+    max_distance_km: Optional[float] = None,
+    max_budget: Optional[int] = None,
+    limit: int = 10,
+    oversample: int = 10,
+    min_score: float = None,
+) -> List[Tuple[Dict[str, Any], float]]:
+    min_score = settings.FACILITY_SEMANTIC_MIN_SCORE if min_score is None else min_score
+    hits = [hit for hit in await facility_vector_index.search(text, limit * oversample) if hit[1] >= min_score]
+    if not hits:
+        return []
+
+    scores = dict(hits)
+    mongo_filter: Dict[str, Any] = {"_id": {"$in": [ObjectId(facility_id) for facility_id, _ in hits]}}
+    if latitude is not None and longitude is not None and max_distance_km:
+        mongo_filter["location"] = {
+            "$geoWithin": {"$centerSphere": [[longitude, latitude], max_distance_km / EARTH_RADIUS_KM]}
+        }
+    if max_budget:
+        mongo_filter["tariff_max"] = {"$lte": max_budget}
+
+    docs = await db["facilities"].find(mongo_filter).to_list(length=None)
+    docs.sort(key=lambda doc: scores[str(doc["_id"])], reverse=True)
+    return [(doc, scores[str(doc["_id"])]) for doc in docs[:limit]]
@@ -0,0 +1,94 @@
+import asyncio
+import json
+import random
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, List, Optional
+
+
+class FakeGeminiError(Exception):
+    def __init__(self, code: int, message: str = "Fake Gemini error"):
+        super().__init__(message)
+        self.code = code
+
+
+@dataclass
+class FakeUsageMetadata:
+    prompt_token_count: int = 0
+    candidates_token_count: int = 0
+    total_token_count: int = 0
+
+
+@dataclass
+class FakeResponse:
+    text: str
+    usage_metadata: FakeUsageMetadata = field(default_factory=FakeUsageMetadata)
+    chunk_size: int = 64
+
+    async def __aiter__(self) -> AsyncIterator["FakeResponse"]:
+        # Meniru stream=True: teks dikirim bertahap per potongan.
+        for start in range(0, max(len(self.text), 1), self.chunk_size):
+            yield FakeResponse(self.text[start:start + self.chunk_size], self.usage_metadata)
+
+
+def _prompt_text(contents: Any) -> str:
+    if isinstance(contents, str):
+        return contents
+    if isinstance(contents, (list, tuple)):
+        return "\n".join(part for part in contents if isinstance(part, str))
+    return ""
+
+
+def _has_image(contents: Any) -> bool:
+    return isinstance(contents, (list, tuple)) and any(isinstance(part, dict) for part in contents)
+
+
+def default_responder(contents: Any) -> str:
+    prompt = _prompt_text(contents)
+    if _has_image(contents):
+        return json.dumps({
+            "items": [{"name": "PARACETAMOL 500MG", "quantity": 1, "total_price": 15000, "category": "MEDICATION"}],
+            "overall_total": 15000, "store_name": "APOTEK CONTOH", "transaction_date": "2025-01-15",
+        })
+    if "memperbarui informasi fasilitas" in prompt:
+        return json.dumps({"overall_rating": 4.5, "phone": "(021) 5550123"})
+    if "rekomendasi" in prompt.lower():
+        return json.dumps([
+            "Bandingkan harga obat generik sebelum membeli.",
+            "Sisihkan dana kesehatan setiap bulan.",
+            "Manfaatkan layanan BPJS untuk konsultasi rutin.",
+        ])
+    if "JSON Array" in prompt or "JSON ARRAY" in prompt:
+        return "[]"
+    return "{}"
+
+
+class FakeGenerativeModel:
+    def __init__(
+        self,
+        responder: Optional[Callable[[Any], str]] = None,
+        latency_seconds: float = 0.0,
+        failure_rate: float = 0.0,
+        failure_code: int = 429,
+        seed: Optional[int] = None,
+    ):
+        self.responder = responder or default_responder
+        self.latency_seconds = latency_seconds
+        self.failure_rate = failure_rate
+        self.failure_code = failure_code
+        self.random = random.Random(seed)
+        self.calls: List[Any] = []
+
+    async def generate_content_async(self, contents: Any, **kwargs: Any) -> FakeResponse:
+        self.calls.append(contents)
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        if self.failure_rate and self.random.random() < self.failure_rate:
+            raise FakeGeminiError(self.failure_code)
+
+        text = self.responder(contents)
+        prompt_tokens = max(1, len(_prompt_text(contents)) // 4)
+        output_tokens = max(1, len(text) // 4)
+        return FakeResponse(
+            text=text,
+            usage_metadata=FakeUsageMetadata(prompt_tokens, output_tokens, prompt_tokens + output_tokens),
+        )
@@ -0,0 +1,280 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+class CallType:
+    FACILITY_FILTER = "facility_filter"
+    RECEIPT_OCR = "receipt_ocr"
+    FACILITY_ENRICHMENT = "facility_enrichment"
+    FACILITY_SEARCH = "facility_search"
+    SPENDING_RECOMMENDATIONS = "spending_recommendations"
+    FACILITY_EMBEDDING = "facility_embedding"
+
+
+@dataclass(frozen=True)
+class CallPolicy:
+    concurrency: int
+    timeout_seconds: float
+    priority: Priority
+
+
+DEFAULT_POLICIES: Dict[str, CallPolicy] = {
+    CallType.FACILITY_SEARCH: CallPolicy(concurrency=8, timeout_seconds=15, priority=Priority.INTERACTIVE),
+    CallType.FACILITY_FILTER: CallPolicy(concurrency=8, timeout_seconds=15, priority=Priority.INTERACTIVE),
+    CallType.RECEIPT_OCR: CallPolicy(concurrency=4, timeout_seconds=45, priority=Priority.INTERACTIVE),
+    CallType.SPENDING_RECOMMENDATIONS: CallPolicy(concurrency=4, timeout_seconds=20, priority=Priority.INTERACTIVE),
+    CallType.FACILITY_ENRICHMENT: CallPolicy(concurrency=2, timeout_seconds=60, priority=Priority.BACKGROUND),
+    CallType.FACILITY_EMBEDDING: CallPolicy(concurrency=4, timeout_seconds=30, priority=Priority.INTERACTIVE),
+}
+
+@dataclass
+class CallUsage:
+    calls: int = 0
+    prompt_tokens: int = 0
+    output_tokens: int = 0
+    latency_ms: float = 0.0
+
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class GeminiUnavailableError(Exception):
+    pass
+
+
+def _retryable(exc: Exception, status_code: Optional[int]) -> bool:
+    # Hanya error transport yang dicoba ulang: status transien dari server atau koneksi yang putus di
+    # tengah stream. Output model yang tidak valid diulang lewat prompt perbaikan oleh pemanggil.
+    return status_code in RETRYABLE_STATUS_CODES or isinstance(exc, ConnectionError)
+
+
+# Limiter RPM + TPM dengan antrian prioritas: waiter di kepala heap selalu
+# dilayani lebih dulu, sehingga panggilan BACKGROUND tidak pernah menyalip
+# panggilan INTERACTIVE yang sedang menunggu kuota.
+class DualTokenBucket:
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.request_capacity = float(requests_per_minute)
+        self.token_capacity = float(tokens_per_minute)
+        self.request_level = self.request_capacity
+        self.token_level = self.token_capacity
+        self._last_refill: Optional[float] = None
+        self._waiters: list = []
+        self._sequence = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def _refill(self, now: float) -> None:
+        if self._last_refill is not None:
+            elapsed = now - self._last_refill
+            self.request_level = min(self.request_capacity, self.request_level + elapsed * self.request_capacity / 60)
+            self.token_level = min(self.token_capacity, self.token_level + elapsed * self.token_capacity / 60)
+        self._last_refill = now
+
+    def _wait_time(self, tokens: float) -> float:
+        request_deficit = max(0.0, 1 - self.request_level)
+        token_deficit = max(0.0, tokens - self.token_level)
+        return max(request_deficit * 60 / self.request_capacity, token_deficit * 60 / self.token_capacity)
+
+    def _drain(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._timer = None
+        self._refill(loop.time())
+        while self._waiters:
+            _, _, tokens, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            tokens = min(tokens, self.token_capacity)
+            wait = self._wait_time(tokens)
+            if wait > 0:
+                self._timer = loop.call_later(wait, self._drain)
+                return
+            heapq.heappop(self._waiters)
+            self.request_level -= 1
+            self.token_level -= tokens
+            future.set_result(None)
+
+    async def acquire(self, tokens: float, priority: Priority) -> None:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        heapq.heappush(self._waiters, (int(priority), next(self._sequence), tokens, future))
+        if self._timer is not None:
+            self._timer.cancel()
+        self._drain()
+        await future
+
+
+def estimate_tokens(contents: Any) -> int:
+    if isinstance(contents, str):
+        return max(1, len(contents) // 4)
+    if isinstance(contents, dict):
+        # Gambar dihitung tetap oleh Gemini (~258 token per gambar).
+        return 258
+    if isinstance(contents, (list, tuple)):
+        return sum(estimate_tokens(part) for part in contents)
+    return 1
+
+
+def _status_code(exc: Exception) -> Optional[int]:
+    # google.api_core.exceptions.GoogleAPICallError menyimpan status HTTP di `code`.
+    code = getattr(exc, "code", None)
+    return code if isinstance(code, int) else None
+
+
+class GeminiGovernor:
+    def __init__(
+        self,
+        requests_per_minute: int = None,
+        tokens_per_minute: int = None,
+        max_retries: int = None,
+        retry_base_seconds: float = None,
+        policies: Dict[str, CallPolicy] = None,
+    ):
+        self.bucket = DualTokenBucket(
+            requests_per_minute or settings.GEMINI_REQUESTS_PER_MINUTE,
+            tokens_per_minute or settings.GEMINI_TOKENS_PER_MINUTE,
+        )
+        self.max_retries = settings.GEMINI_MAX_RETRIES if max_retries is None else max_retries
+        self.retry_base_seconds = retry_base_seconds or settings.GEMINI_RETRY_BASE_SECONDS
+        self.policies = dict(policies or DEFAULT_POLICIES)
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.usage: Dict[str, CallUsage] = defaultdict(CallUsage)
+
+    def _policy(self, call_type: str) -> CallPolicy:
+        return self.policies.get(call_type, CallPolicy(concurrency=4, timeout_seconds=30, priority=Priority.INTERACTIVE))
+
+    def _semaphore(self, call_type: str) -> asyncio.Semaphore:
+        if call_type not in self._semaphores:
+            self._semaphores[call_type] = asyncio.Semaphore(self._policy(call_type).concurrency)
+        return self._semaphores[call_type]
+
+    async def generate(
+        self,
+        model: Any,
+        call_type: str,
+        contents: Any,
+        priority: Optional[Priority] = None,
+        timeout: Optional[float] = None,
+        consume: Optional[Callable[[Any], Awaitable[Any]]] = None,
+        **kwargs: Any,
+    ) -> Any:
+        return await self.call(
+            call_type,
+            contents,
+            lambda: model.generate_content_async(contents, **kwargs),
+            priority=priority,
+            timeout=timeout,
+            consume=consume,
+        )
+
+    async def call(
+        self,
+        call_type: str,
+        contents: Any,
+        request: Callable[[], Awaitable[Any]],
+        priority: Optional[Priority] = None,
+        timeout: Optional[float] = None,
+        consume: Optional[Callable[[Any], Awaitable[Any]]] = None,
+    ) -> Any:
+        # Titik masuk umum untuk semua panggilan ke API Gemini (generate maupun embedding); `request`
+        # dipanggil ulang pada tiap percobaan sehingga harus membuat request baru setiap kali.
+        # `consume` membaca respons stream di dalam percobaan yang sama: slot semaphore dan deadline
+        # tetap berlaku selama stream dibaca, dan stream yang terputus ikut dicoba ulang.
+        policy = self._policy(call_type)
+        priority = policy.priority if priority is None else priority
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (timeout or policy.timeout_seconds)
+        tokens = estimate_tokens(contents)
+
+        attempt = 0
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise GeminiUnavailableError(f"Deadline panggilan Gemini '{call_type}' terlampaui")
+            try:
+                return await asyncio.wait_for(
+                    self._attempt(call_type, tokens, priority, request, consume), timeout=remaining
+                )
+            except asyncio.TimeoutError as exc:
+                raise GeminiUnavailableError(f"Deadline panggilan Gemini '{call_type}' terlampaui") from exc
+            except Exception as exc:
+                status_code = _status_code(exc)
+                if not _retryable(exc, status_code) or attempt >= self.max_retries:
+                    raise
+                delay = random.uniform(0, self.retry_base_seconds * (2 ** attempt))
+                if loop.time() + delay >= deadline:
+                    raise
+                attempt += 1
+                logger.warning(
+                    "Panggilan Gemini gagal, mencoba ulang",
+                    extra={"call_type": call_type, "status_code": status_code, "attempt": attempt, "delay_s": round(delay, 2)},
+                )
+                await asyncio.sleep(delay)
+
+    async def _attempt(
+        self,
+        call_type: str,
+        tokens: int,
+        priority: Priority,
+        request: Callable[[], Awaitable[Any]],
+        consume: Optional[Callable[[Any], Awaitable[Any]]],
+    ) -> Any:
+        async with self._semaphore(call_type):
+            await self.bucket.acquire(tokens, priority)
+            started = time.perf_counter()
+            response = await request()
+            result = await consume(response) if consume else response
+            # Pemakaian dicatat setelah respons terbaca penuh; untuk stream, usage_metadata baru terisi di akhir.
+            self._record_usage(call_type, tokens, response, (time.perf_counter() - started) * 1000)
+            return result
+
+    def _record_usage(self, call_type: str, estimated_tokens: int, response: Any, latency_ms: float) -> None:
+        metadata = getattr(response, "usage_metadata", None)
+        prompt_tokens = getattr(metadata, "prompt_token_count", 0) or estimated_tokens
+        output_tokens = getattr(metadata, "candidates_token_count", 0) or 0
+
+        # Estimasi awal dikoreksi dengan hitungan token sebenarnya agar TPM akurat.
+        self.bucket.token_level -= prompt_tokens - estimated_tokens
+
+        usage = self.usage[call_type]
+        usage.calls += 1
+        usage.prompt_tokens += prompt_tokens
+        usage.output_tokens += output_tokens
+        usage.latency_ms += latency_ms
+        logger.debug(
+            "Pemakaian token Gemini",
+            extra={
+                "call_type": call_type,
+                "prompt_tokens": prompt_tokens,
+                "output_tokens": output_tokens,
+                "latency_ms": round(latency_ms, 1),
+            },
+        )
+
+    def usage_snapshot(self) -> Dict[str, Dict[str, Any]]:
+        snapshot = {}
+        for call_type, usage in self.usage.items():
+            stats = asdict(usage)
+            stats["avg_prompt_tokens"] = round(usage.prompt_tokens / usage.calls, 1) if usage.calls else 0
+            stats["avg_latency_ms"] = round(usage.latency_ms / usage.calls, 1) if usage.calls else 0
+            snapshot[call_type] = stats
+        return snapshot
+
+
+gemini_governor = GeminiGovernor()
@@ -0,0 +1,104 @@
+import json
+import textwrap
+from string import Template
+from typing import Any, Dict, Iterable
+
+from app.models.enums import ExpenseCategory
+from app.services.gemini_governor import CallType
+
+
+def _compile(text: str) -> Template:
+    return Template(textwrap.dedent(text).strip())
+
+
+def compact_json(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def project(document: Dict[str, Any], fields: Iterable[str]) -> Dict[str, Any]:
+    return {field: document[field] for field in fields if document.get(field) not in (None, "", [], {})}
+
+
+# Hanya field yang benar-benar dipakai model yang dikirim per jenis panggilan;
+# data sensitif seperti KTP, pekerjaan, atau alamat tidak ikut terkirim.
+FIELD_PROJECTIONS: Dict[str, tuple] = {
+    CallType.FACILITY_FILTER: ("max_budget", "max_distance_km", "latitude", "longitude", "preferences"),
+    CallType.FACILITY_ENRICHMENT: ("name", "type", "address", "phone", "overall_rating", "services_offered", "image_url"),
+    CallType.SPENDING_RECOMMENDATIONS: ("category", "total_price", "medicine_name"),
+}
+
+FACILITY_FILTER_TEMPLATE = _compile("""
+    Anda adalah API yang mengonversi profil pengguna menjadi kriteria filter MongoDB untuk method find().
+    Schema Facility: {name:String,type:String,tariff_max:Number,location:GeoJSON,services_offered:[String]}
+    Aturan:
+    1. location: HANYA jika latitude/longitude valid. Gunakan $$near dengan $$geometry (coordinates [longitude, latitude]) dan $$maxDistance dalam meter.
+    2. tariff_max: HANYA jika max_budget valid. Gunakan $$lte.
+    3. JANGAN sertakan $$limit, $$sort, atau operator berbahaya (delete, drop).
+    Data pengguna: $profile
+    Kembalikan HANYA JSON minified yang valid. Jika tidak ada kondisi valid, kembalikan {}.
+""")
+
+RECEIPT_OCR_PROMPT = _compile("""
+    Anda adalah AI ahli membaca struk medis. Ekstrak informasi dari gambar.
+    Format Output WAJIB JSON:
+    {"items":[{"name":"NAMA_ITEM","quantity":1,"total_price":100000,"category":"MEDICATION"}],"overall_total":100000,"store_name":"NAMA_APOTEK","transaction_date":"YYYY-MM-DD"}
+    Kategori harus salah satu dari: $categories. Default ke 'OTHER'.
+    Jika tidak jelas, kembalikan "items" kosong. Analisis gambar berikut:
+""").substitute(categories=", ".join(category.value for category in ExpenseCategory))
+
+FACILITY_ENRICHMENT_TEMPLATE = _compile("""
+    Anda adalah analis data yang memverifikasi dan memperbarui informasi fasilitas kesehatan.
+    Data saat ini: $facility
+    Cari data yang lebih baru atau lebih lengkap (overall_rating, phone, services_offered, image_url).
+    Kembalikan SATU objek JSON valid; jangan sertakan field yang tidak ditemukan.
+    Contoh: {"overall_rating":4.7,"phone":"(021) 123456"}
+""")
+
+FACILITY_RERANK_TEMPLATE = _compile("""
+    Anda adalah ahli pencarian fasilitas kesehatan. Urutkan kandidat berdasarkan relevansi terhadap query pengguna.
+    Query: $query
+    Kandidat (id, name, type, services, km): $candidates
+    Pilih HANYA dari kandidat di atas dan buang yang jelas tidak relevan.
+    Kembalikan HANYA JSON Array berisi id kandidat, paling relevan lebih dulu. Contoh: ["id1","id2"]
+""")
+
+SPENDING_RECOMMENDATIONS_TEMPLATE = _compile("""
+    Anda adalah penasihat keuangan pribadi. Berikan 3 rekomendasi praktis berdasarkan pengeluaran kesehatan berikut,
+    fokus pada pola pengeluaran, potensi penghematan, dan tips anggaran.
+    Data: $expenses
+    Kembalikan HANYA array JSON berisi 3 string rekomendasi.
+""")
+
+JSON_REPAIR_TEMPLATE = _compile("""
+    Keluaran berikut seharusnya berupa JSON valid namun gagal diproses: $error
+    Keluaran: $output
+    Perbaiki dan kembalikan HANYA JSON valid dengan struktur yang sama, tanpa teks lain.
+""")
+
+
+def facility_filter_prompt(user_profile: Dict[str, Any]) -> str:
+    return FACILITY_FILTER_TEMPLATE.substitute(
+        profile=compact_json(project(user_profile, FIELD_PROJECTIONS[CallType.FACILITY_FILTER]))
+    )
+
+
+def facility_enrichment_prompt(facility: Dict[str, Any]) -> str:
+    return FACILITY_ENRICHMENT_TEMPLATE.substitute(
+        facility=compact_json(project(facility, FIELD_PROJECTIONS[CallType.FACILITY_ENRICHMENT]))
+    )
+
+
+def facility_rerank_prompt(query: str, candidates: Iterable[Dict[str, Any]]) -> str:
+    return FACILITY_RERANK_TEMPLATE.substitute(query=compact_json(query), candidates=compact_json(list(candidates)))
+
+
+def spending_recommendations_prompt(expenses: Iterable[Dict[str, Any]]) -> str:
+    fields = FIELD_PROJECTIONS[CallType.SPENDING_RECOMMENDATIONS]
+    return SPENDING_RECOMMENDATIONS_TEMPLATE.substitute(
+        expenses=compact_json([project(expense, fields) for expense in expenses])
+    )
+
+
+
+def json_repair_prompt(output: str, error: str) -> str:
+    return JSON_REPAIR_TEMPLATE.substitute(output=output[:4000], error=error[:500])
\ No newline at end of file
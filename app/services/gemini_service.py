@@ -1,149 +1,236 @@
-import json
-import google.generativeai as genai
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from pydantic import TypeAdapter
 from typing import List, Dict, Any, Optional
 
+from app.core.cache import ai_cache
 from app.core.config import settings
-from app.models.user import UserPublic
-from app.models.enums import ExpenseCategory
+from app.models.ai import FacilityEnrichment, ReceiptExtraction
+from app.services import gemini_prompts
+from app.services.gemini_prompts import compact_json
+from app.services.gemini_fake import FakeGenerativeModel
+from app.services.gemini_governor import CallType, Priority, gemini_governor
+from app.utils.gemini_schema import gemini_response_schema
+from app.utils.json_stream import JSONStreamExtractor
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "gemini-1.5-flash"
+
+_model: Any = None
+_model_ready = False
+_model_lock = threading.Lock()
+_usage_task: Optional[asyncio.Task] = None
+
+def _create_model() -> Any:
+    if settings.GEMINI_BACKEND == "fake":
+        logger.warning("Menggunakan backend Gemini palsu (GEMINI_BACKEND=fake).")
+        return FakeGenerativeModel(latency_seconds=settings.GEMINI_FAKE_LATENCY_SECONDS)
+    if not settings.GEMINI_API_KEY:
+        logger.warning("GEMINI_API_KEY tidak diatur. Fungsi-fungsi Gemini tidak akan bekerja.")
+        return None
 
-if not settings.GEMINI_API_KEY:
-    print("PERINGATAN: GEMINI_API_KEY tidak diatur. Fungsi-fungsi Gemini tidak akan bekerja.")
-    model = None
-else:
-    genai.configure(api_key=settings.GEMINI_API_KEY)
-    model = genai.GenerativeModel('gemini-1.5-flash')
+    # SDK Google (beserta grpc/protobuf) baru diimpor saat model pertama kali dibutuhkan.
+    import google.generativeai as genai
 
-def _clean_gemini_json_response(raw_text: str) -> str:
-    cleaned_text = raw_text.strip().replace("```json", "").replace("```", "").strip()
-    return cleaned_text
+    genai.configure(api_key=settings.GEMINI_API_KEY)
+    return genai.GenerativeModel(MODEL_NAME)
+
+def get_model() -> Any:
+    global _model, _model_ready
+    if not _model_ready:
+        with _model_lock:
+            if not _model_ready:
+                _model = _create_model()
+                _model_ready = True
+    return _model
+
+def set_model(model: Any) -> None:
+    global _model, _model_ready
+    with _model_lock:
+        _model = model
+        _model_ready = True
+
+async def init_model() -> None:
+    # Dipanggil dari lifespan; import SDK dijalankan di thread agar event loop tidak tertahan.
+    await asyncio.to_thread(get_model)
+
+def _log_usage() -> None:
+    usage = gemini_governor.usage_snapshot()
+    if usage:
+        logger.info("Pemakaian Gemini per call type", extra={"usage": usage, "parse_stats": parse_stats_snapshot()})
+
+async def _report_usage(interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        _log_usage()
+
+def start_usage_reporter() -> None:
+    global _usage_task
+    if settings.GEMINI_USAGE_LOG_SECONDS > 0 and _usage_task is None:
+        _usage_task = asyncio.create_task(_report_usage(settings.GEMINI_USAGE_LOG_SECONDS))
+
+async def stop_usage_reporter() -> None:
+    global _usage_task
+    if _usage_task is None:
+        return
+    _usage_task.cancel()
+    try:
+        await _usage_task
+    except asyncio.CancelledError:
+        pass
+    _usage_task = None
+    # Ringkasan terakhir agar pemakaian sejak log periodik terakhir tidak hilang saat shutdown.
+    _log_usage()
+
+@dataclass
+class ParseStats:
+    calls: int = 0
+    parse_failures: int = 0
+    repaired: int = 0
+
+_parse_stats: Dict[str, ParseStats] = defaultdict(ParseStats)
+
+def parse_stats_snapshot() -> Dict[str, Dict[str, Any]]:
+    snapshot = {}
+    for call_type, stats in _parse_stats.items():
+        data = asdict(stats)
+        data["failure_rate"] = round(stats.parse_failures / stats.calls, 4) if stats.calls else 0.0
+        snapshot[call_type] = data
+    return snapshot
+
+class MalformedOutputError(ValueError):
+    # Stream selesai normal tetapi tidak berisi nilai JSON yang lengkap (prosa atau JSON terpotong).
+    def __init__(self, output: str):
+        super().__init__(f"JSON tidak lengkap: {output[:1000]}")
+        self.output = output
+
+@lru_cache(maxsize=None)
+def _adapter(annotation: Any) -> TypeAdapter:
+    return TypeAdapter(annotation)
+
+async def _read_json(response: Any) -> Any:
+    extractor = JSONStreamExtractor()
+    async for chunk in response:
+        # Berhenti begitu nilai JSON pertama lengkap; sisa stream tidak ditunggu.
+        if extractor.feed(chunk.text):
+            return extractor.value
+    raise MalformedOutputError(extractor.buffer)
+
+async def _request_json(call_type: str, contents: Any, annotation: Any, use_schema: bool, priority: Optional[Priority]) -> Any:
+    generation_config = {"response_mime_type": "application/json"}
+    if use_schema:
+        generation_config["response_schema"] = gemini_response_schema(annotation)
+
+    # Stream dibaca di dalam percobaan governor sehingga semaphore, deadline, dan retry juga menaungi pembacaannya.
+    return await gemini_governor.generate(
+        get_model(),
+        call_type,
+        contents,
+        priority=priority,
+        consume=_read_json,
+        stream=True,
+        generation_config=generation_config,
+    )
+
+async def _generate_structured(
+    call_type: str,
+    contents: Any,
+    annotation: Any,
+    use_schema: bool = True,
+    priority: Optional[Priority] = None,
+    raise_errors: bool = False,
+) -> Any:
+    if not get_model():
+        return None
 
-async def _call_gemini_with_prompt(prompt: str, is_json_output: bool = True) -> Optional[str]:
-    if not model:
+    stats = _parse_stats[call_type]
+    stats.calls += 1
+    value = None
+    try:
+        value = await _request_json(call_type, contents, annotation, use_schema, priority)
+        return _adapter(annotation).validate_python(value)
+    except ValueError as error:
+        # ValidationError pydantic juga turunan ValueError.
+        stats.parse_failures += 1
+        parse_error = error
+        output = compact_json(value) if value is not None else getattr(error, "output", str(error))
+    except Exception:
+        # Pemanggil latar belakang butuh membedakan Gemini tidak tersedia dari respons yang tidak valid.
+        if raise_errors:
+            raise
+        logger.exception("Error saat memanggil Gemini AI", extra={"call_type": call_type})
         return None
+
+    logger.warning("Respons Gemini tidak valid, mencoba perbaikan", extra={"call_type": call_type, "error": str(parse_error)[:500]})
     try:
-        response = await model.generate_content_async(prompt)
-        if is_json_output:
-            return _clean_gemini_json_response(response.text)
-        return response.text
-    except Exception as e:
-        print(f"Error saat memanggil Gemini AI: {e}")
+        repair_prompt = gemini_prompts.json_repair_prompt(output, str(parse_error))
+        value = await _request_json(call_type, repair_prompt, annotation, use_schema, priority)
+        result = _adapter(annotation).validate_python(value)
+    except ValueError:
+        logger.error("Gemini tidak mengembalikan JSON yang valid", extra={"call_type": call_type, "output": output[:1000]})
         return None
+    except Exception:
+        if raise_errors:
+            raise
+        logger.exception("Error saat memanggil Gemini AI", extra={"call_type": call_type})
+        return None
+    stats.repaired += 1
+    return result
 
 async def generate_facility_filter(user_profile: Dict[str, Any]) -> Dict[str, Any]:
-    prompt = f"""
-    **Persona Anda:** Anda adalah API presisi tinggi yang bertugas mengonversi profil pengguna menjadi kueri filter MongoDB.
-    
-    **Tujuan:** Menghasilkan sebuah string JSON yang valid untuk kriteria filter dari method `find()`.
-    
-    **Referensi Schema:**
-    - Facility: {{ name: String, type: String, tariff_max: Number, location: GeoJSON, services_offered: [String] }}
-    - User/Preferences: {{ max_budget: Number, max_distance_km: Number, facility_type: [String], user_location: {{ latitude: Number, longitude: Number }} }}
-
-    **Aturan (WAJIB DIIKUTI):**
-    1.  **Jarak (`location`):** HANYA tambahkan jika `user_location` valid. Gunakan `$near` dengan `$geometry` (koordinat: [longitude, latitude]) dan `$maxDistance` (dalam meter).
-    2.  **Anggaran (`tariff_max`):** HANYA tambahkan jika `max_budget` valid. Gunakan `$lte`.
-    3.  **Keamanan:** JANGAN PERNAH menyertakan operator seperti `$limit`, `$sort`, atau operator berbahaya (`delete`, `drop`).
-
-    **Data Pengguna untuk Diproses:**
-    ```json
-    {json.dumps(user_profile, indent=2)}
-    ```
-
-    **Spesifikasi Output:** Kembalikan HANYA string JSON yang valid dan telah di-minify. Jika tidak ada kondisi valid, kembalikan objek JSON kosong: `{{}}`.
-    """
-    
-    json_string = await _call_gemini_with_prompt(prompt)
-    if not json_string:
-        return {}
-        
-    try:
-        query = json.loads(json_string)
-        if not isinstance(query, dict): return {}
-        return query
-    except json.JSONDecodeError:
-        print(f"Error: Gemini tidak mengembalikan JSON yang valid. Output: {json_string}")
-        return {}
-
-async def process_receipt_with_gemini(image_buffer: bytes, mime_type: str) -> Optional[Dict[str, Any]]:
-    if not model: return None
-
-    prompt = f"""
-    Anda adalah AI ahli membaca struk medis. Ekstrak informasi dari gambar.
-    Format Output WAJIB JSON:
-    {{
-      "items": [{{"name": "NAMA_ITEM", "quantity": 1, "total_price": 100000, "category": "MEDICATION"}}],
-      "overall_total": 100000, "store_name": "NAMA_APOTEK", "transaction_date": "YYYY-MM-DD"
-    }}
-    Kategori harus salah satu dari: {', '.join([e.value for e in ExpenseCategory])}. Default ke 'OTHER'.
-    Jika tidak jelas, kembalikan "items" kosong. Analisis gambar berikut:
-    """
-    
+    prompt = gemini_prompts.facility_filter_prompt(user_profile)
+    # Filter MongoDB berbentuk bebas sehingga hanya mode JSON yang dipakai, tanpa schema.
+    query = await _generate_structured(CallType.FACILITY_FILTER, prompt, Dict[str, Any], use_schema=False)
+    return query or {}
+
+async def process_receipt_with_gemini(
+    image_buffer: bytes, mime_type: str, priority: Optional[Priority] = None, raise_errors: bool = False
+) -> Optional[Dict[str, Any]]:
     image_part = {"mime_type": mime_type, "data": image_buffer}
-    
-    try:
-        response = await model.generate_content_async([prompt, image_part])
-        json_string = _clean_gemini_json_response(response.text)
-        return json.loads(json_string)
-    except (Exception, json.JSONDecodeError) as e:
-        print(f"Error saat memproses struk dengan Gemini: {e}")
+    extraction = await _generate_structured(
+        CallType.RECEIPT_OCR, [gemini_prompts.RECEIPT_OCR_PROMPT, image_part], ReceiptExtraction,
+        priority=priority, raise_errors=raise_errors
+    )
+    if extraction is None:
         return None
+    return extraction.model_dump(mode="json")
 
 async def enrich_facility_data(facility: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-    prompt = f"""
-    **Tugas:** Anda adalah analis data yang memverifikasi dan memperbarui informasi fasilitas kesehatan.
-    
-    **Data Saat Ini:**
-    ```json
-    {json.dumps(facility, indent=2, default=str)}
-    ```
-
-    **Instruksi:**
-    1.  Lakukan pencarian web untuk fasilitas di atas.
-    2.  Fokus untuk menemukan data yang lebih baru atau lebih lengkap (rating, telepon, layanan, URL gambar).
-    3.  Kembalikan hasilnya sebagai **SATU OBJEK JSON TUNGGAL** yang valid.
-    4.  Jika sebuah field tidak dapat ditemukan, jangan sertakan field itu di JSON balasan.
-    
-    **Contoh Output JSON:**
-    `{{"overall_rating": 4.7, "phone": "(021) 123456", "image_url": "https://example.com/image.jpg"}}`
-    
-    **PASTIKAN OUTPUT ANDA HANYA OBJEK JSON VALID.**
-    """
-    json_string = await _call_gemini_with_prompt(prompt)
-    if not json_string:
-        return None
-    try:
-        return json.loads(json_string)
-    except json.JSONDecodeError:
+    prompt = gemini_prompts.facility_enrichment_prompt(facility)
+    enrichment = await _generate_structured(CallType.FACILITY_ENRICHMENT, prompt, FacilityEnrichment)
+    if enrichment is None:
         return None
+    return enrichment.model_dump(exclude_none=True)
 
-async def search_facilities_with_gemini(query: str, user_location: Dict[str, float]) -> List[Dict[str, Any]]:
-    prompt = f"""
-    **Tugas:** Anda adalah ahli pencarian fasilitas kesehatan. Analisis query pengguna dan temukan fasilitas yang paling relevan.
-    
-    **User Query:** "{query}"
-    **Lokasi Pengguna:** Latitude {user_location.get('latitude')}, Longitude {user_location.get('longitude')}
-
-    **Instruksi:**
-    1.  Interpretasikan apa yang dicari pengguna (tipe fasilitas, layanan, lokasi).
-    2.  Kembalikan 3-5 fasilitas yang relevan.
-    3.  Jika query tidak jelas, sarankan fasilitas umum terdekat.
-    
-    **Format Output (JSON Array):**
-    `[{{"name": "Nama Faskes", "type": "HOSPITAL", "address": "Alamat Lengkap", "latitude": -6.2000, "longitude": 106.8000, ...}}]`
-    
-    **KEMBALIKAN HANYA JSON ARRAY.**
-    """
-    json_string = await _call_gemini_with_prompt(prompt)
-    if not json_string:
-        return []
-    try:
-        facilities = json.loads(json_string)
-        if isinstance(facilities, list):
-            return facilities
+async def rerank_facilities_with_gemini(query: str, candidates: List[Dict[str, Any]]) -> List[str]:
+    if not candidates:
         return []
-    except json.JSONDecodeError:
+
+    candidate_ids = [candidate["id"] for candidate in candidates]
+    cache_key = hashlib.sha1(
+        "|".join([" ".join(query.lower().split()), *candidate_ids]).encode()
+    ).hexdigest()
+    cached_ids = await ai_cache.get(f"rerank:{cache_key}")
+    if cached_ids is not None:
+        return cached_ids
+
+    prompt = gemini_prompts.facility_rerank_prompt(query, candidates)
+    ranked_ids = await _generate_structured(CallType.FACILITY_SEARCH, prompt, List[str])
+    if ranked_ids is None:
         return []
 
+    known_ids = set(candidate_ids)
+    # Model kadang mengulang id yang sama; urutan kemunculan pertama dipertahankan.
+    ranked_ids = [item for item in dict.fromkeys(ranked_ids) if item in known_ids]
+    await ai_cache.set(f"rerank:{cache_key}", ranked_ids)
+    return ranked_ids
+
 async def generate_spending_recommendations(expenses: List[Dict[str, Any]]) -> List[str]:
     if not expenses:
         return [
@@ -151,32 +238,8 @@ async def generate_spending_recommendations(expenses: List[Dict[str, Any]]) -> L
             "Alokasikan dana darurat khusus untuk kebutuhan kesehatan.",
         ]
 
-    simplified_expenses = [
-        {k: v for k, v in exp.items() if k in ['category', 'total_price', 'medicine_name']}
-        for exp in expenses[:10]
-    ]
-
-    prompt = f"""
-    Anda adalah penasihat keuangan pribadi. Berdasarkan data pengeluaran berikut, berikan 3 rekomendasi praktis.
-    Fokus pada pola pengeluaran, potensi penghematan, dan tips anggaran.
-
-    **Data:**
-    ```json
-    {json.dumps(simplified_expenses, indent=2, default=str)}
-    ```
-
-    **Format output:** Array JSON berisi 3 string rekomendasi.
-    **Contoh:** `["Mengingat pengeluaran obat Anda cukup tinggi, coba diskusikan alternatif generik dengan dokter."]`
-    """
-    
-    json_string = await _call_gemini_with_prompt(prompt)
-    if not json_string:
+    prompt = gemini_prompts.spending_recommendations_prompt(expenses[:10])
+    recommendations = await _generate_structured(CallType.SPENDING_RECOMMENDATIONS, prompt, List[str])
+    if recommendations is None:
         return ["Gagal mendapatkan rekomendasi saat ini."]
-        
-    try:
-        recommendations = json.loads(json_string)
-        if isinstance(recommendations, list) and all(isinstance(item, str) for item in recommendations):
-            return recommendations
-        return ["Format rekomendasi tidak valid."]
-    except json.JSONDecodeError:
-        return ["Gagal memproses rekomendasi dari AI."]
\ No newline at end of file
+    return recommendations
\ No newline at end of file
@@ -0,0 +1,130 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClientSession, AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING
+
+from app.models.enums import LedgerEntryType
+from app.utils.serialization import serialize_mongo_document
+
+LEDGER_COLLECTION = "pool_ledger"
+SNAPSHOT_COLLECTION = "pool_balance_snapshots"
+STATEMENT_MAX_LIMIT = 200
+
+
+class LedgerEntryNotFoundError(LookupError):
+    pass
+
+
+class InsufficientBalanceError(ValueError):
+    pass
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase) -> None:
+    await db[LEDGER_COLLECTION].create_index([("pool_id", ASCENDING), ("_id", ASCENDING)])
+    # Satu entri per (sumber, jenis): pencatatan ulang dari retry/webhook ganda ditolak.
+    await db[LEDGER_COLLECTION].create_index([("source_id", ASCENDING), ("type", ASCENDING)], unique=True)
+    await db[SNAPSHOT_COLLECTION].create_index([("pool_id", ASCENDING), ("entry_id", DESCENDING)], unique=True)
+
+
+async def record_entry(
+    db: AsyncIOMotorDatabase,
+    pool_id: ObjectId,
+    entry_type: LedgerEntryType,
+    amount: float,
+    source_id: ObjectId,
+    session: Optional[AsyncIOMotorClientSession] = None,
+    reverses: Optional[ObjectId] = None,
+    require_balance: bool = False,
+) -> Dict[str, Any]:
+    # amount bertanda: positif menambah saldo pool, negatif mengurangi.
+    # Pemanggil menjalankan ini dalam transaksi bersama perubahan status sumbernya.
+    now = datetime.utcnow()
+    balance_update = {"$inc": {"current_amount": float(amount)}, "$set": {"updatedAt": now}}
+    guarded = require_balance and amount < 0
+    if guarded:
+        # Debit bersyarat: $inc hanya berlaku bila saldo mencukupi, diperiksa atomik oleh server
+        # sebelum entri ledger ditulis.
+        debited = await db["pools"].update_one(
+            {"_id": pool_id, "current_amount": {"$gte": -float(amount)}}, balance_update, session=session
+        )
+        if not debited.modified_count:
+            raise InsufficientBalanceError(f"Saldo pool {pool_id} tidak mencukupi untuk debit {-amount}")
+    entry = {
+        "_id": ObjectId(),
+        "pool_id": pool_id,
+        "type": entry_type.value,
+        "amount": float(amount),
+        "source_id": source_id,
+        "created_at": now,
+    }
+    if reverses is not None:
+        entry["reverses"] = reverses
+    await db[LEDGER_COLLECTION].insert_one(entry, session=session)
+    if not guarded:
+        await db["pools"].update_one({"_id": pool_id}, balance_update, session=session)
+    return entry
+
+
+async def reverse_entry(
+    db: AsyncIOMotorDatabase,
+    source_id: ObjectId,
+    entry_type: LedgerEntryType,
+    session: Optional[AsyncIOMotorClientSession] = None,
+) -> Dict[str, Any]:
+    original = await db[LEDGER_COLLECTION].find_one({"source_id": source_id, "type": entry_type.value}, session=session)
+    if original is None:
+        # Dilempar (bukan dikembalikan None) agar transaksi pemanggil dibatalkan beserta perubahan status sumbernya.
+        raise LedgerEntryNotFoundError(f"Entri ledger {entry_type.value} untuk sumber {source_id} tidak ditemukan")
+    return await record_entry(
+        db, original["pool_id"], LedgerEntryType.REVERSAL, -original["amount"], source_id,
+        session=session, reverses=original["_id"],
+    )
+
+
+async def balance_through(db: AsyncIOMotorDatabase, pool_id: ObjectId, entry_id: ObjectId) -> float:
+    # Saldo setelah entry_id = snapshot terakhir sebelum/sama dengan entry_id + entri sesudah snapshot itu.
+    snapshot = await db[SNAPSHOT_COLLECTION].find_one(
+        {"pool_id": pool_id, "entry_id": {"$lte": entry_id}}, sort=[("entry_id", DESCENDING)]
+    )
+    id_range: Dict[str, Any] = {"$lte": entry_id}
+    opening = 0.0
+    if snapshot:
+        id_range["$gt"] = snapshot["entry_id"]
+        opening = snapshot["balance"]
+    rows = await db[LEDGER_COLLECTION].aggregate([
+        {"$match": {"pool_id": pool_id, "_id": id_range}},
+        {"$group": {"_id": None, "total": {"$sum": "$amount"}}},
+    ]).to_list(length=1)
+    return opening + (rows[0]["total"] if rows else 0.0)
+
+
+async def get_statement(
+    db: AsyncIOMotorDatabase, pool_id: str, limit: int = 50, after: Optional[str] = None
+) -> Dict[str, Any]:
+    pool_object_id = ObjectId(pool_id)
+    limit = max(1, min(limit, STATEMENT_MAX_LIMIT))
+    match: Dict[str, Any] = {"pool_id": pool_object_id}
+    opening = 0.0
+    if after:
+        match["_id"] = {"$gt": ObjectId(after)}
+        opening = await balance_through(db, pool_object_id, ObjectId(after))
+
+    pipeline: List[Dict[str, Any]] = [
+        {"$match": match},
+        {"$sort": {"_id": 1}},
+        {"$limit": limit},
+        {"$setWindowFields": {
+            "sortBy": {"_id": 1},
+            "output": {"running_total": {"$sum": "$amount", "window": {"documents": ["unbounded", "current"]}}},
+        }},
+        {"$addFields": {"balance": {"$add": ["$running_total", opening]}}},
+        {"$project": {"running_total": 0}},
+    ]
+    entries = await db[LEDGER_COLLECTION].aggregate(pipeline).to_list(length=limit)
+    return {
+        "entries": [serialize_mongo_document({**entry, "id": entry["_id"]}) for entry in entries],
+        "openingBalance": opening,
+        "nextCursor": str(entries[-1]["_id"]) if len(entries) == limit else None,
+    }
\ No newline at end of file
@@ -1,24 +1,76 @@
+import logging
 import random
 import string
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 from bson import ObjectId
 from fastapi import HTTPException, status
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
 
-from app.models.enums import (DisbursementStatus, JoinRequestStatus,
+from app.models.enums import (DisbursementStatus, JoinRequestOutcome, JoinRequestStatus, LedgerEntryType,
                               PoolMemberRole, PoolStatus, ContributionStatus, VoteOption)
 from app.models.pool import (CreateDisbursementRequest, PoolCreate,
                              PoolUpdate, VoteCreate)
 from app.models.user import UserPublic
-from app.services import payment_service
+from app.core.cache import pool_cache
+from app.core.db import run_in_transaction
+from app.core.invalidation import InvalidationEvent, invalidation_bus
+from app.services import disbursement_events, ledger_service, payment_service
+from app.utils.serialization import serialize_mongo_document
 
+logger = logging.getLogger(__name__)
+
+POOL_CODE_ATTEMPTS = 5
+MEMBERS_INDEX = "pool_id_1_user_id_1"
+MEMBERS_INDEX_KEYS = [("pool_id", ASCENDING), ("user_id", ASCENDING)]
+
+# transaction_status Midtrans -> status kontribusi, beserta transisi yang diizinkan.
+MIDTRANS_CONTRIBUTION_STATUS = {
+    "settlement": ContributionStatus.SUCCESS, "capture": ContributionStatus.SUCCESS,
+    "deny": ContributionStatus.FAILED, "cancel": ContributionStatus.FAILED,
+    "expire": ContributionStatus.FAILED, "failure": ContributionStatus.FAILED,
+    "refund": ContributionStatus.REFUNDED, "chargeback": ContributionStatus.REFUNDED,
+}
+CONTRIBUTION_TRANSITIONS = {
+    ContributionStatus.PENDING: {ContributionStatus.SUCCESS, ContributionStatus.FAILED},
+    ContributionStatus.SUCCESS: {ContributionStatus.REFUNDED},
+}
+
+async def has_duplicate_memberships(db: AsyncIOMotorDatabase) -> bool:
+    pipeline = [
+        {"$group": {"_id": {"pool_id": "$pool_id", "user_id": "$user_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+        {"$limit": 1},
+    ]
+    return bool(await db["pool_members"].aggregate(pipeline, allowDiskUse=True).to_list(length=1))
+
+async def ensure_indexes(db: AsyncIOMotorDatabase) -> None:
+    await db["pools"].create_index([("pool_code", ASCENDING)], unique=True)
+    await db["pool_members"].create_index([("user_id", ASCENDING)])
+    members_index = (await db["pool_members"].index_information()).get(MEMBERS_INDEX)
+    if members_index and members_index.get("unique"):
+        return
+    # Indeks lama (pool_id, user_id) non-unik diganti versi unik. Selama masih ada keanggotaan ganda,
+    # indeks lama dipertahankan dan API tetap start; duplikat dibersihkan job dedupe_pool_members.
+    if await has_duplicate_memberships(db):
+        logger.warning("Keanggotaan pool ganda ditemukan; indeks unik belum dibuat. Jalankan python -m app.jobs.dedupe_pool_members")
+        return
+    if members_index:
+        await db["pool_members"].drop_index(MEMBERS_INDEX)
+    try:
+        await db["pool_members"].create_index(MEMBERS_INDEX_KEYS, unique=True, name=MEMBERS_INDEX)
+    except DuplicateKeyError:
+        # Duplikat masuk di antara pengecekan dan build: kembalikan indeks lama agar query tetap terindeks.
+        await db["pool_members"].create_index(MEMBERS_INDEX_KEYS, name=MEMBERS_INDEX)
+        logger.warning("Gagal membuat indeks unik pool_members; indeks lama dipulihkan. Jalankan python -m app.jobs.dedupe_pool_members")
 
 def _fix_document_id(doc: Dict) -> Dict:
     if doc and "_id" in doc:
         doc["id"] = str(doc["_id"])
-    return doc
+    return serialize_mongo_document(doc)
 
 async def _check_is_pool_admin(db: AsyncIOMotorDatabase, pool_id: str, user_id: str) -> bool:
     admin_membership = await db["pool_members"].find_one({
@@ -32,31 +84,37 @@ def _generate_pool_code(length=8):
     return ''.join(random.choices(string.ascii_uppercase + string.digits, k=length))
 
 async def create_pool(db: AsyncIOMotorDatabase, user_id: str, pool_data: PoolCreate) -> Dict:
-    pool_code = _generate_pool_code()
-    while await db["pools"].find_one({"pool_code": pool_code}):
-        pool_code = _generate_pool_code()
-        
+    now = datetime.utcnow()
     new_pool_doc = pool_data.model_dump()
     new_pool_doc.update({
+        "_id": ObjectId(),
         "creator_user_id": ObjectId(user_id),
-        "pool_code": pool_code,
         "current_amount": 0,
+        "member_count": 1,
         "status": PoolStatus.OPEN,
-        "createdAt": datetime.utcnow(),
-        "updatedAt": datetime.utcnow()
+        "createdAt": now,
+        "updatedAt": now
     })
-    
-    result = await db["pools"].insert_one(new_pool_doc)
-    pool_id = result.inserted_id
-
     admin_member_doc = {
-        "pool_id": pool_id, "user_id": ObjectId(user_id),
-        "role": PoolMemberRole.ADMIN, "joined_date": datetime.utcnow(),
+        "pool_id": new_pool_doc["_id"], "user_id": ObjectId(user_id),
+        "role": PoolMemberRole.ADMIN, "joined_date": now,
     }
-    await db["pool_members"].insert_one(admin_member_doc)
-    
-    created_pool = await db["pools"].find_one({"_id": pool_id})
-    return _fix_document_id(created_pool)
+
+    async def insert_pool_with_admin(session) -> None:
+        await db["pools"].insert_one(new_pool_doc, session=session)
+        await db["pool_members"].insert_one(admin_member_doc, session=session)
+
+    # Keunikan pool_code dijaga indeks unik; bentrok (sangat jarang) cukup diulang dengan kode baru.
+    for attempt in range(POOL_CODE_ATTEMPTS):
+        new_pool_doc["pool_code"] = _generate_pool_code()
+        try:
+            await run_in_transaction(db, insert_pool_with_admin)
+            break
+        except DuplicateKeyError:
+            if attempt == POOL_CODE_ATTEMPTS - 1:
+                raise
+
+    return _fix_document_id(new_pool_doc)
 
 async def get_user_pools(db: AsyncIOMotorDatabase, user_id: str) -> List[Dict]:
     member_of_docs = await db["pool_members"].find({"user_id": ObjectId(user_id)}).to_list(length=None)
@@ -68,10 +126,15 @@ async def get_user_pools(db: AsyncIOMotorDatabase, user_id: str) -> List[Dict]:
 async def get_pool_by_id(db: AsyncIOMotorDatabase, pool_id: str) -> Dict:
     if not ObjectId.is_valid(pool_id):
         raise HTTPException(status_code=404, detail="Pool not found")
+    cached_pool = await pool_cache.get(f"id:{pool_id}")
+    if cached_pool is not None:
+        return cached_pool
     pool = await db["pools"].find_one({"_id": ObjectId(pool_id)})
     if not pool:
         raise HTTPException(status_code=404, detail="Pool not found")
-    return _fix_document_id(pool)
+    pool = _fix_document_id(pool)
+    await pool_cache.set(f"id:{pool_id}", pool)
+    return pool
 
 async def update_pool(db: AsyncIOMotorDatabase, user_id: str, pool_id: str, update_data: PoolUpdate) -> Dict:
     if not await _check_is_pool_admin(db, pool_id, user_id):
@@ -83,13 +146,20 @@ async def update_pool(db: AsyncIOMotorDatabase, user_id: str, pool_id: str, upda
     
     update_doc["updatedAt"] = datetime.utcnow()
     
-    await db["pools"].update_one(
+    updated_pool = await db["pools"].find_one_and_update(
         {"_id": ObjectId(pool_id)},
-        {"$set": update_doc}
+        {"$set": update_doc},
+        return_document=ReturnDocument.AFTER
     )
-    return await get_pool_by_id(db, pool_id)
+    if not updated_pool:
+        raise HTTPException(status_code=404, detail="Pool not found")
+    await pool_cache.delete(f"id:{pool_id}")
+    return _fix_document_id(updated_pool)
 
 async def get_pool_members(db: AsyncIOMotorDatabase, pool_id: str) -> List[Dict]:
+    cached_members = await pool_cache.get(f"members:{pool_id}")
+    if cached_members is not None:
+        return cached_members
     pipeline = [
         {"$match": {"pool_id": ObjectId(pool_id)}},
         {"$lookup": {
@@ -105,6 +175,8 @@ async def get_pool_members(db: AsyncIOMotorDatabase, pool_id: str) -> List[Dict]
         }}
     ]
     members = await db["pool_members"].aggregate(pipeline).to_list(length=None)
+    members = [_fix_document_id(member) for member in members]
+    await pool_cache.set(f"members:{pool_id}", members)
     return members
 
 async def get_user_membership(db: AsyncIOMotorDatabase, pool_id: str, user_id: str) -> Dict:
@@ -114,7 +186,7 @@ async def get_user_membership(db: AsyncIOMotorDatabase, pool_id: str, user_id: s
     return _fix_document_id(membership)
 
 async def request_to_join(db: AsyncIOMotorDatabase, user_id: str, pool_code: str) -> Dict:
-    pool = await db["pools"].find_one({"pool_code": pool_code.upper()})
+    pool = await db["pools"].find_one({"pool_code": pool_code.upper()}, {"_id": 1})
     if not pool:
         raise HTTPException(status_code=404, detail="Pool with this code not found")
     
@@ -122,63 +194,336 @@ async def request_to_join(db: AsyncIOMotorDatabase, user_id: str, pool_code: str
         "pool_id": pool["_id"], "user_id": ObjectId(user_id),
         "status": JoinRequestStatus.PENDING, "requested_at": datetime.utcnow()
     }
-    result = await db["join_requests"].insert_one(new_request)
-    created_request = await db["join_requests"].find_one({"_id": result.inserted_id})
-    return _fix_document_id(created_request)
+    await db["join_requests"].insert_one(new_request)
+    return {"joinRequest": _fix_document_id(new_request), "message": "Join request submitted successfully"}
 
-async def update_join_request(db: AsyncIOMotorDatabase, user_id: str, request_id: str, new_status: str) -> Dict:
-    request_doc = await db["join_requests"].find_one({"_id": ObjectId(request_id)})
-    if not request_doc:
-        raise HTTPException(status_code=404, detail="Join request not found")
+async def _pool_moderation_state(
+    db: AsyncIOMotorDatabase, user_id: str, pool_ids: List[ObjectId], candidate_user_ids: List[ObjectId]
+) -> Dict[ObjectId, Dict]:
+    # Satu agregasi untuk semua pool: hak admin, jumlah anggota, anggota yang sudah ada, dan max_members.
+    pipeline = [
+        {"$match": {"pool_id": {"$in": pool_ids}}},
+        {"$group": {
+            "_id": "$pool_id",
+            "member_count": {"$sum": 1},
+            "is_admin": {"$max": {"$and": [
+                {"$eq": ["$user_id", ObjectId(user_id)]}, {"$eq": ["$role", PoolMemberRole.ADMIN]}
+            ]}},
+            "existing": {"$push": {"$cond": [{"$in": ["$user_id", candidate_user_ids]}, "$user_id", "$$REMOVE"]}},
+        }},
+        {"$lookup": {"from": "pools", "localField": "_id", "foreignField": "_id", "as": "pool"}},
+        {"$unwind": "$pool"},
+        {"$project": {
+            "member_count": 1, "is_admin": 1, "existing": 1,
+            "max_members": "$pool.max_members", "stored_count": "$pool.member_count",
+        }},
+    ]
+    return {state["_id"]: state async for state in db["pool_members"].aggregate(pipeline)}
 
-    if not await _check_is_pool_admin(db, str(request_doc["pool_id"]), user_id):
-        raise HTTPException(status_code=403, detail="Not authorized")
+async def moderate_join_requests(db: AsyncIOMotorDatabase, user_id: str, decisions: List[Dict]) -> Dict:
+    new_status = {decision["request_id"]: decision["status"] for decision in decisions}
+    valid_ids = [ObjectId(request_id) for request_id in new_status if ObjectId.is_valid(request_id)]
+    requests = {str(doc["_id"]): doc async for doc in db["join_requests"].find({"_id": {"$in": valid_ids}})}
+
+    pool_ids = list({doc["pool_id"] for doc in requests.values()})
+    candidate_user_ids = list({doc["user_id"] for doc in requests.values()})
+    pools = await _pool_moderation_state(db, user_id, pool_ids, candidate_user_ids) if requests else {}
+    for pool_id, state in pools.items():
+        if state.get("stored_count") is None:
+            # Pool lama belum punya member_count; isi dari hitungan agregasi sebelum dipakai penjaga kapasitas.
+            await db["pools"].update_one(
+                {"_id": pool_id, "member_count": {"$exists": False}}, {"$set": {"member_count": state["member_count"]}}
+            )
+    members = {pool_id: set(state["existing"]) for pool_id, state in pools.items()}
+    free_slots = {pool_id: state["max_members"] - state["member_count"] for pool_id, state in pools.items()}
+
+    now = datetime.utcnow()
+    planned: List[tuple] = []
+    request_updates: List[UpdateOne] = []
+    approved: Dict[ObjectId, List[Dict]] = {}
+    for request_id in new_status:
+        request_doc = requests.get(request_id)
+        pool_id = request_doc["pool_id"] if request_doc else None
+        if not request_doc:
+            outcome = JoinRequestOutcome.NOT_FOUND
+        elif not pools.get(pool_id, {}).get("is_admin"):
+            outcome = JoinRequestOutcome.FORBIDDEN
+        elif request_doc["status"] != JoinRequestStatus.PENDING:
+            outcome = JoinRequestOutcome.ALREADY_PROCESSED
+        elif new_status[request_id] == JoinRequestStatus.REJECTED:
+            outcome = JoinRequestOutcome.REJECTED
+        elif request_doc["user_id"] in members[pool_id]:
+            outcome = JoinRequestOutcome.ALREADY_MEMBER
+        elif free_slots[pool_id] <= 0:
+            outcome = JoinRequestOutcome.POOL_FULL
+        else:
+            outcome = JoinRequestOutcome.APPROVED
+            members[pool_id].add(request_doc["user_id"])
+            free_slots[pool_id] -= 1
+            approved.setdefault(pool_id, []).append(request_doc)
+
+        if outcome in (JoinRequestOutcome.ALREADY_MEMBER, JoinRequestOutcome.REJECTED):
+            request_updates.append(UpdateOne(
+                {"_id": request_doc["_id"], "status": JoinRequestStatus.PENDING},
+                {"$set": {"status": new_status[request_id], "resolved_at": now}},
+            ))
+        planned.append((request_id, request_doc, outcome))
+
+    full_pools: set = set()
+
+    async def apply(session) -> None:
+        full_pools.clear()
+        for pool_id, docs in approved.items():
+            # Snapshot free_slots bisa basi bila dua admin menyetujui bersamaan; kapasitas ditegakkan
+            # oleh $inc bersyarat pada pool, dan pool yang sudah penuh menolak seluruh persetujuan batch ini.
+            result = await db["pools"].update_one(
+                {"_id": pool_id, "$expr": {"$lte": [{"$add": ["$member_count", len(docs)]}, "$max_members"]}},
+                {"$inc": {"member_count": len(docs)}},
+                session=session,
+            )
+            if not result.modified_count:
+                full_pools.add(pool_id)
+        admitted = [doc for pool_id, docs in approved.items() if pool_id not in full_pools for doc in docs]
 
-    if new_status == JoinRequestStatus.APPROVED:
-        await db["pool_members"].insert_one({
-            "pool_id": request_doc["pool_id"], "user_id": request_doc["user_id"],
-            "role": PoolMemberRole.MEMBER, "joined_date": datetime.utcnow()
+        updates = request_updates + [UpdateOne(
+            {"_id": doc["_id"], "status": JoinRequestStatus.PENDING},
+            {"$set": {"status": JoinRequestStatus.APPROVED, "resolved_at": now}},
+        ) for doc in admitted]
+        if updates:
+            result = await db["join_requests"].bulk_write(updates, ordered=False, session=session)
+            # Filter PENDING mencegah dua admin memproses permintaan yang sama; dalam transaksi seluruh batch dibatalkan.
+            if session is not None and result.modified_count != len(updates):
+                raise HTTPException(status_code=409, detail="Some join requests were processed concurrently, please retry")
+        if admitted:
+            # Upsert pada indeks unik (pool_id, user_id): keanggotaan yang terbentuk bersamaan tidak terduplikasi.
+            result = await db["pool_members"].bulk_write([UpdateOne(
+                {"pool_id": doc["pool_id"], "user_id": doc["user_id"]},
+                {"$setOnInsert": {"role": PoolMemberRole.MEMBER, "joined_date": now}},
+                upsert=True,
+            ) for doc in admitted], ordered=False, session=session)
+            # Upsert yang menemukan anggota yang sudah ada tidak menambah kursi; kembalikan kelebihan $inc.
+            surplus: Dict[ObjectId, int] = {}
+            for index, doc in enumerate(admitted):
+                if index not in result.upserted_ids:
+                    surplus[doc["pool_id"]] = surplus.get(doc["pool_id"], 0) + 1
+            for pool_id, count in surplus.items():
+                await db["pools"].update_one({"_id": pool_id}, {"$inc": {"member_count": -count}}, session=session)
+
+    if request_updates or approved:
+        await run_in_transaction(db, apply)
+
+    outcomes: List[Dict] = []
+    for request_id, request_doc, outcome in planned:
+        if outcome == JoinRequestOutcome.APPROVED and request_doc["pool_id"] in full_pools:
+            outcome = JoinRequestOutcome.POOL_FULL
+        if outcome in (JoinRequestOutcome.APPROVED, JoinRequestOutcome.ALREADY_MEMBER, JoinRequestOutcome.REJECTED):
+            request_doc.update(status=new_status[request_id], resolved_at=now)
+        outcomes.append({
+            "requestId": request_id,
+            "outcome": outcome,
+            "request": _fix_document_id(dict(request_doc)) if request_doc and outcome != JoinRequestOutcome.FORBIDDEN else None,
         })
-    
-    await db["join_requests"].update_one(
-        {"_id": ObjectId(request_id)},
-        {"$set": {"status": new_status, "resolved_at": datetime.utcnow()}}
-    )
-    return {"message": f"Request has been {new_status.lower()}"}
+    for pool_id in approved.keys() - full_pools:
+        await pool_cache.delete(f"members:{pool_id}")
+        await pool_cache.delete(f"id:{pool_id}")
+
+    processed = sum(1 for item in outcomes if item["outcome"] in (JoinRequestOutcome.APPROVED, JoinRequestOutcome.REJECTED))
+    return {"results": outcomes, "message": f"{processed} of {len(outcomes)} join requests processed"}
+
+async def update_join_request(db: AsyncIOMotorDatabase, user_id: str, request_id: str, new_status: str) -> Dict:
+    result = await moderate_join_requests(db, user_id, [{"request_id": request_id, "status": new_status}])
+    item = result["results"][0]
+    if item["outcome"] == JoinRequestOutcome.NOT_FOUND:
+        raise HTTPException(status_code=404, detail="Join request not found")
+    if item["outcome"] == JoinRequestOutcome.FORBIDDEN:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    if item["outcome"] == JoinRequestOutcome.ALREADY_PROCESSED:
+        raise HTTPException(status_code=400, detail="Join request has already been processed")
+    if item["outcome"] == JoinRequestOutcome.POOL_FULL:
+        raise HTTPException(status_code=400, detail="Pool has reached its maximum number of members")
+    return {"updatedRequest": item["request"], "message": f"Request has been {new_status.lower()}"}
 
 async def create_contribution(db: AsyncIOMotorDatabase, user: UserPublic, pool_id: str, amount: float) -> Dict:
-    new_contrib = {
-        "pool_id": ObjectId(pool_id), "member_id": ObjectId(user.id), "amount": amount,
-        "contribution_date": datetime.utcnow(), "status": ContributionStatus.PENDING
-    }
-    result = await db["contributions"].insert_one(new_contrib)
-    contrib_id = str(result.inserted_id)
+    # _id dibuat lokal agar order_id Midtrans tersedia sebelum insert; cukup satu tulis dengan token pembayaran.
+    contrib_id = ObjectId()
+    midtrans_data = await payment_service.create_midtrans_snap_transaction(str(contrib_id), amount, user)
 
-    midtrans_data = await payment_service.create_midtrans_snap_transaction(contrib_id, amount, user)
-    
-    await db["contributions"].update_one(
-        {"_id": result.inserted_id},
-        {"$set": {"payment_gateway_reference_id": midtrans_data["token"]}}
-    )
-    
-    return {"contributionId": contrib_id, "paymentToken": midtrans_data["token"]}
+    await db["contributions"].insert_one({
+        "_id": contrib_id, "pool_id": ObjectId(pool_id), "member_id": ObjectId(user.id), "amount": amount,
+        "contribution_date": datetime.utcnow(), "status": ContributionStatus.PENDING,
+        "payment_gateway_reference_id": midtrans_data["token"]
+    })
+    return {"contributionId": str(contrib_id), "paymentToken": midtrans_data["token"]}
+
+async def get_pool_statement(
+    db: AsyncIOMotorDatabase, user_id: str, pool_id: str, limit: int = 50, after: Optional[str] = None
+) -> Dict:
+    if not ObjectId.is_valid(pool_id) or (after and not ObjectId.is_valid(after)):
+        raise HTTPException(status_code=404, detail="Pool not found")
+    if not await db["pool_members"].find_one({"pool_id": ObjectId(pool_id), "user_id": ObjectId(user_id)}, {"_id": 1}):
+        raise HTTPException(status_code=403, detail="Only pool members can view the statement")
+    return await ledger_service.get_statement(db, pool_id, limit=limit, after=after)
 
 async def get_my_contributions(db: AsyncIOMotorDatabase, user_id: str, pool_id: str) -> List[Dict]:
     cursor = db["contributions"].find({"member_id": ObjectId(user_id), "pool_id": ObjectId(pool_id)}).sort("contribution_date", -1)
     return [_fix_document_id(doc) async for doc in cursor]
 
-async def create_disbursement(db: AsyncIOMotorDatabase, requested_by_user_id: str, pool_id: str, data: CreateDisbursementRequest) -> Dict:
-    
+async def _apply_contribution_status(db: AsyncIOMotorDatabase, contribution: Dict, new_status: ContributionStatus) -> Optional[Dict]:
+    async def apply(session) -> Optional[Dict]:
+        # Filter status lama membuat transisi (dan entri ledger-nya) terjadi tepat sekali.
+        updated = await db["contributions"].find_one_and_update(
+            {"_id": contribution["_id"], "status": contribution["status"]},
+            {"$set": {"status": new_status, "status_updated_at": datetime.utcnow()}},
+            return_document=ReturnDocument.AFTER,
+            session=session
+        )
+        if updated is None:
+            return None
+        if new_status == ContributionStatus.SUCCESS:
+            await ledger_service.record_entry(
+                db, updated["pool_id"], LedgerEntryType.CONTRIBUTION, updated["amount"], updated["_id"], session=session
+            )
+        elif new_status == ContributionStatus.REFUNDED:
+            await ledger_service.reverse_entry(db, updated["_id"], LedgerEntryType.CONTRIBUTION, session=session)
+        return updated
+
+    return await run_in_transaction(db, apply)
+
+async def check_contribution_status(db: AsyncIOMotorDatabase, user_id: str, contribution_id: str) -> Dict:
+    if not ObjectId.is_valid(contribution_id):
+        raise HTTPException(status_code=404, detail="Contribution not found")
+    contribution = await db["contributions"].find_one({"_id": ObjectId(contribution_id), "member_id": ObjectId(user_id)})
+    if not contribution:
+        raise HTTPException(status_code=404, detail="Contribution not found")
+
+    allowed = CONTRIBUTION_TRANSITIONS.get(contribution["status"])
+    if allowed:
+        # Tagihan billing yang ditokenisasi ulang memakai order_id bersufiks; kontribusi biasa memakai _id-nya.
+        order_id = contribution.get("payment_order_id") or contribution_id
+        midtrans_data = await payment_service.get_midtrans_transaction_status(order_id)
+        new_status = MIDTRANS_CONTRIBUTION_STATUS.get(midtrans_data.get("transaction_status"))
+        if new_status in allowed:
+            try:
+                updated = await _apply_contribution_status(db, contribution, new_status)
+            except ledger_service.LedgerEntryNotFoundError:
+                raise HTTPException(status_code=409, detail="Contribution has no ledger entry to reverse")
+            # None berarti request lain sudah memproses transisi ini lebih dulu.
+            contribution = updated or await db["contributions"].find_one({"_id": contribution["_id"]})
+            await pool_cache.delete(f"id:{contribution['pool_id']}")
+
+    return {"contributionId": contribution_id, "status": contribution["status"]}
+
+async def create_disbursement(db: AsyncIOMotorDatabase, user_id: str, pool_id: str, data: CreateDisbursementRequest) -> Dict:
     new_disbursement_doc = data.model_dump()
     new_disbursement_doc.update({
         "pool_id": ObjectId(pool_id),
-        "requested_by_user_id": ObjectId(requested_by_user_id),
+        "requested_by_user_id": ObjectId(user_id),
         "recipient_user_id": ObjectId(data.recipient_user_id),
         "status": DisbursementStatus.PENDING_VOTE,
         "request_date": datetime.utcnow(),
         "votes_for": 0, "votes_against": 0, "voters": []
     })
     
-    result = await db["disbursements"].insert_one(new_disbursement_doc)
-    created_doc = await db["disbursements"].find_one({"_id": result.inserted_id})
-    return _fix_document_id(created_doc)
\ No newline at end of file
+    await db["disbursements"].insert_one(new_disbursement_doc)
+    disbursement_events.publish_local("insert", new_disbursement_doc["_id"], {}, new_disbursement_doc)
+    return _fix_document_id(new_disbursement_doc)
+
+async def vote_on_disbursement(
+    db: AsyncIOMotorDatabase, user_id: str, disbursement_id: str, vote: str, comment: Optional[str] = None
+) -> Dict:
+    if not ObjectId.is_valid(disbursement_id):
+        raise HTTPException(status_code=404, detail="Disbursement not found")
+
+    disbursement = await db["disbursements"].find_one({"_id": ObjectId(disbursement_id)}, {"pool_id": 1})
+    if not disbursement:
+        raise HTTPException(status_code=404, detail="Disbursement not found")
+
+    pool_id = disbursement["pool_id"]
+    if not await db["pool_members"].find_one({"pool_id": pool_id, "user_id": ObjectId(user_id)}, {"_id": 1}):
+        raise HTTPException(status_code=403, detail="Only pool members can vote")
+
+    vote_doc = {"user_id": ObjectId(user_id), "vote": vote, "voted_at": datetime.utcnow(), "comment": comment}
+    counter_field = "votes_for" if vote == VoteOption.FOR else "votes_against"
+    # Filter status dan voters membuat pemungutan suara atomik: satu suara per anggota.
+    updated = await db["disbursements"].find_one_and_update(
+        {"_id": ObjectId(disbursement_id), "status": DisbursementStatus.PENDING_VOTE, "voters.user_id": {"$ne": ObjectId(user_id)}},
+        {"$push": {"voters": vote_doc}, "$inc": {counter_field: 1}},
+        return_document=ReturnDocument.AFTER
+    )
+    if not updated:
+        raise HTTPException(status_code=400, detail="Voting is closed or you have already voted")
+    changed_fields = {counter_field: updated[counter_field]}
+
+    member_count = await db["pool_members"].count_documents({"pool_id": pool_id})
+    new_status = None
+    if updated["votes_for"] * 2 > member_count:
+        new_status = DisbursementStatus.APPROVED
+    elif updated["votes_against"] * 2 >= member_count:
+        new_status = DisbursementStatus.REJECTED
+
+    if new_status:
+        resolved_at = datetime.utcnow()
+
+        async def resolve(session) -> bool:
+            result = await db["disbursements"].update_one(
+                {"_id": updated["_id"], "status": DisbursementStatus.PENDING_VOTE},
+                {"$set": {"status": new_status, "resolved_at": resolved_at}},
+                session=session
+            )
+            # Dana pool dianggap keluar saat pencairan disetujui; pembayaran gagal dicatat sebagai REVERSAL.
+            if result.modified_count and new_status == DisbursementStatus.APPROVED:
+                try:
+                    await ledger_service.record_entry(
+                        db, pool_id, LedgerEntryType.DISBURSEMENT, -updated["amount"], updated["_id"],
+                        session=session, require_balance=True,
+                    )
+                except ledger_service.InsufficientBalanceError:
+                    if session is None:
+                        # Tanpa transaksi, status yang sudah ditulis dikembalikan secara manual.
+                        await db["disbursements"].update_one(
+                            {"_id": updated["_id"], "status": new_status},
+                            {"$set": {"status": DisbursementStatus.PENDING_VOTE}, "$unset": {"resolved_at": ""}},
+                        )
+                    raise
+            return bool(result.modified_count)
+
+        try:
+            resolved = await run_in_transaction(db, resolve)
+        except ledger_service.InsufficientBalanceError:
+            # Saldo belum mencukupi: suara tetap tercatat dan pencairan tetap PENDING_VOTE; suara berikutnya memeriksa ulang.
+            logger.warning("Saldo pool tidak mencukupi untuk pencairan yang disetujui",
+                           extra={"pool_id": str(pool_id), "disbursement_id": disbursement_id})
+            resolved = False
+        if resolved:
+            updated.update({"status": new_status, "resolved_at": resolved_at})
+            changed_fields.update({"status": new_status, "resolved_at": resolved_at})
+            await pool_cache.delete(f"id:{pool_id}")
+    disbursement_events.publish_local("update", updated["_id"], changed_fields, updated)
+
+    return {"disbursement": _fix_document_id(updated), "message": "Vote recorded successfully"}
+
+
+async def open_disbursement_stream(db: AsyncIOMotorDatabase, user_id: str, pool_id: str) -> AsyncIterator[str]:
+    if not ObjectId.is_valid(pool_id):
+        raise HTTPException(status_code=404, detail="Pool not found")
+    if not await db["pool_members"].find_one({"pool_id": ObjectId(pool_id), "user_id": ObjectId(user_id)}, {"_id": 1}):
+        raise HTTPException(status_code=403, detail="Only pool members can follow disbursements")
+    if disbursement_events.disbursement_hub.full:
+        raise HTTPException(status_code=503, detail="Too many live connections, please retry later")
+    return disbursement_events.stream(db, pool_id)
+
+
+async def _invalidate_pool(event: InvalidationEvent) -> None:
+    await pool_cache.delete(f"id:{event.document_id}")
+
+
+async def _invalidate_pool_members(event: InvalidationEvent) -> None:
+    pool_ids = event.values("pool_id")
+    if not pool_ids:
+        await pool_cache.clear("members:")
+    for pool_id in pool_ids:
+        await pool_cache.delete(f"members:{pool_id}")
+
+
+invalidation_bus.register("pools", _invalidate_pool, on_reset=pool_cache.clear)
+invalidation_bus.register("pool_members", _invalidate_pool_members, fields=["pool_id"])
\ No newline at end of file
@@ -1,13 +1,23 @@
+import asyncio
 import httpx
 import base64
+import hashlib
+import logging
+from typing import Optional
 from app.core.config import settings
 from app.models.user import UserPublic
 
+logger = logging.getLogger(__name__)
+
 async def create_midtrans_snap_transaction(
     contribution_id: str, 
     amount: float, 
-    user: UserPublic
+    user: UserPublic,
+    client: Optional[httpx.AsyncClient] = None
 ) -> dict:
+    if settings.MIDTRANS_BACKEND == "fake":
+        return await _create_fake_snap_transaction(contribution_id)
+
     if not settings.MIDTRANS_SERVER_KEY:
         raise Exception("Midtrans Server Key tidak dikonfigurasi.")
 
@@ -32,18 +42,55 @@ async def create_midtrans_snap_transaction(
         },
     }
 
-    async with httpx.AsyncClient() as client:
+    # Pemanggil massal (billing) mengirim client bersama agar koneksi HTTP dipakai ulang.
+    if client is None:
+        async with httpx.AsyncClient() as own_client:
+            response = await own_client.post(api_url, json=payload, headers=headers)
+    else:
         response = await client.post(api_url, json=payload, headers=headers)
+
+    if response.status_code != 201:
+        logger.error(
+            "Midtrans Error",
+            extra={"order_id": contribution_id, "status_code": response.status_code, "response": response.text[:1000]},
+        )
+        raise Exception(f"Gagal membuat transaksi Midtrans: {response.text}")
         
-        if response.status_code != 201:
-            print(f"Midtrans Error: {response.text}")
-            raise Exception(f"Gagal membuat transaksi Midtrans: {response.text}")
-            
-        response_data = response.json()
-        if "token" not in response_data:
-            raise Exception("Midtrans tidak mengembalikan token transaksi.")
-            
-        return {
-            "token": response_data["token"],
-            "redirect_url": response_data["redirect_url"]
-        }
\ No newline at end of file
+    response_data = response.json()
+    if "token" not in response_data:
+        raise Exception("Midtrans tidak mengembalikan token transaksi.")
+        
+    return {
+        "token": response_data["token"],
+        "redirect_url": response_data["redirect_url"]
+    }
+
+async def get_midtrans_transaction_status(order_id: str) -> dict:
+    if settings.MIDTRANS_BACKEND == "fake":
+        return {"order_id": order_id, "transaction_status": "settlement"}
+
+    if not settings.MIDTRANS_SERVER_KEY:
+        raise Exception("Midtrans Server Key tidak dikonfigurasi.")
+
+    auth_string = base64.b64encode(f"{settings.MIDTRANS_SERVER_KEY}:".encode()).decode()
+    headers = {"Accept": "application/json", "Authorization": f"Basic {auth_string}"}
+    async with httpx.AsyncClient() as client:
+        response = await client.get(f"https://api.sandbox.midtrans.com/v2/{order_id}/status", headers=headers)
+
+    if response.status_code != 200:
+        logger.error(
+            "Midtrans Error",
+            extra={"order_id": order_id, "status_code": response.status_code, "response": response.text[:1000]},
+        )
+        raise Exception(f"Gagal memeriksa status transaksi Midtrans: {response.text}")
+    return response.json()
+
+async def _create_fake_snap_transaction(contribution_id: str) -> dict:
+    # Backend palsu untuk benchmark/pengembangan lokal: tidak ada panggilan jaringan ke Midtrans.
+    if settings.MIDTRANS_FAKE_LATENCY_SECONDS:
+        await asyncio.sleep(settings.MIDTRANS_FAKE_LATENCY_SECONDS)
+    token = hashlib.sha1(contribution_id.encode()).hexdigest()
+    return {
+        "token": token,
+        "redirect_url": f"https://app.sandbox.midtrans.com/snap/v2/vtweb/{token}"
+    }
\ No newline at end of file
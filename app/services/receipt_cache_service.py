@@ -0,0 +1,61 @@
+import logging
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+OCR_CACHE_COLLECTION = "receipt_ocr_cache"
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase) -> None:
+    await db[OCR_CACHE_COLLECTION].create_index(
+        [("createdAt", ASCENDING)], expireAfterSeconds=settings.RECEIPT_OCR_CACHE_TTL_SECONDS
+    )
+    # Pencocokan perceptual hash dibatasi per pengguna; indeks lama tanpa user_id tidak terpakai lagi.
+    if "perceptual_hash_1" in await db[OCR_CACHE_COLLECTION].index_information():
+        await db[OCR_CACHE_COLLECTION].drop_index("perceptual_hash_1")
+    await db[OCR_CACHE_COLLECTION].create_index([("perceptual_hash", ASCENDING), ("user_id", ASCENDING)], sparse=True)
+
+
+async def get_cached_extraction(
+    db: AsyncIOMotorDatabase,
+    user_id: str,
+    content_hash: str,
+    perceptual_hash: Optional[str] = None,
+) -> Optional[Dict[str, Any]]:
+    # Byte identik boleh dipakai lintas pengguna, tetapi struk yang hanya mirip secara visual
+    # (foto ulang, struk berulang dari toko yang sama) hanya dicocokkan dengan unggahan pengguna itu sendiri.
+    cached = await db[OCR_CACHE_COLLECTION].find_one({"_id": content_hash}, {"extraction": 1})
+    if cached is None and perceptual_hash and settings.RECEIPT_PERCEPTUAL_DEDUP:
+        cached = await db[OCR_CACHE_COLLECTION].find_one(
+            {"perceptual_hash": perceptual_hash, "user_id": str(user_id)}, {"extraction": 1}
+        )
+
+    if cached is None:
+        return None
+    logger.info("Hasil OCR struk diambil dari cache", extra={"content_hash": content_hash})
+    return cached["extraction"]
+
+
+async def store_extraction(
+    db: AsyncIOMotorDatabase,
+    user_id: str,
+    content_hash: str,
+    extraction: Dict[str, Any],
+    perceptual_hash: Optional[str] = None,
+) -> None:
+    await db[OCR_CACHE_COLLECTION].update_one(
+        {"_id": content_hash},
+        {"$setOnInsert": {
+            "extraction": extraction,
+            "perceptual_hash": perceptual_hash,
+            "user_id": str(user_id),
+            "createdAt": datetime.utcnow(),
+        }},
+        upsert=True,
+    )
@@ -0,0 +1,125 @@
+import hashlib
+import io
+import logging
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import HTTPException, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class PreprocessedImage:
+    data: bytes
+    mime_type: str
+    original_bytes: int
+    width: int
+    height: int
+    content_hash: str = ""
+    perceptual_hash: Optional[str] = None
+
+    @property
+    def processed_bytes(self) -> int:
+        return len(self.data)
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.original_bytes - self.processed_bytes
+
+
+async def read_upload_limited(upload: UploadFile, max_bytes: int = None) -> bytes:
+    max_bytes = max_bytes or settings.RECEIPT_MAX_UPLOAD_BYTES
+    buffer = bytearray()
+    while True:
+        chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        buffer.extend(chunk)
+        if len(buffer) > max_bytes:
+            raise HTTPException(
+                status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Ukuran gambar melebihi batas {max_bytes // (1024 * 1024)} MB.",
+            )
+    if not buffer:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, detail="File gambar kosong.")
+    return bytes(buffer)
+
+
+def content_hash(image_bytes: bytes) -> str:
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+def difference_hash(image: Image.Image, hash_size: int = 8) -> str:
+    pixels = list(image.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.BILINEAR).getdata())
+    bits = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            left = pixels[row * (hash_size + 1) + col]
+            right = pixels[row * (hash_size + 1) + col + 1]
+            bits = (bits << 1) | (left > right)
+    return f"{bits:0{hash_size * hash_size // 4}x}"
+
+
+def downscale_receipt_image(
+    image_bytes: bytes,
+    mime_type: str,
+    max_dimension: int = None,
+    quality: int = None,
+) -> PreprocessedImage:
+    max_dimension = max_dimension or settings.RECEIPT_MAX_DIMENSION
+    quality = quality or settings.RECEIPT_JPEG_QUALITY
+
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as image:
+            # Untuk JPEG, draft() membiarkan decoder melakukan downscale pada
+            # level DCT sehingga foto 12 MP tidak perlu didekode penuh.
+            if image.format == "JPEG":
+                image.draft("RGB", (max_dimension, max_dimension))
+            image = ImageOps.exif_transpose(image)
+            image = image.convert("L")
+            image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+
+            output = io.BytesIO()
+            # Tidak meneruskan exif=... sehingga metadata (GPS, perangkat) dibuang.
+            image.save(output, format="JPEG", quality=quality, optimize=True)
+            width, height = image.size
+            perceptual_hash = difference_hash(image)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+        logger.warning("Gambar struk tidak dapat diproses, data asli dikirim apa adanya", extra={"mime_type": mime_type})
+        return PreprocessedImage(
+            data=image_bytes, mime_type=mime_type, original_bytes=len(image_bytes), width=0, height=0,
+            content_hash=content_hash(image_bytes),
+        )
+
+    return PreprocessedImage(
+        data=output.getvalue(),
+        mime_type="image/jpeg",
+        original_bytes=len(image_bytes),
+        width=width,
+        height=height,
+        content_hash=content_hash(image_bytes),
+        perceptual_hash=perceptual_hash,
+    )
+
+
+async def preprocess_receipt_upload(upload: UploadFile) -> PreprocessedImage:
+    image_bytes = await read_upload_limited(upload)
+    processed = await run_in_threadpool(downscale_receipt_image, image_bytes, upload.content_type)
+    logger.info(
+        "Gambar struk diproses",
+        extra={
+            "original_bytes": processed.original_bytes,
+            "processed_bytes": processed.processed_bytes,
+            "saved_bytes": processed.saved_bytes,
+            "width": processed.width,
+            "height": processed.height,
+        },
+    )
+    return processed
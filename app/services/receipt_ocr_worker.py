@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import random
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional, Set
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+
+from app.core.config import settings
+from app.models.enums import ReceiptStatus
+from app.services import expense_service, gemini_service, receipt_cache_service
+from app.services.gemini_governor import Priority
+
+logger = logging.getLogger(__name__)
+
+
+class ReceiptOcrWorkerPool:
+    def __init__(
+        self,
+        concurrency: int = None,
+        queue_size: int = None,
+        max_attempts: int = None,
+        retry_base_seconds: float = None,
+        lease_seconds: int = None,
+    ):
+        self.concurrency = concurrency or settings.RECEIPT_OCR_WORKERS
+        self.queue_size = queue_size or settings.RECEIPT_OCR_QUEUE_SIZE
+        self.max_attempts = max_attempts or settings.RECEIPT_OCR_MAX_ATTEMPTS
+        self.retry_base_seconds = retry_base_seconds or settings.RECEIPT_OCR_RETRY_BASE_SECONDS
+        self.lease_seconds = lease_seconds or settings.RECEIPT_OCR_LEASE_SECONDS
+        self.db: Optional[AsyncIOMotorDatabase] = None
+        self.queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._queued: Set[str] = set()
+
+    async def start(self, db: AsyncIOMotorDatabase) -> None:
+        self.db = db
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [asyncio.create_task(self._worker(index)) for index in range(self.concurrency)]
+        self._tasks.append(asyncio.create_task(self._sweeper()))
+        logger.info("Worker OCR struk dimulai", extra={"concurrency": self.concurrency})
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queued.clear()
+
+    def submit(self, receipt_id: str) -> bool:
+        if self.queue is None or receipt_id in self._queued:
+            return False
+        try:
+            self.queue.put_nowait(receipt_id)
+        except asyncio.QueueFull:
+            # Struk tetap PENDING di database dan akan diambil oleh sweeper.
+            logger.warning("Antrian OCR penuh", extra={"receipt_id": receipt_id})
+            return False
+        self._queued.add(receipt_id)
+        return True
+
+    async def _sweeper(self) -> None:
+        interval = max(30, self.lease_seconds // 2)
+        while True:
+            try:
+                await self._enqueue_unclaimed()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Gagal memindai struk PENDING")
+            await asyncio.sleep(interval)
+
+    async def _enqueue_unclaimed(self) -> None:
+        free_slots = self.queue.maxsize - self.queue.qsize()
+        if free_slots <= 0:
+            return
+        cursor = self.db.receipts.find(
+            {
+                "status": ReceiptStatus.PENDING,
+                "$or": [{"claimed_until": {"$exists": False}}, {"claimed_until": {"$lt": datetime.utcnow()}}],
+            },
+            {"_id": 1},
+        ).sort("upload_date", 1).limit(free_slots)
+        async for doc in cursor:
+            self.submit(str(doc["_id"]))
+
+    async def _claim(self, receipt_id: str) -> Optional[dict]:
+        now = datetime.utcnow()
+        return await self.db.receipts.find_one_and_update(
+            {
+                "_id": ObjectId(receipt_id),
+                "status": ReceiptStatus.PENDING,
+                "$or": [{"claimed_until": {"$exists": False}}, {"claimed_until": {"$lt": now}}],
+            },
+            {
+                "$set": {"claimed_until": now + timedelta(seconds=self.lease_seconds), "claim_token": uuid.uuid4().hex},
+                "$inc": {"attempts": 1},
+            },
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            receipt_id = await self.queue.get()
+            self._queued.discard(receipt_id)
+            try:
+                await self._process(receipt_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Worker OCR gagal memproses struk", extra={"receipt_id": receipt_id, "worker": index})
+            finally:
+                self.queue.task_done()
+
+    async def _process(self, receipt_id: str) -> None:
+        receipt = await self._claim(receipt_id)
+        if receipt is None:
+            return
+
+        claim_token = receipt["claim_token"]
+        if receipt["attempts"] > self.max_attempts:
+            await expense_service.fail_pending_receipt(self.db, receipt_id, claim_token, "Batas percobaan OCR terlampaui.")
+            return
+
+        # Error transien sudah dicoba ulang oleh governor di dalam deadline-nya. Bila Gemini tetap tidak
+        # tersedia, lease dilepas dengan backoff dan struk diambil lagi oleh sweeper pada putaran berikutnya.
+        try:
+            extracted_data = await gemini_service.process_receipt_with_gemini(
+                bytes(receipt["image_data"]), receipt["image_mime_type"], priority=Priority.BACKGROUND, raise_errors=True
+            )
+        except Exception as exc:
+            delay = self.retry_base_seconds * (2 ** (receipt["attempts"] - 1)) * random.uniform(0.5, 1.5)
+            await expense_service.release_pending_receipt(
+                self.db, receipt_id, claim_token, datetime.utcnow() + timedelta(seconds=delay)
+            )
+            logger.warning(
+                "Gemini tidak tersedia untuk OCR struk, dijadwalkan ulang",
+                extra={"receipt_id": receipt_id, "attempt": receipt["attempts"], "delay_s": round(delay, 2), "error": str(exc)[:200]},
+            )
+            return
+
+        # Respons yang tetap tidak valid setelah perbaikan tidak akan membaik bila diulang.
+        if not extracted_data or not extracted_data.get("items"):
+            await expense_service.fail_pending_receipt(self.db, receipt_id, claim_token, "Gagal mengekstrak data dari struk.")
+            logger.info("OCR struk gagal", extra={"receipt_id": receipt_id})
+            return
+
+        if receipt.get("content_hash"):
+            await receipt_cache_service.store_extraction(
+                self.db, receipt["user_id"], receipt["content_hash"], extracted_data, receipt.get("perceptual_hash")
+            )
+        created = await expense_service.complete_pending_receipt(
+            self.db, receipt_id, receipt["user_id"], extracted_data, claim_token
+        )
+        if created is None:
+            logger.warning("Lease struk sudah diambil alih, hasil OCR dibuang", extra={"receipt_id": receipt_id})
+            return
+        logger.info("OCR struk selesai", extra={"receipt_id": receipt_id})
+
+
+receipt_ocr_workers = ReceiptOcrWorkerPool()
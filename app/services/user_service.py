@@ -4,6 +4,8 @@ from bson import ObjectId
 from datetime import datetime
 from passlib.context import CryptContext
 
+from app.core.cache import auth_cache
+from app.core.invalidation import InvalidationEvent, invalidation_bus
 from app.models.user import UserCreate, UserUpdate, UserInDB, UserPublic
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -59,15 +61,31 @@ async def update_user(db: AsyncIOMotorDatabase, user_id: str, user_update: UserU
     
     update_data["updatedAt"] = datetime.utcnow()
     
-    await db.users.update_one(
+    # Dokumen sebelum update dipakai untuk mengetahui email lama: token yang masih beredar membawa
+    # email lama, jadi entri cache-nya juga harus dibuang saat email diganti.
+    previous = await db.users.find_one_and_update(
         {"_id": ObjectId(user_id)}, 
-        {"$set": update_data}
+        {"$set": update_data},
+        projection={"email": 1}
     )
     
     updated_user = await get_user_by_id(db, user_id)
     if updated_user:
+        if previous and previous.get("email") != updated_user.email:
+            await auth_cache.delete(previous["email"])
+        await auth_cache.delete(updated_user.email)
         user_data = updated_user.model_dump()
         user_data.pop("hashed_password", None)
         return UserPublic(**user_data)
     
-    raise Exception("User not found after update")
\ No newline at end of file
+    raise Exception("User not found after update")
+
+async def _invalidate_auth_cache(event: InvalidationEvent) -> None:
+    emails = event.values("email")
+    if not emails:
+        # Tanpa pre-image (mis. delete di server < 6.0) email tidak diketahui; kosongkan seluruh region.
+        await auth_cache.clear()
+    for email in emails:
+        await auth_cache.delete(email)
+
+invalidation_bus.register("users", _invalidate_auth_cache, fields=["email"], on_reset=auth_cache.clear)
\ No newline at end of file
@@ -0,0 +1,44 @@
+from functools import lru_cache
+from typing import Any, Dict
+
+from pydantic import TypeAdapter
+
+_TYPE_NAMES = {
+    "object": "OBJECT",
+    "array": "ARRAY",
+    "string": "STRING",
+    "integer": "INTEGER",
+    "number": "NUMBER",
+    "boolean": "BOOLEAN",
+}
+
+def _convert(node: Dict[str, Any], defs: Dict[str, Any]) -> Dict[str, Any]:
+    if "$ref" in node:
+        return _convert(defs[node["$ref"].split("/")[-1]], defs)
+
+    nullable = False
+    if "anyOf" in node:
+        variants = [variant for variant in node["anyOf"] if variant.get("type") != "null"]
+        nullable = len(variants) < len(node["anyOf"])
+        node = variants[0] if len(variants) == 1 else {"type": "string"}
+        if "$ref" in node:
+            node = defs[node["$ref"].split("/")[-1]]
+
+    schema: Dict[str, Any] = {"type": _TYPE_NAMES[node.get("type", "string")]}
+    if nullable:
+        schema["nullable"] = True
+    if "enum" in node:
+        schema["enum"] = [str(value) for value in node["enum"]]
+    if "items" in node:
+        schema["items"] = _convert(node["items"], defs)
+    if "properties" in node:
+        schema["properties"] = {name: _convert(child, defs) for name, child in node["properties"].items()}
+        if node.get("required"):
+            schema["required"] = list(node["required"])
+    return schema
+
+@lru_cache(maxsize=None)
+def gemini_response_schema(annotation: Any) -> Dict[str, Any]:
+    # Subset OpenAPI yang diterima response_schema Gemini: tanpa $ref, title, default.
+    json_schema = TypeAdapter(annotation).json_schema()
+    return _convert(json_schema, json_schema.get("$defs", {}))
@@ -0,0 +1,67 @@
+import json
+from typing import Any, Optional
+
+_OPENERS = {"{": "}", "[": "]"}
+
+class JSONStreamExtractor:
+    # Mengambil nilai JSON (objek/array) valid pertama dari teks yang datang
+    # bertahap; teks di sekitarnya (code fence, prosa) diabaikan.
+    def __init__(self):
+        self.buffer = ""
+        self.value: Any = None
+        self.done = False
+        self._start: Optional[int] = None
+        self._stack: list = []
+        self._in_string = False
+        self._escaped = False
+        self._position = 0
+
+    def feed(self, chunk: str) -> bool:
+        if self.done:
+            return True
+        self.buffer += chunk
+        while self._position < len(self.buffer):
+            char = self.buffer[self._position]
+            self._position += 1
+            if self._start is None:
+                if char in _OPENERS:
+                    self._start = self._position - 1
+                    self._stack = [_OPENERS[char]]
+                continue
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+            if char == '"':
+                self._in_string = True
+            elif char in _OPENERS:
+                self._stack.append(_OPENERS[char])
+            elif char in "}]":
+                if char != self._stack[-1]:
+                    self._restart()
+                    continue
+                self._stack.pop()
+                if not self._stack and self._complete():
+                    return True
+        return False
+
+    def _complete(self) -> bool:
+        try:
+            self.value = json.loads(self.buffer[self._start:self._position])
+        except json.JSONDecodeError:
+            self._restart()
+            return False
+        self.done = True
+        return True
+
+    def _restart(self) -> None:
+        # Kandidat gagal: cari pembuka berikutnya setelah posisi awal kandidat.
+        self._position = self._start + 1
+        self._start = None
+        self._stack = []
+        self._in_string = False
+        self._escaped = False
@@ -0,0 +1,62 @@
+"""Bandingkan dua hasil `benchmarks.run` dan tandai regresi.
+
+Penggunaan:
+    python -m benchmarks.compare bench/base.json bench/HEAD.json --threshold 0.15
+
+Keluar dengan status 1 bila p95 suatu skenario naik atau RPS-nya turun
+melebihi ambang relatif, atau bila jumlah error bertambah.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def _change(before: float, after: float) -> float:
+    return (after - before) / before if before else 0.0
+
+
+def compare(base: dict, head: dict, threshold: float) -> list:
+    rows = []
+    for name, after in head["scenarios"].items():
+        before = base["scenarios"].get(name)
+        if before is None:
+            continue
+        p95_change = _change(before["p95_ms"], after["p95_ms"])
+        rps_change = _change(before["rps"], after["rps"])
+        rows.append({
+            "scenario": name,
+            "p95_ms": [before["p95_ms"], after["p95_ms"]],
+            "p95_change": round(p95_change, 3),
+            "rps": [before["rps"], after["rps"]],
+            "rps_change": round(rps_change, 3),
+            "errors": [before["errors"], after["errors"]],
+            "regression": p95_change > threshold or rps_change < -threshold or after["errors"] > before["errors"],
+        })
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base", type=Path)
+    parser.add_argument("head", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.15, help="Ambang perubahan relatif (0.15 = 15%%)")
+    args = parser.parse_args(argv)
+
+    base = json.loads(args.base.read_text())
+    head = json.loads(args.head.read_text())
+    rows = compare(base, head, args.threshold)
+
+    print(f"{base['meta']['commit']} -> {head['meta']['commit']}")
+    for row in rows:
+        flag = "REGRESI" if row["regression"] else "ok"
+        print(
+            f"{row['scenario']:<22} p95 {row['p95_ms'][0]:>9.2f} -> {row['p95_ms'][1]:>9.2f} ms ({row['p95_change']:+.1%})  "
+            f"rps {row['rps'][0]:>8.1f} -> {row['rps'][1]:>8.1f} ({row['rps_change']:+.1%})  "
+            f"err {row['errors'][0]} -> {row['errors'][1]}  {flag}"
+        )
+    return 1 if any(row["regression"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,183 @@
+"""Suite benchmark performa Danaraga API.
+
+Penggunaan:
+    python -m benchmarks.run --scale 0.01 --requests 500 --output bench/HEAD.json
+    python -m benchmarks.run --mongomock --scale 0.001 --scenario users_profile --scenario pools_mine
+    python -m benchmarks.run --url http://127.0.0.1:8000 --mongo-uri mongodb://localhost:27017
+
+`main:app` dijalankan in-process (httpx ASGITransport) terhadap MongoDB lokal
+atau mongomock-motor, dengan backend Gemini dan Midtrans palsu. Dataset
+diisi secara deterministik (scale=1.0: 100k pengguna, 1M pengeluaran, 50k
+fasilitas, 10k pool) dan dipakai ulang selama scale/seed sama. Hasil p50/p95/p99
+dan RPS per skenario ditulis sebagai JSON untuk dibandingkan antar commit
+dengan `python -m benchmarks.compare`.
+
+Catatan: mongomock tidak mendukung query geospasial, sehingga skenario
+facilities_nearby hanya bermakna terhadap MongoDB sungguhan.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _configure_environment(args: argparse.Namespace) -> None:
+    # Settings dibaca saat import, jadi environment harus siap sebelum modul app diimpor.
+    os.environ["GEMINI_BACKEND"] = "fake"
+    os.environ["MIDTRANS_BACKEND"] = "fake"
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.setdefault("CACHE_BACKEND", "local")
+    # Benchmark mengirim ribuan request dari satu pengguna/IP; limiter akan membalas 429 dan merusak hasil.
+    os.environ["RATE_LIMIT_ENABLED"] = "false"
+    os.environ["MONGO_DB_NAME"] = args.db_name
+    if args.mongo_uri:
+        os.environ["MONGO_URI"] = args.mongo_uri
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    return round(values[min(len(values) - 1, int(fraction * len(values)))], 2)
+
+
+async def _run_scenario(client: httpx.AsyncClient, scenario, concurrency: int, seed: int) -> Dict[str, Any]:
+    rng = random.Random(f"{seed}:{scenario.name}")
+    requests = [scenario.build(rng, number) for number in range(scenario.requests)]
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    next_request = 0
+
+    async def worker() -> None:
+        nonlocal next_request
+        while next_request < len(requests):
+            method, url, kwargs = requests[next_request]
+            next_request += 1
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                statuses[str(response.status_code)] += 1
+            except httpx.HTTPError as error:
+                statuses[type(error).__name__] += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    errors = sum(count for status, count in statuses.items() if not status.startswith(("2", "3")))
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "status_codes": dict(statuses),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": _percentile(latencies, 0.50),
+        "p95_ms": _percentile(latencies, 0.95),
+        "p99_ms": _percentile(latencies, 0.99),
+        "mean_ms": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+    }
+
+
+async def _run(args: argparse.Namespace) -> Dict[str, Any]:
+    import main
+    from app.core.db import db_manager, get_database
+    from app.services import gemini_service
+    from benchmarks.scenarios import ScenarioContext, build_scenarios
+    from benchmarks.seed import DatasetSize, seed_dataset
+
+    async def execute() -> Dict[str, Any]:
+        dataset = await seed_dataset(get_database(), args.scale, args.seed, reseed=args.reseed)
+        scenarios = build_scenarios(ScenarioContext(DatasetSize.from_scale(args.scale)), args.requests)
+        selected = args.scenario or list(scenarios)
+        unknown = sorted(set(selected) - set(scenarios))
+        if unknown:
+            raise SystemExit(f"Skenario tidak dikenal: {', '.join(unknown)}")
+
+        if args.url:
+            client = httpx.AsyncClient(base_url=args.url, timeout=60.0)
+        else:
+            # Exception aplikasi dicatat sebagai 500, bukan menghentikan benchmark.
+            transport = httpx.ASGITransport(app=main.app, raise_app_exceptions=False)
+            client = httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=60.0)
+
+        results = {}
+        async with client:
+            for name in selected:
+                results[name] = await _run_scenario(client, scenarios[name], args.concurrency, args.seed)
+                print(f"{name}: {json.dumps(results[name])}", file=sys.stderr)
+        return {"dataset": dataset, "scenarios": results}
+
+    if args.mongomock:
+        from mongomock_motor import AsyncMongoMockClient
+
+        db_manager.client = AsyncMongoMockClient()
+        db_manager.db = db_manager.client[args.db_name]
+        await gemini_service.init_model()
+        return await execute()
+
+    async with main.app.router.lifespan_context(main.app):
+        return await execute()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=0.01, help="Fraksi dari volume penuh dataset")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reseed", action="store_true", help="Isi ulang dataset walau sudah ada")
+    parser.add_argument("--requests", type=int, default=500, help="Jumlah request per skenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--scenario", action="append", help="Jalankan skenario tertentu saja (boleh berulang)")
+    parser.add_argument("--mongo-uri", help="URI MongoDB lokal (default: MONGO_URI)")
+    parser.add_argument("--db-name", default="danaraga_benchmark")
+    parser.add_argument("--mongomock", action="store_true", help="Gunakan mongomock-motor, tanpa MongoDB")
+    parser.add_argument("--url", help="Bebani server yang sudah berjalan alih-alih main:app in-process")
+    parser.add_argument("--output", type=Path, help="Simpan hasil JSON ke file ini")
+    args = parser.parse_args(argv)
+
+    _configure_environment(args)
+    started_at = datetime.now(timezone.utc).isoformat()
+    report = asyncio.run(_run(args))
+    report["meta"] = {
+        "commit": _git_commit(),
+        "started_at": started_at,
+        "python": platform.python_version(),
+        "target": args.url or "in-process",
+        "database": "mongomock" if args.mongomock else "mongodb",
+        "scale": args.scale,
+        "seed": args.seed,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+    }
+
+    rendered = json.dumps(report, indent=2, default=str)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(rendered)
+    print(rendered)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,103 @@
+import random
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Tuple
+
+from app.security import create_access_token
+from app.jobs.seed_data import (CITIES, DISBURSEMENT, FACILITY, MEMBERS_PER_POOL, POOL, SEED_PASSWORD, DatasetSize,
+                                object_id, pool_member_index, user_email)
+
+API = "/api"
+
+Request = Tuple[str, str, Dict[str, Any]]
+
+
+@dataclass
+class Scenario:
+    name: str
+    build: Callable[[random.Random, int], Request]
+    requests: int
+
+
+class ScenarioContext:
+    def __init__(self, size: DatasetSize):
+        self.size = size
+        self._tokens: Dict[int, str] = {}
+
+    def headers(self, user_index: int) -> Dict[str, str]:
+        token = self._tokens.get(user_index)
+        if token is None:
+            token = self._tokens[user_index] = create_access_token({"sub": user_email(user_index)})
+        return {"Authorization": f"Bearer {token}"}
+
+    def random_user(self, rng: random.Random) -> int:
+        # Pengguna aktif terkonsentrasi pada 1000 akun agar cache auth ikut teruji.
+        return rng.randrange(min(self.size.users, 1000))
+
+
+def build_scenarios(context: ScenarioContext, requests: int) -> Dict[str, Scenario]:
+    size = context.size
+
+    def auth_login(rng: random.Random, _: int) -> Request:
+        body = {"email": user_email(context.random_user(rng)), "password": SEED_PASSWORD}
+        return "POST", f"{API}/auth/login", {"json": body}
+
+    def users_profile(rng: random.Random, _: int) -> Request:
+        return "GET", f"{API}/users/profile", {"headers": context.headers(context.random_user(rng))}
+
+    def expenses_list(rng: random.Random, _: int) -> Request:
+        params = {"page": rng.randint(1, 3), "limit": 20}
+        return "GET", f"{API}/expenses/", {"params": params, "headers": context.headers(context.random_user(rng))}
+
+    def expenses_summary(rng: random.Random, _: int) -> Request:
+        params = {"period": rng.choice(["weekly", "monthly", "yearly"])}
+        return "GET", f"{API}/expenses/summary", {"params": params, "headers": context.headers(context.random_user(rng))}
+
+    def facilities_nearby(rng: random.Random, _: int) -> Request:
+        _, _, (_, latitude, longitude, _) = rng.choice(CITIES)
+        preferences = {
+            "userLocation": {"latitude": latitude + rng.uniform(-0.1, 0.1), "longitude": longitude + rng.uniform(-0.1, 0.1)},
+            "maxDistanceKm": rng.choice([5, 10, 20]),
+        }
+        return "POST", f"{API}/facilities/nearby", {"json": {"preferences": preferences}}
+
+    def facilities_detail(rng: random.Random, _: int) -> Request:
+        facility_id = object_id(FACILITY, rng.randrange(size.facilities))
+        return "GET", f"{API}/facilities/{facility_id}", {"headers": context.headers(context.random_user(rng))}
+
+    def pools_mine(rng: random.Random, _: int) -> Request:
+        return "GET", f"{API}/microfunding/pools/my-pools", {"headers": context.headers(context.random_user(rng))}
+
+    def pool_members(rng: random.Random, _: int) -> Request:
+        pool_id = object_id(POOL, rng.randrange(size.pools))
+        return "GET", f"{API}/microfunding/pools/{pool_id}/members", {}
+
+    def pool_membership_me(rng: random.Random, _: int) -> Request:
+        pool_index = rng.randrange(size.pools)
+        user_index = pool_member_index(size, pool_index, rng.randrange(MEMBERS_PER_POOL))
+        url = f"{API}/microfunding/pools/{object_id(POOL, pool_index)}/members/me"
+        return "GET", url, {"headers": context.headers(user_index)}
+
+    def disbursement_vote(rng: random.Random, number: int) -> Request:
+        # Tiap pasangan (pencairan, anggota) hanya memilih sekali. Maksimal separuh
+        # anggota memilih dengan suara bergantian sehingga pencairan tetap PENDING_VOTE.
+        voters_per_disbursement = MEMBERS_PER_POOL // 2
+        pool_index = (number // voters_per_disbursement) % size.pools
+        position = 1 + number % voters_per_disbursement
+        user_index = pool_member_index(size, pool_index, position)
+        body = {"vote": "FOR" if position % 2 else "AGAINST", "comment": "benchmark"}
+        url = f"{API}/microfunding/disbursements/{object_id(DISBURSEMENT, pool_index)}/vote"
+        return "POST", url, {"json": body, "headers": context.headers(user_index)}
+
+    builders = [
+        (auth_login, max(1, requests // 10)),
+        (users_profile, requests),
+        (expenses_list, requests),
+        (expenses_summary, requests),
+        (facilities_nearby, requests),
+        (facilities_detail, requests),
+        (pools_mine, requests),
+        (pool_members, requests),
+        (pool_membership_me, requests),
+        (disbursement_vote, min(requests, size.pools * (MEMBERS_PER_POOL // 2))),
+    ]
+    return {build.__name__: Scenario(build.__name__, build, count) for build, count in builders}
\ No newline at end of file
@@ -0,0 +1,27 @@
+import logging
+import time
+from dataclasses import asdict
+from typing import Any, Dict
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.jobs.seed_data import DatasetSize, seed_async
+
+logger = logging.getLogger(__name__)
+
+META_COLLECTION = "benchmark_meta"
+INSERT_CONCURRENCY = 4
+
+
+async def seed_dataset(db: AsyncIOMotorDatabase, scale: float, seed: int, reseed: bool = False) -> Dict[str, Any]:
+    size = DatasetSize.from_scale(scale)
+    marker = {"scale": scale, "seed": seed, "size": asdict(size)}
+    existing = await db[META_COLLECTION].find_one({"_id": "dataset"})
+    if existing and not reseed and all(existing.get(key) == value for key, value in marker.items()):
+        logger.info("Dataset benchmark sudah ada, seeding dilewati", extra=marker)
+        return {**marker, "seeded": False}
+
+    started = time.perf_counter()
+    counts = await seed_async(db, size, seed, concurrency=INSERT_CONCURRENCY)
+    await db[META_COLLECTION].replace_one({"_id": "dataset"}, {"_id": "dataset", **marker}, upsert=True)
+    return {**marker, "seeded": True, "counts": counts, "seconds": round(time.perf_counter() - started, 2)}
\ No newline at end of file
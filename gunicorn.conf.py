@@ -0,0 +1,63 @@
+# Profil deployment produksi: N worker uvicorn di bawah gunicorn dengan import
+# aplikasi dimuat sekali di master (preload) lalu dibagi ke worker lewat fork.
+#
+#   gunicorn -c gunicorn.conf.py main:app
+import itertools
+import multiprocessing
+import os
+import subprocess
+import sys
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "0"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "0"))
+
+# Harus di-set sebelum aplikasi di-preload karena settings dibaca saat import.
+# Limiter ikut memakai server cache bersama; limiter lokal per worker membuat batas efektif N kali lipat.
+os.environ.setdefault("CACHE_BACKEND", "shared")
+os.environ.setdefault("RATE_LIMIT_BACKEND", "shared")
+
+# Governor Gemini bekerja per proses; kuota RPM/TPM dibagi rata ke semua worker.
+for name, default in (("GEMINI_REQUESTS_PER_MINUTE", 300), ("GEMINI_TOKENS_PER_MINUTE", 1000000)):
+    os.environ[name] = str(max(1, int(os.getenv(name, default)) // workers))
+
+_cache_server = None
+# Slot worker yang sedang dipakai; worker pengganti mewarisi slot terkecil yang kosong.
+_used_slots = set()
+
+
+def on_starting(server):
+    global _cache_server
+    if "shared" in (os.environ["CACHE_BACKEND"], os.environ["RATE_LIMIT_BACKEND"]):
+        _cache_server = subprocess.Popen([sys.executable, "-m", "app.core.cache"])
+        server.log.info("Server cache bersama dijalankan (pid %s)", _cache_server.pid)
+
+
+def pre_fork(server, worker):
+    worker.slot = next(slot for slot in itertools.count() if slot not in _used_slots)
+    _used_slots.add(worker.slot)
+
+
+def post_fork(server, worker):
+    from app.core.config import settings
+    from app.core.logger import reinit_logging_after_fork
+
+    reinit_logging_after_fork()
+    # Consumer bus invalidasi memakai slot, bukan pid, agar resume token dilanjutkan setelah restart worker.
+    settings.INVALIDATION_WORKER_SLOT = worker.slot
+
+
+def child_exit(server, worker):
+    _used_slots.discard(getattr(worker, "slot", None))
+
+
+def on_exit(server):
+    if _cache_server is not None:
+        _cache_server.terminate()
+        _cache_server.wait(timeout=10)
\ No newline at end of file
@@ -1,18 +1,48 @@
+import logging
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
 
+from app.core.cache import close_cache_backend
 from app.core.config import settings
-from app.core.db import connect_to_mongo, close_mongo_connection
+from app.core.db import connect_to_mongo, close_mongo_connection, get_database
+from app.core.idempotency import IdempotencyMiddleware, ensure_indexes as ensure_idempotency_indexes
+from app.core.invalidation import invalidation_bus
+from app.core.logger import setup_logging, shutdown_logging, RequestContextMiddleware
+from app.core.request_limits import BodySizeLimitMiddleware
+from app.core.rate_limit import RateLimitHeaderMiddleware, close_rate_limit_backend
 
-from app.api import auth, users, facilities, expense, microfunding
+setup_logging()
+
+from app.api import auth, users, facilities, expense, microfunding, analytics
+from app.services import billing_service, expense_service, facility_service, gemini_service, ledger_service, microfunding_service, receipt_cache_service
+from app.services.receipt_ocr_worker import receipt_ocr_workers
+
+logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    print("Memulai Danaraga API")
+    logger.info("Memulai Danaraga API")
     await connect_to_mongo()
+    await expense_service.ensure_indexes(get_database())
+    await facility_service.ensure_indexes(get_database())
+    await microfunding_service.ensure_indexes(get_database())
+    await ledger_service.ensure_indexes(get_database())
+    await billing_service.ensure_indexes(get_database())
+    await receipt_cache_service.ensure_indexes(get_database())
+    await ensure_idempotency_indexes(get_database())
+    await receipt_ocr_workers.start(get_database())
+    await gemini_service.init_model()
+    gemini_service.start_usage_reporter()
+    await invalidation_bus.start(get_database())
     yield
+    await invalidation_bus.stop()
+    await gemini_service.stop_usage_reporter()
+    await receipt_ocr_workers.stop()
+    await close_cache_backend()
+    await close_rate_limit_backend()
     await close_mongo_connection()
-    print("Danaraga API Telah Berhenti")
+    logger.info("Danaraga API Telah Berhenti")
+    shutdown_logging()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -22,13 +52,19 @@ app = FastAPI(
     lifespan=lifespan                             
 )
 
-print("Mendaftarkan router")
+app.add_middleware(IdempotencyMiddleware)
+app.add_middleware(RateLimitHeaderMiddleware)
+app.add_middleware(BodySizeLimitMiddleware)
+app.add_middleware(RequestContextMiddleware)
+
+logger.info("Mendaftarkan router")
 app.include_router(auth.router, prefix=f"{settings.API_V1_STR}/auth", tags=["Authentication"])
 app.include_router(users.router, prefix=f"{settings.API_V1_STR}/users", tags=["Users"])
 app.include_router(expense.router, prefix=f"{settings.API_V1_STR}/expenses", tags=["Expenses"])
 app.include_router(facilities.router, prefix=f"{settings.API_V1_STR}/facilities", tags=["Facilities"])
 app.include_router(microfunding.router, prefix=f"{settings.API_V1_STR}/microfunding", tags=["Microfunding"])
-print("Semua router berhasil didaftarkan.")
+app.include_router(analytics.router, prefix=f"{settings.API_V1_STR}/analytics", tags=["Analytics"])
+logger.info("Semua router berhasil didaftarkan.")
 
 @app.get("/", tags=["Root"])
 async def read_root():
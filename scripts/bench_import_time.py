@@ -0,0 +1,89 @@
+"""Mengukur waktu cold-start import `main:app` dengan `python -X importtime`.
+
+Penggunaan:
+    python -m scripts.bench_import_time
+    python -m scripts.bench_import_time --budget-ms 1500 --runs 5 --output import_time.json
+
+Keluar dengan status 1 bila median waktu import melewati anggaran atau bila
+modul berat yang seharusnya dimuat malas (mis. google.generativeai) ikut
+terimpor, sehingga dapat dipakai sebagai gate di CI.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Modul yang tidak boleh diimpor saat `import main`; semuanya dimuat saat pertama dipakai.
+LAZY_MODULES = ("google.generativeai", "grpc")
+
+LINE_PATTERN = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$")
+
+
+def _measure_once(target: str) -> dict:
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+
+    modules = {}
+    for line in completed.stderr.splitlines():
+        match = LINE_PATTERN.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules[name] = {"self_us": int(self_us), "cumulative_us": int(cumulative_us), "depth": len(indent) // 2}
+    if target not in modules:
+        raise SystemExit(f"Output importtime untuk {target} tidak ditemukan:\n{completed.stderr[-2000:]}")
+    return modules
+
+
+def run(target: str, runs: int, top: int) -> dict:
+    samples = [_measure_once(target) for _ in range(runs)]
+    totals_ms = [sample[target]["cumulative_us"] / 1000 for sample in samples]
+    last = samples[-1]
+
+    heaviest = sorted(
+        ((name, data) for name, data in last.items() if data["depth"] == 1),
+        key=lambda item: item[1]["cumulative_us"],
+        reverse=True,
+    )[:top]
+    return {
+        "target": target,
+        "runs": runs,
+        "median_ms": round(statistics.median(totals_ms), 1),
+        "min_ms": round(min(totals_ms), 1),
+        "max_ms": round(max(totals_ms), 1),
+        "module_count": len(last),
+        "eager_lazy_modules": [name for name in LAZY_MODULES if any(m == name or m.startswith(name + ".") for m in last)],
+        "heaviest": [{"module": name, "cumulative_ms": round(data["cumulative_us"] / 1000, 1)} for name, data in heaviest],
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", default="main", help="Modul yang diimpor (default: main)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="Jumlah modul langsung terberat yang dilaporkan")
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="Batas median waktu import")
+    parser.add_argument("--output", type=Path, help="Simpan hasil JSON ke file ini")
+    args = parser.parse_args(argv)
+
+    report = run(args.target, args.runs, args.top)
+    report["budget_ms"] = args.budget_ms
+    report["within_budget"] = report["median_ms"] <= args.budget_ms and not report["eager_lazy_modules"]
+
+    rendered = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(rendered)
+    print(rendered)
+    return 0 if report["within_budget"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,118 @@
+"""Benchmark preprocessing gambar struk sebelum OCR Gemini.
+
+Penggunaan:
+    python -m scripts.bench_receipt_preprocessing --corpus path/ke/struk
+    python -m scripts.bench_receipt_preprocessing --synthetic 20 --output bench_output.json
+
+Jika --corpus tidak diberikan, korpus struk sintetis beresolusi kamera ponsel
+dibuat secara deterministik di direktori sementara.
+"""
+import argparse
+import io
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image, ImageDraw, ImageFilter
+
+from app.services.receipt_image_service import downscale_receipt_image
+
+IMAGE_SUFFIXES = {".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png", ".webp": "image/webp"}
+
+ITEMS = ["PARACETAMOL 500MG", "AMOXICILLIN 500MG", "VITAMIN C 1000", "KONSULTASI DOKTER", "CEK GULA DARAH", "OBH SIRUP"]
+
+
+def _make_synthetic_receipt(rng: random.Random, size=(3024, 4032)) -> bytes:
+    image = Image.new("RGB", size, (rng.randint(200, 235),) * 3)
+    draw = ImageDraw.Draw(image)
+    paper = (size[0] // 6, size[1] // 10, size[0] * 5 // 6, size[1] * 9 // 10)
+    draw.rectangle(paper, fill=(250, 250, 245))
+    y = paper[1] + 80
+    for _ in range(rng.randint(12, 30)):
+        text = f"{rng.choice(ITEMS)}  x{rng.randint(1, 3)}  Rp{rng.randint(5, 300) * 1000:,}"
+        draw.text((paper[0] + 60, y), text, fill=(30, 30, 30))
+        y += rng.randint(70, 110)
+    image = image.filter(ImageFilter.GaussianBlur(0.6))
+
+    noise = Image.effect_noise(size, rng.randint(8, 20)).convert("RGB")
+    image = Image.blend(image, noise, 0.08)
+
+    exif = Image.Exif()
+    exif[0x0110] = "Synthetic Phone"
+    exif[0x0112] = rng.choice([1, 6])
+    output = io.BytesIO()
+    image.save(output, format="JPEG", quality=95, exif=exif)
+    return output.getvalue()
+
+
+def _build_synthetic_corpus(directory: Path, count: int, seed: int) -> None:
+    rng = random.Random(seed)
+    for index in range(count):
+        (directory / f"receipt_{index:03d}.jpg").write_bytes(_make_synthetic_receipt(rng))
+
+
+def run(corpus: Path, repeat: int) -> dict:
+    files = sorted(p for p in corpus.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+    if not files:
+        raise SystemExit(f"Tidak ada gambar struk di {corpus}")
+
+    results = []
+    for path in files:
+        data = path.read_bytes()
+        mime_type = IMAGE_SUFFIXES[path.suffix.lower()]
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            processed = downscale_receipt_image(data, mime_type)
+            timings.append((time.perf_counter() - start) * 1000)
+        results.append({
+            "file": path.name,
+            "original_bytes": processed.original_bytes,
+            "processed_bytes": processed.processed_bytes,
+            "width": processed.width,
+            "height": processed.height,
+            "median_ms": round(statistics.median(timings), 2),
+        })
+
+    total_original = sum(r["original_bytes"] for r in results)
+    total_processed = sum(r["processed_bytes"] for r in results)
+    return {
+        "files": len(results),
+        "total_original_bytes": total_original,
+        "total_processed_bytes": total_processed,
+        "saved_ratio": round(1 - total_processed / total_original, 4) if total_original else 0,
+        "median_ms": round(statistics.median(r["median_ms"] for r in results), 2),
+        "p95_ms": round(sorted(r["median_ms"] for r in results)[int(0.95 * (len(results) - 1))], 2),
+        "results": results,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", type=Path, help="Direktori berisi contoh gambar struk")
+    parser.add_argument("--synthetic", type=int, default=10, help="Jumlah struk sintetis bila --corpus kosong")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", type=Path, help="Simpan hasil JSON ke file ini")
+    args = parser.parse_args(argv)
+
+    if args.corpus:
+        report = run(args.corpus, args.repeat)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            _build_synthetic_corpus(Path(tmp), args.synthetic, args.seed)
+            report = run(Path(tmp), args.repeat)
+
+    rendered = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(rendered)
+    print(rendered)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""Periksa jumlah round trip MongoDB per endpoint tulis microfunding.
+
+Penggunaan:
+    python -m scripts.check_round_trips --mongo-uri mongodb://localhost:27017/?replicaSet=rs0
+    MONGO_TRANSACTIONS=false python -m scripts.check_round_trips
+
+Aplikasi dijalankan in-process dengan MONGO_COMMAND_MONITORING=true sehingga
+setiap perintah yang dikirim driver (find, insert, findAndModify,
+commitTransaction, ...) tercatat oleh `app.core.db.command_counter`. Alur
+buat pool -> ubah pool -> minta bergabung -> setujui -> kontribusi -> ajukan
+pencairan -> vote dijalankan terhadap database sementara, dan skrip keluar
+dengan kode 1 jika ada endpoint yang melebihi anggaran round trip-nya.
+MongoDB sungguhan dibutuhkan karena mongomock tidak mendukung command monitoring;
+tests/test_round_trips.py menjalankan alur yang sama di mongomock dengan menghitung
+pemanggilan metode koleksi.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import httpx
+
+API = "/api/microfunding"
+
+
+def _configure_environment(args: argparse.Namespace) -> None:
+    os.environ["GEMINI_BACKEND"] = "fake"
+    os.environ["MIDTRANS_BACKEND"] = "fake"
+    os.environ["MONGO_COMMAND_MONITORING"] = "true"
+    os.environ["CACHE_BACKEND"] = "local"
+    # getMore dan penyimpanan resume token bus invalidasi akan ikut terhitung.
+    os.environ["INVALIDATION_BUS_ENABLED"] = "false"
+    os.environ["RATE_LIMIT_ENABLED"] = "false"
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ["MONGO_DB_NAME"] = args.db_name
+    if args.mongo_uri:
+        os.environ["MONGO_URI"] = args.mongo_uri
+
+
+def _budgets(transactions: bool) -> Dict[str, int]:
+    commit = 1 if transactions else 0
+    return {
+        "create_pool": 2 + commit,           # insert pool + insert admin
+        "update_pool": 2,                    # cek admin + findAndModify
+        "request_to_join": 2,                # cari pool + insert
+        "approve_join_request": 5 + commit,  # cari request + agregasi admin/kapasitas + $inc member_count + update request + upsert anggota
+        "bulk_moderate_join_requests": 5 + commit,  # sama; $inc member_count satu per pool, berapa pun jumlah permintaannya
+        "create_contribution": 1,            # insert (token Midtrans sudah ada)
+        "create_disbursement": 1,            # insert
+        "vote_disbursement": 4,              # cari pencairan + cek anggota + findAndModify + hitung anggota
+    }
+
+
+async def seed_users(db) -> Dict[str, Dict[str, Any]]:
+    from app.security import create_access_token
+    from app.services.user_service import get_password_hash
+
+    password = get_password_hash("round-trip-check")
+    users = {}
+    for role in ("admin", "member"):
+        email = f"{role}@round-trips.danaraga.id"
+        result = await db["users"].insert_one({"email": email, "name": role.title(), "hashed_password": password})
+        users[role] = {"id": str(result.inserted_id), "headers": {"Authorization": f"Bearer {create_access_token({'sub': email})}"}}
+    return users
+
+
+async def exercise(client: httpx.AsyncClient, users: Dict[str, Dict[str, Any]], measure: Callable[..., Awaitable[dict]]) -> None:
+    # measure(name, role, method, url, body) mengirim permintaan dan mencatat round trip-nya.
+    # Menghangatkan cache auth agar hitungan hanya mencakup kerja endpoint.
+    for user in users.values():
+        (await client.get("/api/users/profile", headers=user["headers"])).raise_for_status()
+
+    pool = (await measure("create_pool", "admin", "POST", f"{API}/pools", {
+        "title": "Dana Sehat Uji", "description": "Pemeriksaan round trip", "type_of_community": "Kantor",
+        "max_members": 10, "contribution_period": "BULANAN", "contribution_amount_per_member": 50000,
+    }))["pool"]
+    await measure("update_pool", "admin", "PATCH", f"{API}/pools/{pool['id']}", {"title": "Dana Sehat Uji 2"})
+    join_request = (await measure("request_to_join", "member", "POST", f"{API}/join-requests",
+                                  {"pool_code": pool["pool_code"]}))["joinRequest"]
+    await measure("approve_join_request", "admin", "PATCH", f"{API}/join-requests/{join_request['id']}",
+                  {"status": "APPROVED"})
+    repeated_request = (await measure("request_to_join", "member", "POST", f"{API}/join-requests",
+                                      {"pool_code": pool["pool_code"]}))["joinRequest"]
+    await measure("bulk_moderate_join_requests", "admin", "PATCH", f"{API}/join-requests", {"decisions": [
+        {"request_id": repeated_request["id"], "status": "APPROVED"},
+        {"request_id": join_request["id"], "status": "APPROVED"},
+    ]})
+    await measure("create_contribution", "member", "POST", f"{API}/pools/{pool['id']}/contributions",
+                  {"amount": 50000})
+    disbursement = (await measure("create_disbursement", "member", "POST", f"{API}/pools/{pool['id']}/disbursements", {
+        "recipient_user_id": users["member"]["id"], "amount": 100000, "purpose": "Biaya rawat jalan",
+    }))["disbursement"]
+    await measure("vote_disbursement", "admin", "POST", f"{API}/disbursements/{disbursement['id']}/vote",
+                  {"vote": "FOR"})
+
+
+async def _run() -> Dict[str, Any]:
+    import main
+    from app.core.config import settings
+    from app.core.db import command_counter, get_database
+
+    results: Dict[str, Dict[str, Any]] = {}
+    async with main.app.router.lifespan_context(main.app):
+        db = get_database()
+        for name in ("users", "pools", "pool_members", "join_requests", "contributions", "disbursements"):
+            await db[name].delete_many({})
+        users = await seed_users(db)
+
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://round-trips") as client:
+            async def measure(name: str, role: str, method: str, url: str, body: Optional[dict] = None) -> dict:
+                command_counter.reset()
+                response = await client.request(method, url, json=body, headers=users[role]["headers"])
+                results[name] = {"status": response.status_code, **command_counter.snapshot()}
+                response.raise_for_status()
+                return response.json()["data"]
+
+            await exercise(client, users, measure)
+
+        budgets = _budgets(settings.MONGO_TRANSACTIONS)
+        for name, result in results.items():
+            result["budget"] = budgets[name]
+            result["ok"] = result["total"] <= budgets[name]
+        await db.client.drop_database(settings.MONGO_DB_NAME)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Periksa anggaran round trip MongoDB endpoint microfunding.")
+    parser.add_argument("--mongo-uri", default=None)
+    parser.add_argument("--db-name", default="danaraga_round_trips")
+    args = parser.parse_args()
+    _configure_environment(args)
+
+    results = asyncio.run(_run())
+    print(json.dumps(results, indent=2))
+    over_budget = [name for name, result in results.items() if not result["ok"]]
+    if over_budget:
+        print(f"Melebihi anggaran round trip: {', '.join(over_budget)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""Load test skala throughput Danaraga API dari 1 hingga N worker.
+
+Penggunaan:
+    python -m scripts.load_test --workers 1,2,4 --duration 15 --concurrency 64
+    python -m scripts.load_test --path /api/facilities/123 --token <JWT> --output load.json
+    python -m scripts.load_test --server uvicorn --workers 1,2
+
+Untuk setiap jumlah worker, server dijalankan dengan profil produksi
+(`gunicorn -c gunicorn.conf.py main:app`) atau `uvicorn --workers N`, lalu
+dibebani oleh beberapa proses klien httpx. Gemini memakai backend palsu secara
+default sehingga hanya kode aplikasi, MongoDB, dan cache yang terukur.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_server(kind: str, workers: int, port: int, cache_dir: str) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        WEB_CONCURRENCY=str(workers),
+        BIND=f"127.0.0.1:{port}",
+        CACHE_SOCKET_PATH=os.path.join(cache_dir, f"cache-{port}.sock"),
+        LOG_LEVEL=os.getenv("LOG_LEVEL", "WARNING"),
+    )
+    env.setdefault("GEMINI_BACKEND", "fake")
+    # Load test mengukur throughput aplikasi; limiter per IP akan memotongnya menjadi 429.
+    env.setdefault("RATE_LIMIT_ENABLED", "false")
+    if kind == "gunicorn":
+        command = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "main:app"]
+    else:
+        command = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+                   "--workers", str(workers), "--no-access-log"]
+    return subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def _wait_ready(base_url: str, process: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"Server berhenti sebelum siap (exit {process.returncode})")
+        try:
+            if httpx.get(f"{base_url}/", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise SystemExit("Server tidak siap dalam batas waktu")
+
+
+def _stop_server(process: subprocess.Popen) -> None:
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+async def _client_loop(base_url: str, paths: list, headers: dict, concurrency: int, duration: float) -> dict:
+    latencies = []
+    errors = 0
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=30.0) as client:
+        async def user(index: int) -> None:
+            nonlocal errors
+            request_number = index
+            while time.monotonic() < deadline:
+                path = paths[request_number % len(paths)]
+                request_number += concurrency
+                started = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    if response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        await asyncio.gather(*(user(index) for index in range(concurrency)))
+    return {"latencies": latencies, "errors": errors}
+
+
+def _client_process(args: tuple) -> dict:
+    return asyncio.run(_client_loop(*args))
+
+
+def _percentile(values: list, fraction: float) -> float:
+    return round(values[min(len(values) - 1, int(fraction * len(values)))], 2) if values else 0.0
+
+
+def run_level(args: argparse.Namespace, workers: int, cache_dir: str) -> dict:
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    process = _start_server(args.server, workers, port, cache_dir)
+    try:
+        _wait_ready(base_url, process)
+        headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+        per_client = max(1, args.concurrency // args.client_procs)
+        job = (base_url, args.path, headers, per_client, args.duration)
+
+        # Pemanasan singkat agar cache dan koneksi pool terisi sebelum diukur.
+        _client_process((base_url, args.path, headers, per_client, min(2.0, args.duration)))
+
+        with multiprocessing.Pool(args.client_procs) as pool:
+            results = pool.map(_client_process, [job] * args.client_procs)
+    finally:
+        _stop_server(process)
+
+    latencies = sorted(latency for result in results for latency in result["latencies"])
+    requests = len(latencies)
+    return {
+        "workers": workers,
+        "requests": requests,
+        "errors": sum(result["errors"] for result in results),
+        "rps": round(requests / args.duration, 1),
+        "p50_ms": _percentile(latencies, 0.50),
+        "p95_ms": _percentile(latencies, 0.95),
+        "p99_ms": _percentile(latencies, 0.99),
+        "mean_ms": round(statistics.fmean(latencies), 2) if latencies else 0.0,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default=f"1,{multiprocessing.cpu_count()}", help="Daftar jumlah worker, mis. 1,2,4")
+    parser.add_argument("--server", choices=("gunicorn", "uvicorn"), default="gunicorn")
+    parser.add_argument("--path", action="append", help="Path yang dibebani (boleh berulang); default /")
+    parser.add_argument("--token", help="JWT untuk endpoint yang membutuhkan autentikasi")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--client-procs", type=int, default=2)
+    parser.add_argument("--output", type=Path, help="Simpan hasil JSON ke file ini")
+    args = parser.parse_args(argv)
+    args.path = args.path or ["/"]
+
+    levels = []
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for workers in sorted({int(value) for value in args.workers.split(",")}):
+            levels.append(run_level(args, workers, cache_dir))
+
+    baseline = levels[0]["rps"] / levels[0]["workers"] if levels and levels[0]["rps"] else 0
+    for level in levels:
+        level["scaling_efficiency"] = round(level["rps"] / (baseline * level["workers"]), 3) if baseline else 0.0
+
+    report = {
+        "server": args.server,
+        "paths": args.path,
+        "duration_s": args.duration,
+        "concurrency": args.concurrency,
+        "cpu_count": multiprocessing.cpu_count(),
+        "levels": levels,
+    }
+    rendered = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(rendered)
+    print(rendered)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
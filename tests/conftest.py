@@ -0,0 +1,55 @@
+import os
+
+os.environ.setdefault("MONGO_TRANSACTIONS", "false")
+os.environ.setdefault("INVALIDATION_BUS_ENABLED", "false")
+os.environ.setdefault("GEMINI_BACKEND", "fake")
+os.environ.setdefault("MIDTRANS_BACKEND", "fake")
+os.environ.setdefault("CACHE_BACKEND", "local")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+import mongomock.collection
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+from pymongo import DeleteMany, DeleteOne, InsertOne, ReplaceOne, UpdateMany, UpdateOne
+from pymongo.results import BulkWriteResult
+
+
+def _bulk_write(self, requests, ordered=True, bypass_document_validation=False, session=None, **kwargs):
+    # mongomock memanggil add_update() tanpa argumen sort milik pymongo 4.13, jadi operasi bulk
+    # dijalankan satu per satu di sini dengan hasil yang sebangun dengan BulkWriteResult.
+    counts = {"nInserted": 0, "nMatched": 0, "nModified": 0, "nRemoved": 0, "nUpserted": 0, "upserted": []}
+    for index, request in enumerate(requests):
+        if isinstance(request, InsertOne):
+            self.insert_one(request._doc)
+            counts["nInserted"] += 1
+            continue
+        if isinstance(request, (DeleteOne, DeleteMany)):
+            delete = self.delete_one if isinstance(request, DeleteOne) else self.delete_many
+            counts["nRemoved"] += delete(request._filter).deleted_count
+            continue
+        if isinstance(request, ReplaceOne):
+            result = self.replace_one(request._filter, request._doc, upsert=request._upsert)
+        elif isinstance(request, (UpdateOne, UpdateMany)):
+            update = self.update_one if isinstance(request, UpdateOne) else self.update_many
+            result = update(request._filter, request._doc, upsert=request._upsert)
+        else:
+            raise TypeError(f"Operasi bulk tidak didukung: {request!r}")
+        counts["nMatched"] += result.matched_count
+        counts["nModified"] += result.modified_count
+        if result.upserted_id is not None:
+            counts["nUpserted"] += 1
+            counts["upserted"].append({"index": index, "_id": result.upserted_id})
+    return BulkWriteResult(counts, True)
+
+
+mongomock.collection.Collection.bulk_write = _bulk_write
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def db():
+    return AsyncMongoMockClient()["danaraga_test"]
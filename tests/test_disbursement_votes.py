@@ -0,0 +1,55 @@
+from bson import ObjectId
+
+import pytest
+
+from app.models.enums import DisbursementStatus, PoolMemberRole
+from app.services import microfunding_service
+from app.services.ledger_service import LEDGER_COLLECTION
+
+pytestmark = pytest.mark.anyio
+
+
+async def _pool_with_disbursement(db, balance, amount):
+    pool_id, admin_id, member_id = ObjectId(), ObjectId(), ObjectId()
+    await db["pools"].insert_one({"_id": pool_id, "current_amount": balance, "max_members": 10, "member_count": 2})
+    await db["pool_members"].insert_many([
+        {"pool_id": pool_id, "user_id": admin_id, "role": PoolMemberRole.ADMIN},
+        {"pool_id": pool_id, "user_id": member_id, "role": PoolMemberRole.MEMBER},
+    ])
+    disbursement_id = ObjectId()
+    await db["disbursements"].insert_one({
+        "_id": disbursement_id, "pool_id": pool_id, "recipient_user_id": member_id, "amount": amount,
+        "status": DisbursementStatus.PENDING_VOTE, "votes_for": 0, "votes_against": 0, "voters": [],
+    })
+    return pool_id, [admin_id, member_id], disbursement_id
+
+
+async def _vote_all(db, voters, disbursement_id):
+    result = None
+    for voter in voters:
+        result = await microfunding_service.vote_on_disbursement(db, str(voter), str(disbursement_id), "FOR")
+    return result["disbursement"]
+
+
+async def test_approval_debits_the_pool_when_balance_covers_it(db):
+    pool_id, voters, disbursement_id = await _pool_with_disbursement(db, balance=150000, amount=100000)
+
+    disbursement = await _vote_all(db, voters, disbursement_id)
+
+    assert disbursement["status"] == DisbursementStatus.APPROVED
+    assert (await db["pools"].find_one({"_id": pool_id}))["current_amount"] == 50000
+    assert await db[LEDGER_COLLECTION].count_documents({"source_id": disbursement_id}) == 1
+
+
+async def test_approval_stays_pending_when_balance_is_insufficient(db):
+    pool_id, voters, disbursement_id = await _pool_with_disbursement(db, balance=50000, amount=100000)
+
+    disbursement = await _vote_all(db, voters, disbursement_id)
+
+    assert disbursement["status"] == DisbursementStatus.PENDING_VOTE
+    stored = await db["disbursements"].find_one({"_id": disbursement_id})
+    assert stored["status"] == DisbursementStatus.PENDING_VOTE
+    assert stored["votes_for"] == 2
+    assert "resolved_at" not in stored
+    assert (await db["pools"].find_one({"_id": pool_id}))["current_amount"] == 50000
+    assert await db[LEDGER_COLLECTION].count_documents({}) == 0
@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+from app.jobs.facility_enrichment import CHECKPOINT_COLLECTION, JOB_NAME, run_enrichment
+from app.services import gemini_service
+from app.services.gemini_fake import FakeGeminiError, FakeGenerativeModel
+
+pytestmark = pytest.mark.anyio
+
+
+def _use_model(failing=()):
+    # Kode 400 tidak dicoba ulang governor, jadi setiap fasilitas gagal tepat satu panggilan.
+    def responder(contents):
+        if any(name in contents for name in failing):
+            raise FakeGeminiError(400)
+        return json.dumps({"overall_rating": 4.5, "phone": "(021) 5550123"})
+
+    model = FakeGenerativeModel(responder=responder)
+    gemini_service.set_model(model)
+    return model
+
+
+async def _seed(db, count):
+    await db["facilities"].insert_many([
+        {"name": f"Klinik Uji {index:02d}", "type": "CLINIC", "address": f"Jl. Uji No. {index}"}
+        for index in range(count)
+    ])
+
+
+async def test_failed_facilities_are_not_refetched_in_the_same_run(db):
+    await _seed(db, 12)
+    model = _use_model(failing=("Klinik Uji 03", "Klinik Uji 07"))
+
+    report = await run_enrichment(db, batch_size=5)
+
+    assert report["processed"] == 12
+    assert report["updated"] == 10
+    assert report["failed"] == 2
+    assert report["finished"] is True
+    # Fasilitas gagal dikecualikan lewat $nin, bukan diambil ulang di setiap batch.
+    assert len(model.calls) == 12
+    unchecked = await db["facilities"].find({"enrichment_checked_at": {"$exists": False}}).to_list(length=None)
+    assert sorted(doc["name"] for doc in unchecked) == ["Klinik Uji 03", "Klinik Uji 07"]
+    enriched = await db["facilities"].find_one({"name": "Klinik Uji 00"})
+    assert enriched["phone"] == "(021) 5550123"
+    assert enriched["enrichment_provenance"]["fields"] == ["overall_rating", "phone"]
+
+
+async def test_run_aborts_when_a_whole_batch_fails(db):
+    await _seed(db, 12)
+    model = _use_model(failing=("Klinik Uji",))
+
+    report = await run_enrichment(db, batch_size=5)
+
+    assert report["processed"] == 5
+    assert report["failed"] == 5
+    assert report["finished"] is False
+    assert len(model.calls) == 5
+    checkpoint = await db[CHECKPOINT_COLLECTION].find_one({"_id": JOB_NAME})
+    assert checkpoint["finished_at"] is None
+    assert checkpoint["failed"] == 5
+
+
+async def test_run_resumes_from_open_checkpoint(db):
+    await _seed(db, 12)
+    model = _use_model()
+
+    first = await run_enrichment(db, batch_size=5, limit=4)
+    checkpoint = await db[CHECKPOINT_COLLECTION].find_one({"_id": JOB_NAME})
+    assert first["processed"] == 4
+    assert first["finished"] is False
+    assert checkpoint["finished_at"] is None
+
+    second = await run_enrichment(db, batch_size=5)
+    resumed = await db[CHECKPOINT_COLLECTION].find_one({"_id": JOB_NAME})
+    # Run lanjutan memakai run_started_at yang sama dan hanya memproses sisa fasilitas.
+    assert resumed["run_started_at"] == checkpoint["run_started_at"]
+    assert second["processed"] == 8
+    assert second["finished"] is True
+    assert resumed["processed"] == 12
+    assert resumed["finished_at"] is not None
+    assert len(model.calls) == 12
+
+    third = await run_enrichment(db, batch_size=5)
+    assert third["processed"] == 0
@@ -0,0 +1,60 @@
+from collections import Counter
+
+import httpx
+import pytest
+from mongomock_motor import AsyncMongoMockCollection
+
+import main
+from app.core.db import get_database
+from scripts.check_round_trips import _budgets, exercise, seed_users
+
+pytestmark = pytest.mark.anyio
+
+COUNTED_METHODS = (
+    "find", "find_one", "aggregate", "count_documents", "insert_one", "insert_many", "update_one",
+    "update_many", "replace_one", "delete_one", "delete_many", "find_one_and_update", "bulk_write",
+)
+
+
+@pytest.fixture
+def round_trips(monkeypatch):
+    # Tanpa command monitoring di mongomock, setiap pemanggilan metode koleksi dihitung sebagai satu round trip.
+    calls = Counter()
+
+    def counted(name):
+        original = getattr(AsyncMongoMockCollection, name)
+
+        def wrapper(self, *args, **kwargs):
+            calls[f"{self.name}.{name}"] += 1
+            return original(self, *args, **kwargs)
+
+        return wrapper
+
+    for name in COUNTED_METHODS:
+        monkeypatch.setattr(AsyncMongoMockCollection, name, counted(name))
+    return calls
+
+
+async def test_microfunding_endpoints_stay_within_round_trip_budget(db, round_trips):
+    main.app.dependency_overrides[get_database] = lambda: db
+    users = await seed_users(db)
+    results = {}
+    try:
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://round-trips") as client:
+            async def measure(name, role, method, url, body=None):
+                round_trips.clear()
+                response = await client.request(method, url, json=body, headers=users[role]["headers"])
+                assert response.status_code < 400, response.text
+                results[name] = dict(round_trips)
+                return response.json()["data"]
+
+            await exercise(client, users, measure)
+    finally:
+        main.app.dependency_overrides.pop(get_database, None)
+
+    budgets = _budgets(transactions=False)
+    observed = {name: sum(calls.values()) for name, calls in results.items()}
+    assert observed.keys() == budgets.keys()
+    over_budget = {name: results[name] for name, total in observed.items() if total > budgets[name]}
+    assert not over_budget